@@ -0,0 +1,131 @@
+use JamStation
+GO
+
+-- Бронирование зала за один вызов: регистрация клиента, проверка штрафов,
+-- проверка пересечения с существующими бронированиями и вставка в расписание.
+-- Скрипт идемпотентен и выполняется init.py при каждом запуске.
+
+-- Поиск клиента по телефону (и блокировка диапазона ключа в UpsertClient)
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID('Clients') AND name = 'IX_Clients_PhoneNumber')
+    CREATE INDEX IX_Clients_PhoneNumber ON Clients(phone_number);
+GO
+
+CREATE OR ALTER PROCEDURE UpsertClient
+    @Name NVARCHAR(100),          -- Имя клиента
+    @PhoneNumber NVARCHAR(50),    -- Телефонный номер (ключ поиска клиента)
+    @Email NVARCHAR(100),         -- Электронная почта
+    @ClientId INT OUTPUT,         -- ID найденного или добавленного клиента
+    @HasPenalties BIT OUTPUT      -- 1, если у клиента есть несписанные штрафы
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    BEGIN TRANSACTION;
+
+    -- UPDLOCK + HOLDLOCK блокирует ключ телефона до конца транзакции,
+    -- поэтому два одновременных запроса не добавят одного клиента дважды
+    SELECT @ClientId = id
+    FROM Clients WITH (UPDLOCK, HOLDLOCK)
+    WHERE phone_number = @PhoneNumber;
+
+    IF @ClientId IS NULL
+    BEGIN
+        DECLARE @Inserted TABLE (id INT);
+
+        INSERT INTO Clients (name, phone_number, email)
+        OUTPUT INSERTED.id INTO @Inserted
+        VALUES (@Name, @PhoneNumber, @Email);
+
+        SELECT @ClientId = id FROM @Inserted;
+        SET @HasPenalties = 0;
+    END
+    ELSE
+    BEGIN
+        SET @HasPenalties = CASE
+            WHEN EXISTS (SELECT 1 FROM Penalties WHERE client_id = @ClientId AND written_off IS NULL) THEN 1
+            ELSE 0
+        END;
+    END
+
+    COMMIT TRANSACTION;
+END
+GO
+
+-- UpsertClient с результатом в виде таблицы (для вызова одним EXEC из приложения)
+CREATE OR ALTER PROCEDURE RegisterClient
+    @Name NVARCHAR(100),
+    @PhoneNumber NVARCHAR(50),
+    @Email NVARCHAR(100)
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @ClientId INT, @HasPenalties BIT;
+    EXEC UpsertClient @Name, @PhoneNumber, @Email, @ClientId OUTPUT, @HasPenalties OUTPUT;
+
+    SELECT @ClientId AS ClientId, @HasPenalties AS HasPenalties;
+END
+GO
+
+CREATE OR ALTER PROCEDURE BookRoom
+    @RoomId INT,                        -- Бронируемый зал
+    @StartTime DATETIME,                -- Время начала
+    @Duration INT,                      -- Продолжительность в часах
+    @IsPaid BIT = 0,                    -- Бронирование оплачено
+    @ClientId INT = NULL,               -- Известный клиент (иначе ищется или добавляется по телефону)
+    @Name NVARCHAR(100) = NULL,         -- Имя клиента
+    @PhoneNumber NVARCHAR(50) = NULL,   -- Телефонный номер клиента
+    @Email NVARCHAR(100) = NULL         -- Электронная почта клиента
+AS
+BEGIN
+    SET NOCOUNT ON;
+    SET XACT_ABORT ON;
+
+    -- Status: 0 — бронирование создано, 1 — у клиента есть штрафы, 2 — время занято
+    DECLARE @Status INT = 0;
+    DECLARE @HasPenalties BIT = 0;
+    DECLARE @ScheduleId INT = NULL;
+    DECLARE @EndTime DATETIME = DATEADD(hour, @Duration, @StartTime);
+
+    BEGIN TRANSACTION;
+
+    -- Интервалы пересекаются, если start_time < @EndTime AND end_time > @StartTime.
+    -- Бронирование длится не больше 6 часов, поэтому пересекающиеся записи начинаются
+    -- в полуинтервале (@StartTime - 6 ч, @EndTime). Поиск идёт по IX_Schedules_Room_StartTime
+    -- (end_time хранится в INCLUDE индекса), а UPDLOCK + HOLDLOCK блокирует этот диапазон
+    -- ключей до конца транзакции: параллельное бронирование того же зала на пересекающееся время ждёт здесь
+    IF EXISTS (
+        SELECT 1
+        FROM Schedules WITH (UPDLOCK, HOLDLOCK)
+        WHERE room_id = @RoomId
+          AND start_time > DATEADD(hour, -6, @StartTime)
+          AND start_time < @EndTime
+          AND end_time > @StartTime
+    )
+        SET @Status = 2;
+
+    IF @Status = 0 AND @ClientId IS NULL
+        EXEC UpsertClient @Name, @PhoneNumber, @Email, @ClientId OUTPUT, @HasPenalties OUTPUT;
+    ELSE IF @Status = 0 AND EXISTS (SELECT 1 FROM Penalties WHERE client_id = @ClientId AND written_off IS NULL)
+        SET @HasPenalties = 1;
+
+    IF @Status = 0 AND @HasPenalties = 1
+        SET @Status = 1;
+
+    IF @Status = 0
+    BEGIN
+        DECLARE @Inserted TABLE (id INT);
+
+        INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, is_paid, status)
+        OUTPUT INSERTED.id INTO @Inserted
+        VALUES (@RoomId, @ClientId, @StartTime, @Duration, @IsPaid, N'Активно');
+
+        SELECT @ScheduleId = id FROM @Inserted;
+    END
+
+    COMMIT TRANSACTION;
+
+    SELECT @Status AS Status, @ClientId AS ClientId, @ScheduleId AS ScheduleId;
+END
+GO
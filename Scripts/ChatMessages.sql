@@ -0,0 +1,19 @@
+use JamStation
+
+-- Миграция для существующих баз: история чата (см. utils.chat.ChatStore).
+-- Скрипт идемпотентен и выполняется init.py при каждом запуске.
+
+IF OBJECT_ID('ChatMessages', 'U') IS NULL
+    CREATE TABLE ChatMessages (
+        id INT IDENTITY(1,1) PRIMARY KEY,
+        username NVARCHAR(50) NOT NULL,
+        message NVARCHAR(2000),
+        file_name NVARCHAR(255),
+        file_hash NVARCHAR(64),
+        created_at DATETIME NOT NULL DEFAULT GETDATE()
+    );
+GO
+
+-- Вложения в хранилище с адресацией по содержимому (до этого файлы лежали в static/uploads)
+IF COL_LENGTH('ChatMessages', 'file_hash') IS NULL
+    ALTER TABLE ChatMessages ADD file_hash NVARCHAR(64);
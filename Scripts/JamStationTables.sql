@@ -75,6 +75,9 @@ CREATE TABLE Clients (
 -- Индекс для поиска по имени клиента
 CREATE INDEX IX_Clients_Name ON Clients(name);
 
+-- Индекс для поиска клиента по телефону
+CREATE INDEX IX_Clients_PhoneNumber ON Clients(phone_number);
+
 -- Таблица с расписанием посещений
 CREATE TABLE Schedules ( 
     id INT IDENTITY(1,1) PRIMARY KEY, 
@@ -84,6 +87,7 @@ CREATE TABLE Schedules (
     duration_hours INT NOT NULL,   -- Продолжительность в часах 
 	is_paid BIT NOT NULL DEFAULT 0,
     status NVARCHAR(50) NOT NULL DEFAULT 'Активно',  -- Статус бронирования (Активно, Завершено, Отменено)
+    end_time AS DATEADD(hour, duration_hours, start_time) PERSISTED,  -- Время окончания (вычисляется при записи)
     
     -- Ограничение на start_time: не позднее чем через две недели от настоящего дня
     CONSTRAINT chk_start_time CHECK (start_time <= DATEADD(day, 14, GETDATE())),
@@ -92,8 +96,13 @@ CREATE TABLE Schedules (
     CONSTRAINT chk_duration_hours CHECK (duration_hours BETWEEN 1 AND 6)
 );
 
--- Индекс для поиска по комнате и времени
-CREATE INDEX IX_Schedules_Room_StartTime ON Schedules(room_id, start_time);
+-- Покрывающий индекс для поиска по комнате и времени (занятость зала на день)
+CREATE INDEX IX_Schedules_Room_StartTime ON Schedules(room_id, start_time)
+    INCLUDE (duration_hours, end_time, client_id, is_paid, status);
+
+-- Покрывающий индекс для выборок по диапазону времени без зала (расписание локации на день)
+CREATE INDEX IX_Schedules_StartTime ON Schedules(start_time)
+    INCLUDE (room_id, duration_hours, end_time, client_id, is_paid, status);
 
 -- Таблица с чеками
 CREATE TABLE Receipts (
@@ -194,3 +203,13 @@ CREATE TABLE Repairs (
 CREATE INDEX IX_Repairs_Status_LegalEntity ON Repairs(repair_status, legal_entity);
 
 
+
+-- Сообщения чата администратора и менеджера; id — порядковый номер сообщения (seq)
+CREATE TABLE ChatMessages (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    username NVARCHAR(50) NOT NULL,  -- Отправитель
+    message NVARCHAR(2000),  -- Текст сообщения (NULL, если отправлен файл)
+    file_name NVARCHAR(255),  -- Исходное имя вложенного файла
+    file_hash NVARCHAR(64),  -- SHA-256 содержимого файла в хранилище вложений (utils.file_store)
+    created_at DATETIME NOT NULL DEFAULT GETDATE()  -- Время отправки
+);
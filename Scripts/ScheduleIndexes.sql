@@ -0,0 +1,51 @@
+use JamStation
+
+-- Миграция для существующих баз: вычисляемое время окончания бронирования
+-- и покрывающие индексы расписания.
+-- Запросы к Schedules фильтруют start_time полуинтервалом [день, день + 1),
+-- поэтому по этим индексам выполняется поиск без обращения к кластерному индексу.
+-- Проверка пересечения интервалов (start_time < @end AND end_time > @start) берёт
+-- end_time из INCLUDE индекса, не вычисляя DATEADD для каждой строки.
+-- Скрипт идемпотентен и выполняется init.py при каждом запуске.
+
+IF COL_LENGTH('Schedules', 'end_time') IS NULL
+    ALTER TABLE Schedules ADD end_time AS DATEADD(hour, duration_hours, start_time) PERSISTED;
+GO
+
+IF NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes i
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    WHERE i.object_id = OBJECT_ID('Schedules')
+      AND i.name = 'IX_Schedules_Room_StartTime'
+      AND ic.is_included_column = 1
+      AND ic.column_id = COLUMNPROPERTY(OBJECT_ID('Schedules'), 'end_time', 'ColumnId')
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID('Schedules') AND name = 'IX_Schedules_Room_StartTime')
+        CREATE INDEX IX_Schedules_Room_StartTime ON Schedules(room_id, start_time)
+            INCLUDE (duration_hours, end_time, client_id, is_paid, status)
+            WITH (DROP_EXISTING = ON);
+    ELSE
+        CREATE INDEX IX_Schedules_Room_StartTime ON Schedules(room_id, start_time)
+            INCLUDE (duration_hours, end_time, client_id, is_paid, status);
+END;
+
+IF NOT EXISTS (
+    SELECT 1
+    FROM sys.indexes i
+    JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    WHERE i.object_id = OBJECT_ID('Schedules')
+      AND i.name = 'IX_Schedules_StartTime'
+      AND ic.is_included_column = 1
+      AND ic.column_id = COLUMNPROPERTY(OBJECT_ID('Schedules'), 'end_time', 'ColumnId')
+)
+BEGIN
+    IF EXISTS (SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID('Schedules') AND name = 'IX_Schedules_StartTime')
+        CREATE INDEX IX_Schedules_StartTime ON Schedules(start_time)
+            INCLUDE (room_id, duration_hours, end_time, client_id, is_paid, status)
+            WITH (DROP_EXISTING = ON);
+    ELSE
+        CREATE INDEX IX_Schedules_StartTime ON Schedules(start_time)
+            INCLUDE (room_id, duration_hours, end_time, client_id, is_paid, status);
+END;
@@ -0,0 +1,105 @@
+use JamStation
+
+-- Бенчмарк запросов расписания: логические чтения до и после перехода
+-- на полуинтервалы по start_time и покрывающие индексы.
+-- Запуск: sqlcmd -S localhost -U sa -P "YourStrong!Passw0rd" -i Scripts/ScheduleQueriesBenchmark.sql
+-- Данные создаются в отдельных таблицах *_Bench (1 000 000 бронирований) и удаляются в конце.
+
+SET NOCOUNT ON;
+
+IF OBJECT_ID('Schedules_Bench') IS NOT NULL DROP TABLE Schedules_Bench;
+IF OBJECT_ID('Rooms_Bench') IS NOT NULL DROP TABLE Rooms_Bench;
+
+-- 20 локаций по 10 залов
+CREATE TABLE Rooms_Bench (
+    id INT PRIMARY KEY,
+    location_id INT NOT NULL
+);
+
+CREATE TABLE Schedules_Bench (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    room_id INT NOT NULL,
+    client_id INT NOT NULL,
+    start_time DATETIME NOT NULL,
+    duration_hours INT NOT NULL,
+    is_paid BIT NOT NULL DEFAULT 0,
+    status NVARCHAR(50) NOT NULL DEFAULT N'Активно'
+);
+GO
+
+WITH n AS (
+    SELECT TOP (200) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS i
+    FROM sys.all_objects
+)
+INSERT INTO Rooms_Bench (id, location_id)
+SELECT i, (i - 1) / 10 + 1 FROM n;
+
+-- 200 залов x 1000 дней x 5 непересекающихся двухчасовых бронирований в день
+WITH n AS (
+    SELECT TOP (1000000) ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) - 1 AS i
+    FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c
+)
+INSERT INTO Schedules_Bench (room_id, client_id, start_time, duration_hours, is_paid, status)
+SELECT
+    i % 200 + 1,
+    i % 5000 + 1,
+    DATEADD(hour, 10 + 2 * ((i / 200) % 5), DATEADD(day, -(i / 1000), CAST(CAST(GETDATE() AS DATE) AS DATETIME))),
+    2,
+    i % 2,
+    N'Активно'
+FROM n;
+
+-- Исходный индекс из JamStationTables.sql
+CREATE INDEX IX_Bench_Room_StartTime ON Schedules_Bench(room_id, start_time);
+GO
+
+PRINT N'==== До: CONVERT/CAST по start_time, индекс (room_id, start_time) без INCLUDE ====';
+SET STATISTICS IO ON;
+
+DECLARE @day DATE = DATEADD(day, -100, CAST(GETDATE() AS DATE));
+
+PRINT N'-- Занятость зала на день (/available_times)';
+SELECT start_time, duration_hours
+FROM Schedules_Bench
+WHERE room_id = 42 AND CAST(start_time AS DATE) = @day;
+
+PRINT N'-- Расписание локации на день (DBController.load_schedule)';
+SELECT S.id, S.room_id, S.client_id, S.start_time, S.duration_hours, S.is_paid, S.status
+FROM Schedules_Bench S
+JOIN Rooms_Bench R ON S.room_id = R.id
+WHERE R.location_id = 5 AND CONVERT(date, S.start_time) = @day;
+
+SET STATISTICS IO OFF;
+GO
+
+-- Миграция: покрывающие индексы, как в ScheduleIndexes.sql
+CREATE INDEX IX_Bench_Room_StartTime ON Schedules_Bench(room_id, start_time)
+    INCLUDE (duration_hours, client_id, is_paid, status)
+    WITH (DROP_EXISTING = ON);
+CREATE INDEX IX_Bench_StartTime ON Schedules_Bench(start_time)
+    INCLUDE (room_id, duration_hours, client_id, is_paid, status);
+GO
+
+PRINT N'==== После: полуинтервал start_time >= @from AND start_time < @to, покрывающие индексы ====';
+SET STATISTICS IO ON;
+
+DECLARE @from DATETIME = DATEADD(day, -100, CAST(GETDATE() AS DATE));
+DECLARE @to DATETIME = DATEADD(day, 1, @from);
+
+PRINT N'-- Занятость зала на день (/available_times)';
+SELECT start_time, duration_hours
+FROM Schedules_Bench
+WHERE room_id = 42 AND start_time >= @from AND start_time < @to;
+
+PRINT N'-- Расписание локации на день (DBController.load_schedule)';
+SELECT S.id, S.room_id, S.client_id, S.start_time, S.duration_hours, S.is_paid, S.status
+FROM Schedules_Bench S
+JOIN Rooms_Bench R ON S.room_id = R.id
+WHERE R.location_id = 5 AND S.start_time >= @from AND S.start_time < @to;
+
+SET STATISTICS IO OFF;
+GO
+
+DROP TABLE Schedules_Bench;
+DROP TABLE Rooms_Bench;
+GO
@@ -1,131 +1,175 @@
 import os
+import tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 import random
 
-from fastapi import FastAPI, Request, HTTPException, Form, UploadFile, File, WebSocket
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, Depends, Request, HTTPException, Form, WebSocket
+from fastapi.requests import HTTPConnection
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from jinja2 import FileSystemBytecodeCache
 import uvicorn
 
 from utils.controller import DBController
-
-app = FastAPI()
+from utils.async_controller import AsyncDBController
+from utils.backends import create_backend
+from utils.query_stats import call_site
+from utils.tracing import TraceBuffer, TracingMiddleware, span
+from utils.response_cache import ResponseCache
+from api_v1 import build_router
+from utils.availability import AvailabilityIndex
+from utils.chat import ChatStore, ChatHub
+from utils.chat_bus import create_chat_bus
+from utils.file_store import FileStore, FileTooLargeError, UploadError, StoredFileResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Подключение процесса к шине чата (для TableChatBus — фоновый опрос таблицы)
+    await chat_hub.start()
+    yield
+    await chat_hub.stop()
+
+async def query_call_site(connection: HTTPConnection):
+    # Запросы к БД учитываются по шаблону маршрута ("GET /rooms/{location_id}"), а не по конкретному URL;
+    # маршрут уже найден маршрутизатором, поэтому берётся из scope
+    route = connection.scope.get("route")
+    if route is not None:
+        call_site.set(f"{connection.scope.get('method', 'WEBSOCKET')} {route.path}")
+
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(query_call_site)])
 # Подключение папки static для обслуживания статических файлов
 app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
-
-# Инициализация базы данных
-db_controller = DBController(
-    server=os.getenv("DB_SERVER"), 
-    database=os.getenv("DB_NAME"), 
-    username=os.getenv("DB_USER"), 
-    password=os.getenv("DB_PASSWORD")
+
+
+class TracedTemplates(Jinja2Templates):
+    """Шаблоны, рендеринг которых попадает в трассу запроса отдельным спаном."""
+
+    def TemplateResponse(self, *args, **kwargs):
+        name = kwargs.get("name") or next((arg for arg in args if isinstance(arg, str)), "template")
+        with span(name, "render"):
+            return super().TemplateResponse(*args, **kwargs)
+
+templates = TracedTemplates(directory="templates")
+# Скомпилированные шаблоны сохраняются на диск: при перезапуске они не компилируются заново
+jinja_cache_dir = os.getenv("JINJA_CACHE_DIR", os.path.join(tempfile.gettempdir(), "jamstation-jinja"))
+os.makedirs(jinja_cache_dir, exist_ok=True)
+templates.env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+# TEMPLATES_AUTO_RELOAD=0 — не проверять изменение файлов шаблонов при каждом рендеринге
+templates.env.auto_reload = os.getenv("TEMPLATES_AUTO_RELOAD", "1") == "1"
+# Последние трассы запросов для /debug/traces
+traces = TraceBuffer(int(os.getenv("TRACE_BUFFER_SIZE", "200")))
+# DEBUG_ENDPOINTS=1 — открыть /metrics и /debug/traces (в них тексты запросов к БД)
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "0") == "1"
+
+async def debug_endpoints_enabled():
+    if not DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+# Инициализация базы данных: запросы выполняются в пуле потоков, не блокируя event loop
+# DB_BACKEND=sqlite — база SQLite (DB_SQLITE_PATH, по умолчанию в памяти) для локальных тестов
+db_controller = AsyncDBController(DBController(
+    backend=create_backend(
+        os.getenv("DB_BACKEND", "mssql"),
+        server=os.getenv("DB_SERVER"),
+        database=os.getenv("DB_NAME"),
+        username=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        sqlite_path=os.getenv("DB_SQLITE_PATH", ":memory:"),
+    ),
+    min_pool_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+    max_pool_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    slow_query_threshold=float(os.getenv("DB_SLOW_QUERY_MS", "500")) / 1000,
+    slow_query_log=os.getenv("DB_SLOW_QUERY_LOG"),
+))
+# Кэш занятости залов по часам для /available_times и /available_durations
+availability_index = AvailabilityIndex(db_controller.controller)
+# Кэш готовых страниц; сбрасывается при изменении таблиц через DBController
+response_cache = ResponseCache()
+db_controller.controller.add_change_listener(response_cache.invalidate)
+# Чат: последние сообщения в памяти, вся история — в таблице ChatMessages.
+# CHAT_BUS=table — рассылка между воркерами через таблицу (нужна при API_WORKERS > 1)
+chat_store = ChatStore(db_controller, max_messages=int(os.getenv("CHAT_BUFFER_SIZE", "200")))
+chat_hub = ChatHub(
+    chat_store,
+    create_chat_bus(
+        os.getenv("CHAT_BUS", "table" if int(os.getenv("API_WORKERS", "1")) > 1 else "local"),
+        chat_store,
+        poll_interval=float(os.getenv("CHAT_POLL_INTERVAL", "0.5")),
+    ),
+    queue_size=int(os.getenv("CHAT_QUEUE_SIZE", "100")),
 )
+# Вложения чата: каталог UPLOAD_DIR, файлы именуются хэшем содержимого
+file_store = FileStore(os.getenv("UPLOAD_DIR", "uploads"), max_size=int(os.getenv("UPLOAD_MAX_MB", "512")) * 1024 * 1024)
+# JSON API для мобильного клиента и киоска
+app.include_router(build_router(db_controller, availability_index, response_cache))
 
 @app.get("/", response_class=HTMLResponse)
+@response_cache.cached(ttl=3600, max_age=300)
 async def list_locations(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 @app.get("/locations", response_class=HTMLResponse)
+@response_cache.cached(ttl=600, tables=("Locations",))
 async def list_locations(request: Request):
     query = "SELECT id, name, address, phone_number, email FROM Locations"
-    locations = db_controller.execute_query(query)
-    print(locations)
+    locations = await db_controller.execute_query(query)
     return templates.TemplateResponse("locations.html", {"request": request, "locations": locations})
 
 
 @app.get("/rooms/{location_id}", response_class=HTMLResponse)
+@response_cache.cached(ttl=600, tables=("Rooms",))
 async def list_rooms(request: Request, location_id: int):
     query = "SELECT id, name, capacity, hourly_rate FROM Rooms WHERE location_id = ?"
-    rooms = db_controller.execute_query(query, (location_id,))
+    rooms = await db_controller.execute_query(query, (location_id,))
     return templates.TemplateResponse("rooms.html", {"request": request, "rooms": rooms, "location_id": location_id})
 
 @app.get("/room/{room_id}", response_class=HTMLResponse)
+@response_cache.cached(ttl=600, tables=("Rooms", "Equipment"))
 async def room_info(request: Request, room_id: int):
     query = "SELECT name, capacity, hourly_rate FROM Rooms WHERE id = ?"
     query_eq = "SELECT name FROM Equipment WHERE room_id = ?"
-    room = db_controller.execute_query(query, (room_id,))
-    equipment = db_controller.execute_query(query_eq, (room_id,))
+    room = await db_controller.execute_query(query, (room_id,))
+    equipment = await db_controller.execute_query(query_eq, (room_id,))
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     return templates.TemplateResponse("room.html", {"request": request, "room": room[0], "equipment": equipment, "room_id": room_id})
 
+async def busy_hours(room_id: int, day) -> int:
+    """Маска занятых часов зала на дату: из индекса, при промахе — одним запросом к БД."""
+    mask = availability_index.peek(room_id, day)
+    if mask is None:
+        mask = await db_controller.run(availability_index.load, room_id, day)
+    return mask
+
 @app.get("/available_times/{room_id}/{date}", response_class=HTMLResponse)
 async def available_times(request: Request, room_id: int, date: str):
     date_dt = datetime.strptime(date, '%Y-%m-%d')
-    query = "SELECT start_time, duration_hours FROM Schedules WHERE room_id = ? AND CAST(start_time AS DATE) = ?"
-    schedules = db_controller.execute_query(query, (room_id, date_dt.date()))
-
-    available_times = []
-    for hour in range(10, 22):
-        available_times.append(f"{hour:02d}:00")
-
-    for schedule in schedules:
-        start_time = schedule[0]
-        duration = schedule[1]
-        for hour in range(start_time.hour, start_time.hour + duration):
-            if f"{hour:02d}:00" in available_times:
-                available_times.remove(f"{hour:02d}:00")
+    busy = await busy_hours(room_id, date_dt.date())
+    available_times = [f"{hour:02d}:00" for hour in AvailabilityIndex.free_hours(busy)]
 
     return templates.TemplateResponse("available_times.html", {"request": request, "available_times": available_times})
 
 @app.get("/available_durations/{room_id}/{date}/{time}", response_model=list[int])
 async def available_durations(room_id: int, date: str, time: str):
     start_time_dt = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
-    query = """
-        SELECT start_time, duration_hours 
-        FROM Schedules 
-        WHERE room_id = ? AND CAST(start_time AS DATE) = ?
-    """
-    schedules = db_controller.execute_query(query, (room_id, start_time_dt.date()))
-
-    # Максимальная продолжительность для бронирования
-    max_duration = 6
-    available_durations = []
-
-    # Проверяем доступность каждого часа
-    for duration in range(1, max_duration + 1):
-        end_time = start_time_dt + timedelta(hours=duration)
-        if end_time.hour > 22:
-            break  # Не разрешаем бронирование позже 22:00
-
-        conflict = any(
-            schedule_start <= start_time_dt < schedule_start + timedelta(hours=schedule_duration) or
-            schedule_start < end_time <= schedule_start + timedelta(hours=schedule_duration)
-            for schedule_start, schedule_duration in schedules
-        )
-        if conflict:
-            break
-        available_durations.append(duration)
-
-    return available_durations
+    busy = await busy_hours(room_id, start_time_dt.date())
+
+    # Максимальная продолжительность для бронирования — 6 часов, не позже 22:00
+    return AvailabilityIndex.durations(busy, start_time_dt.hour)
 
 @app.post("/book/{room_id}", response_class=HTMLResponse)
 async def book_room(request: Request, room_id: int, name: str = Form(...), phone: str = Form(...), email: str = Form(None), date: str = Form(...), time: str = Form(...), duration: int = Form(...)):
-    # Проверка наличия клиента
-    query = "SELECT id FROM Clients WHERE phone_number = ?"
-    client = db_controller.execute_query(query, (phone,))
-    if client:
-        client_id = client[0][0]
-        # Проверка наличия штрафов
-        query = "SELECT id FROM Penalties WHERE client_id = ? AND written_off IS NULL"
-        penalties = db_controller.execute_query(query, (client_id,))
-        if penalties:
-            raise HTTPException(status_code=400, detail="Client has penalties and cannot book a room")
-    else:
-        # Добавление нового клиента
-        query = "INSERT INTO Clients (name, phone_number, email) VALUES (?, ?, ?)"
-        db_controller.execute_query(query, (name, phone, email), transactional=True)
-        
-        # Получение ID нового клиента
-        query = "SELECT id FROM Clients WHERE phone_number = ?"
-        client_id = db_controller.execute_query(query, (phone,))[0][0]
-
-    # Добавление записи в расписание
+    # Клиент, штрафы, пересечение и запись в расписание — одной транзакцией в процедуре BookRoom
     start_time_dt = datetime.strptime(f"{date} {time}", '%Y-%m-%d %H:%M')
-    query = "INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, is_paid, status) VALUES (?, ?, ?, ?, 0, N'Активно')"
-    db_controller.execute_query(query, (room_id, client_id, start_time_dt, duration), transactional=True)
+    booking = await db_controller.book_room(room_id, start_time_dt, duration, name=name, phone_number=phone, email=email)
+    if booking.status == "penalties":
+        raise HTTPException(status_code=400, detail="Client has penalties and cannot book a room")
+    if booking.status == "overlap":
+        raise HTTPException(status_code=409, detail="Room is already booked for this time")
+    availability_index.invalidate(room_id, start_time_dt.date())
 
     return JSONResponse(
         content={"message": "Бронирование прошло успешно!", "redirect_url": f"/room/{room_id}"},
@@ -133,77 +177,75 @@ async def book_room(request: Request, room_id: int, name: str = Form(...), phone
     )
 
 
-messages = []
-active_connections = []
-
 @app.get("/chat/admin", response_class=HTMLResponse)
 async def get_admin_chat(request: Request):
-    return templates.TemplateResponse("admin_chat.html", {"request": request, "messages": messages})
+    return templates.TemplateResponse("admin_chat.html", {"request": request, "messages": await chat_hub.store.recent()})
 
 @app.post("/chat/admin/send_file")
-async def send_file(request: Request, file: UploadFile = File(...)):
-    file_location = f"static/uploads/{file.filename}"
-    with open(file_location, "wb+") as file_object:
-        file_object.write(file.file.read())
-    messages.append({"username": "admin", "message": None, "file": file.filename})
-    await notify_clients()
-    return templates.TemplateResponse("admin_chat.html", {"request": request, "messages": messages})
+async def send_file(request: Request):
+    # Тело запроса разбирается по мере поступления и пишется прямо в хранилище вложений:
+    # без временной копии и с отказом по Content-Length до чтения тела
+    try:
+        file_hash, file_name = await file_store.save_multipart(request.headers, request.stream())
+    except FileTooLargeError:
+        raise HTTPException(status_code=413, detail=f"File is larger than {file_store.max_size // (1024 * 1024)} MB")
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await chat_hub.post("admin", file=file_name, file_hash=file_hash)
+    return templates.TemplateResponse("admin_chat.html", {"request": request, "messages": await chat_hub.store.recent()})
 
 @app.get("/chat/mngr", response_class=HTMLResponse)
 async def get_mngr_chat(request: Request):
-    return templates.TemplateResponse("mngr_chat.html", {"request": request, "messages": messages})
+    return templates.TemplateResponse("mngr_chat.html", {"request": request, "messages": await chat_hub.store.recent()})
 
 @app.post("/chat/mngr/send_message")
 async def send_message(request: Request, message: str = Form(...)):
-    messages.append({"username": "mngr", "message": message, "file": None})
-    await notify_clients()
-    return templates.TemplateResponse("mngr_chat.html", {"request": request, "messages": messages})
+    await chat_hub.post("mngr", message=message)
+    return templates.TemplateResponse("mngr_chat.html", {"request": request, "messages": await chat_hub.store.recent()})
+
+@app.get("/download/{file_hash}/{file_name}")
+async def download_stored_file(file_hash: str, file_name: str):
+    # Содержимое по этому адресу не меняется: ETag — хэш, браузер кэширует файл бессрочно
+    path = file_store.path(file_hash)
+    if path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    return StoredFileResponse(path, etag=file_hash, immutable=True, filename=file_name)
 
 @app.get("/download/{file_name}")
 async def download_file(file_name: str):
-    file_path = f"static/uploads/{file_name}"
-    return FileResponse(path=file_path, filename=file_name)
+    # Вложения, загруженные до появления хранилища вложений
+    file_path = os.path.join("static", "uploads", os.path.basename(file_name))
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+    stat_result = os.stat(file_path)
+    return StoredFileResponse(file_path, etag=f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}", filename=file_name)
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, last_seq: int | None = None):
+    # Новые сообщения приходят дельтами; при переподключении клиент передаёт last_seq и получает пропущенные
     await websocket.accept()
-    active_connections.append(websocket)
-    try:
-        while True:
-            await websocket.receive_text()
-    except Exception as e:
-        print(f"Connection error: {e}")
-    finally:
-        active_connections.remove(websocket)
-
-async def notify_clients():
-    for connection in active_connections:
-        await connection.send_json(messages)
+    await chat_hub.serve(websocket, last_seq)
 
 
 
 
 @app.get("/home", response_class=HTMLResponse)
+@response_cache.cached(ttl=3600, max_age=300)
 async def home(request: Request):
     return templates.TemplateResponse("home.html", {"request": request})
 
 @app.get("/book_hall", response_class=HTMLResponse)
+@response_cache.cached(ttl=3600, max_age=300)
 async def book_hall(request: Request):
     return templates.TemplateResponse("book_hall.html", {"request": request})
 
 @app.post("/check_availability", response_class=HTMLResponse)
 async def check_availability(request: Request, date: str = Form(...), time: str = Form(...)):
     date_time = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
-    query = """
-        SELECT id, name 
-        FROM Rooms 
-        WHERE id NOT IN (
-            SELECT room_id 
-            FROM Schedules 
-            WHERE start_time = ?
-        )
-    """
-    available_halls = db_controller.execute_query(query, (date_time,))
+    # Зал свободен, если с бронируемым часом не пересекается ни одно бронирование,
+    # в том числе начавшееся раньше (18:00–21:00 занимает и 19:00).
+    # Этот сценарий бронирует один час (см. process_payment)
+    available_halls = await db_controller.run(availability_index.free_rooms, date_time, 1)
     return templates.TemplateResponse("available_halls.html", {"request": request, "available_halls": available_halls, "date": date, "time": time})
 
 @app.post("/select_hall", response_class=HTMLResponse)
@@ -212,36 +254,84 @@ async def select_hall(request: Request, hall_id: int = Form(...), date: str = Fo
 
 @app.post("/submit_contact_info", response_class=HTMLResponse)
 async def submit_contact_info(request: Request, hall_id: int = Form(...), date: str = Form(...), time: str = Form(...), name: str = Form(...), phone: str = Form(...), email: str = Form(...)):
-    query = "SELECT id FROM Clients WHERE phone_number = ?"
-    client = db_controller.execute_query(query, (phone,))
-    if client:
-        client_id = client[0][0]
-        query = "SELECT id FROM Penalties WHERE client_id = ? AND written_off IS NULL"
-        penalties = db_controller.execute_query(query, (client_id,))
-        if penalties:
-            return templates.TemplateResponse("penalties.html", {"request": request})
-    else:
-        query = "INSERT INTO Clients (name, phone_number, email) VALUES (?, ?, ?)"
-        db_controller.execute_query(query, (name, phone, email), transactional=True)
-        query = "SELECT id FROM Clients WHERE phone_number = ?"
-        client_id = db_controller.execute_query(query, (phone,))[0][0]
-    price = db_controller.select(['hourly_rate'], 'Rooms', hall_id)
-    return templates.TemplateResponse("payment_info.html", {"request": request, "hall_id": hall_id, "date": date, "time": time, "client_id": client_id, "price": str(price[0])})
+    # Поиск или добавление клиента и проверка штрафов — один запрос к процедуре UpsertClient
+    client = await db_controller.register_client(name, phone, email)
+    if client.status == "penalties":
+        return templates.TemplateResponse("penalties.html", {"request": request})
+    client_id = client.client_id
+    room = await db_controller.run(db_controller.controller.references.room, hall_id)
+    return templates.TemplateResponse("payment_info.html", {"request": request, "hall_id": hall_id, "date": date, "time": time, "client_id": client_id, "price": f"{room.hourly_rate:.2f}"})
 
 @app.post("/process_payment", response_class=HTMLResponse)
 async def process_payment(request: Request, hall_id: int = Form(...), date: str = Form(...), time: str = Form(...), client_id: int = Form(...), card_number: str = Form(...), card_expiry: str = Form(...), card_cvc: str = Form(...)):
 
     if random.random() > 0.2:
         start_time = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
-        query = "INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, is_paid, status) VALUES (?, ?, ?, ?, 1, 'Активно')"
-        db_controller.execute_query(query, (hall_id, client_id, start_time, 1), transactional=True)
+        booking = await db_controller.book_room(hall_id, start_time, 1, client_id=client_id, is_paid=True)
+        if booking.status != "ok":
+            # Зал успели занять между выбором времени и оплатой (или у клиента появился штраф)
+            return templates.TemplateResponse("payment_failed.html", {"request": request, "hall_id": hall_id, "date": date, "time": time, "client_id": client_id})
+        availability_index.invalidate(hall_id, start_time.date())
         return templates.TemplateResponse("success.html", {"request": request})
     else:
         return templates.TemplateResponse("payment_failed.html", {"request": request, "hall_id": hall_id, "date": date, "time": time, "client_id": client_id})
 
-
+# Добавлена последней, поэтому внешняя: трасса охватывает весь запрос
+app.add_middleware(TracingMiddleware, buffer=traces)
+
+@app.get("/debug/traces", dependencies=[Depends(debug_endpoints_enabled)])
+async def debug_traces(limit: int = 50, min_ms: float = 0.0, path: str | None = None):
+    # Последние трассы (новые первыми); path — URL или шаблон маршрута
+    records = traces.recent(limit, min_ms / 1000, path)
+    return JSONResponse(content=[record.model_dump(mode="json") for record in records])
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(debug_endpoints_enabled)])
+async def debug_trace(trace_id: str):
+    record = traces.get(trace_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return JSONResponse(content=record.model_dump(mode="json"))
+
+@app.get("/metrics", dependencies=[Depends(debug_endpoints_enabled)])
+async def metrics():
+    # Метрики в текстовом формате Prometheus: запросы к БД, пул соединений и повторное использование запросов
+    pool = db_controller.pool_stats()
+    statements = db_controller.controller.statements.stats(top=0)
+    lines = [
+        "# TYPE jamstation_db_pool_connections gauge",
+        f'jamstation_db_pool_connections{{state="idle"}} {pool.idle}',
+        f'jamstation_db_pool_connections{{state="in_use"}} {pool.in_use}',
+        f"jamstation_db_pool_waiting {pool.waiting}",
+        "# TYPE jamstation_db_pool_checkouts_total counter",
+        f"jamstation_db_pool_checkouts_total {pool.checkouts}",
+        "# TYPE jamstation_db_pool_timeouts_total counter",
+        f"jamstation_db_pool_timeouts_total {pool.timeouts}",
+        "# TYPE jamstation_db_pool_wait_seconds_total counter",
+        f"jamstation_db_pool_wait_seconds_total {pool.wait_time_total:.6f}",
+        "# TYPE jamstation_db_statement_executions_total counter",
+        f"jamstation_db_statement_executions_total {statements.executions}",
+        "# TYPE jamstation_db_statement_cursor_hits_total counter",
+        f"jamstation_db_statement_cursor_hits_total {statements.cursor_hits}",
+        "# TYPE jamstation_response_cache_requests_total counter",
+        *(f'jamstation_response_cache_requests_total{{result="{result}"}} {count}'
+          for result, count in response_cache.stats().items() if result in ("hits", "misses", "not_modified")),
+        f"jamstation_response_cache_entries {response_cache.stats()['entries']}",
+        f"jamstation_chat_connections {chat_hub.stats()['connections']}",
+        "# TYPE jamstation_chat_messages_delivered_total counter",
+        f"jamstation_chat_messages_delivered_total {chat_hub.stats()['delivered']}",
+        "# TYPE jamstation_chat_slow_disconnects_total counter",
+        f"jamstation_chat_slow_disconnects_total {chat_hub.stats()['slow_disconnects']}",
+    ]
+    body = "\n".join(lines) + "\n" + db_controller.controller.query_stats.prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/pool")
+async def pool_metrics():
+    # Метрики пула соединений с БД
+    return JSONResponse(content=db_controller.pool_stats().model_dump())
 
 
 if __name__ == "__main__":
-    # Запуск FastAPI через uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Запуск FastAPI через uvicorn; API_WORKERS > 1 — несколько процессов (чат через CHAT_BUS=table)
+    workers = int(os.getenv("API_WORKERS", "1"))
+    uvicorn.run("api:app" if workers > 1 else app, host="0.0.0.0", port=8000, workers=workers)
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+JSON API для мобильного клиента и киоска (/api/v1).
+
+Ответы строятся из моделей utils.shemas и сериализуются orjson (если он установлен).
+Параметр fields (через запятую) оставляет в ответе только перечисленные поля,
+например /api/v1/rooms?location_id=1&fields=id,name,hourly_rate.
+"""
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from utils.async_controller import AsyncDBController
+from utils.availability import AvailabilityIndex, OPEN_HOUR, CLOSE_HOUR
+from utils.controller import day_range
+from utils.response_cache import ResponseCache
+from utils.shemas import *
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class APIResponse(JSONResponse):
+    """JSON-ответ: orjson, если доступен, иначе стандартный json."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _fields(model: type[BaseModel], fields: str | None) -> set[str] | None:
+    # Поля ответа из параметра fields; неизвестное поле — ошибка клиента
+    if not fields:
+        return None
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return selected
+
+def _dump(items: BaseModel | list[BaseModel], model: type[BaseModel], fields: str | None) -> Any:
+    include = _fields(model, fields)
+    if isinstance(items, list):
+        return [item.model_dump(include=include) for item in items]
+    return items.model_dump(include=include)
+
+def _parse_day(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be in YYYY-MM-DD format")
+
+
+def build_router(db_controller: AsyncDBController, availability_index: AvailabilityIndex, response_cache: ResponseCache) -> APIRouter:
+    """Создаёт маршруты /api/v1 поверх контроллера, индекса занятости и кэша ответов приложения."""
+    router = APIRouter(prefix="/api/v1", default_response_class=APIResponse, tags=["api v1"])
+    references = db_controller.controller.references
+
+    @router.get("/locations")
+    @response_cache.cached(ttl=600, tables=("Locations",), max_age=60)
+    async def locations(request: Request, fields: str | None = None):
+        rows = await db_controller.run(references.locations)
+        return APIResponse(_dump(rows, Location, fields))
+
+    @router.get("/locations/{location_id}/availability")
+    async def location_availability(
+        location_id: int,
+        start: str = Query(..., description="YYYY-MM-DD"),
+        days: int = Query(7, ge=1, le=31),
+        rooms: str | None = Query(None, description="ID залов через запятую; по умолчанию все залы локации"),
+        fields: str | None = None,
+    ):
+        """Матрица занятости зал × день × час для залов локации, загружаемая одним запросом."""
+        first_day = _parse_day(start)
+        if await db_controller.run(references.location, location_id) is None:
+            raise HTTPException(status_code=404, detail="Location not found")
+        location_rooms = await db_controller.run(references.rooms, location_id)
+        if rooms:
+            try:
+                room_ids = {int(room_id) for room_id in rooms.split(",") if room_id.strip()}
+            except ValueError:
+                raise HTTPException(status_code=400, detail="rooms must be a comma-separated list of IDs")
+            unknown = room_ids - {room.id for room in location_rooms}
+            if unknown:
+                raise HTTPException(status_code=404, detail=f"Rooms not found in location: {', '.join(map(str, sorted(unknown)))}")
+            location_rooms = [room for room in location_rooms if room.id in room_ids]
+
+        masks = await db_controller.run(availability_index.busy_masks, [room.id for room in location_rooms], first_day, days)
+        matrix = AvailabilityMatrix(
+            location_id=location_id,
+            start=first_day,
+            days=days,
+            open_hour=OPEN_HOUR,
+            close_hour=CLOSE_HOUR,
+            rooms=[
+                RoomAvailabilityRow(room_id=room.id, name=room.name, free=[AvailabilityIndex.free_string(mask) for mask in masks[room.id]])
+                for room in location_rooms
+            ],
+        )
+        return APIResponse(_dump(matrix, AvailabilityMatrix, fields), headers={"Cache-Control": "max-age=5"})
+
+    @router.get("/rooms")
+    @response_cache.cached(ttl=600, tables=("Rooms",), max_age=60)
+    async def rooms(request: Request, location_id: int | None = None, fields: str | None = None):
+        if location_id is None:
+            rows = await db_controller.run(references.rows, "Rooms")
+        else:
+            rows = await db_controller.run(references.rooms, location_id)
+        return APIResponse(_dump(rows, Room, fields))
+
+    @router.get("/rooms/{room_id}")
+    @response_cache.cached(ttl=600, tables=("Rooms", "Equipment"), max_age=60)
+    async def room(request: Request, room_id: int, fields: str | None = None):
+        room = await db_controller.run(references.room, room_id)
+        if room is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        equipment = await db_controller.execute_query(
+            "SELECT id, name, type, status FROM Equipment WHERE room_id = ?", (room_id,)
+        )
+        details = RoomDetails(
+            **room.model_dump(),
+            equipment=[EquipmentRecord(id=row[0], name=row[1], type=row[2], status=row[3]) for row in equipment],
+        )
+        return APIResponse(_dump(details, RoomDetails, fields))
+
+    @router.get("/rooms/{room_id}/availability")
+    async def availability(room_id: int, date: str = Query(..., description="YYYY-MM-DD"), fields: str | None = None):
+        # Несуществующий зал иначе выглядел бы свободным весь день
+        if await db_controller.run(references.room, room_id) is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        day = _parse_day(date)
+        busy = availability_index.peek(room_id, day)
+        if busy is None:
+            busy = await db_controller.run(availability_index.load, room_id, day)
+        free_hours = AvailabilityIndex.free_hours(busy)
+        result = RoomAvailability(
+            room_id=room_id,
+            day=day,
+            free_hours=free_hours,
+            durations={hour: AvailabilityIndex.durations(busy, hour) for hour in free_hours},
+        )
+        # Занятость меняется с каждым бронированием: кэшировать можно только очень недолго
+        return APIResponse(_dump(result, RoomAvailability, fields), headers={"Cache-Control": "max-age=5"})
+
+    @router.get("/bookings")
+    async def bookings(room_id: int, date: str = Query(..., description="YYYY-MM-DD"), days: int = Query(1, ge=1, le=31), fields: str | None = None):
+        if await db_controller.run(references.room, room_id) is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        # Только занятые интервалы, без данных клиентов
+        query = """
+        SELECT id, room_id, start_time, duration_hours, status
+        FROM Schedules
+        WHERE room_id = ? AND start_time >= ? AND start_time < ?
+        ORDER BY start_time
+        """
+        rows = await db_controller.execute_query(query, (room_id, *day_range(_parse_day(date), days)))
+        slots = [
+            BookingSlot(id=row[0], room_id=row[1], start_time=row[2], duration_hours=row[3], status=row[4])
+            for row in rows
+        ]
+        return APIResponse(_dump(slots, BookingSlot, fields), headers={"Cache-Control": "max-age=5"})
+
+    @router.post("/bookings", status_code=201)
+    async def create_booking(booking: BookingRequest):
+        start = booking.start_time
+        if (start.minute, start.second, start.microsecond) != (0, 0, 0):
+            # Залы бронируются по часам: время не округляется, чтобы не занять не тот час
+            raise HTTPException(status_code=400, detail="start_time must be on the hour (HH:00:00)")
+        if start.hour < OPEN_HOUR or start + timedelta(hours=booking.duration_hours) > start.replace(hour=CLOSE_HOUR):
+            raise HTTPException(status_code=400, detail=f"Booking must fit between {OPEN_HOUR}:00 and {CLOSE_HOUR}:00")
+        if await db_controller.run(references.room, booking.room_id) is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        result = await db_controller.book_room(
+            booking.room_id,
+            start,
+            booking.duration_hours,
+            name=booking.name,
+            phone_number=booking.phone_number,
+            email=booking.email,
+        )
+        if result.status == "penalties":
+            raise HTTPException(status_code=400, detail="Client has penalties and cannot book a room")
+        if result.status == "overlap":
+            raise HTTPException(status_code=409, detail="Room is already booked for this time")
+        availability_index.invalidate(booking.room_id, start.date())
+        return APIResponse(result.model_dump(), status_code=201)
+
+    return router
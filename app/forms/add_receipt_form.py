@@ -9,7 +9,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import QSize, QDate
 
-from utils.controller import DBController
+from utils.controller import DBController, day_range
 from utils.shemas import Equipment, Instrument, Check, Repair
 
 class AddReceiptDialog(QDialog):
@@ -79,9 +79,9 @@ class AddReceiptDialog(QDialog):
                 room_combo = QComboBox()
                 room_combo.setObjectName("roomCombo")  # Уникальное имя для выбора зала
                 # Получение списка залов для текущей локации
-                rooms = self.db_controller.select(columns=["id", "name"], table="Rooms", filters={"location_id": self.location_id})
+                rooms = self.db_controller.references.rooms(self.location_id)
                 if rooms:
-                    room_combo.addItems([room[1] for room in rooms])  # Индекс 1 соответствует "name"
+                    room_combo.addItems([room.name for room in rooms])
 
                 date_picker = QDateEdit()
                 date_picker.setObjectName("datePicker")  # Уникальное имя для выбора даты
@@ -93,16 +93,15 @@ class AddReceiptDialog(QDialog):
                 # Обновление списка репетиций при выборе зала и даты
                 def update_rehearsals():
                     selected_room = room_combo.currentText()
-                    room_id = next((room[0] for room in rooms if room[1] == selected_room), None)  # Индекс 0 соответствует "id"
-                    selected_date = date_picker.date().toString("yyyy-MM-dd")  # Получаем выбранную дату в формате 'YYYY-MM-DD'
+                    room_id = next((room.id for room in rooms if room.name == selected_room), None)
                     if room_id:
                         rehearsals = self.db_controller.execute_query(
                             """
                             SELECT start_time FROM Schedules 
                             WHERE room_id = ? AND status = N'Активно' 
-                            AND CAST(start_time AS DATE) = ?  -- Добавляем фильтрацию по дате
+                            AND start_time >= ? AND start_time < ?  -- Фильтрация по дате полуинтервалом
                             """,
-                            (room_id, selected_date)
+                            (room_id, *day_range(date_picker.date().toPyDate()))
                         )
                         rehearsal_combo.clear()
                         if rehearsals:
@@ -122,9 +121,9 @@ class AddReceiptDialog(QDialog):
                 product_combo = QComboBox()
                 product_combo.setObjectName("productCombo")  # Уникальное имя для выбора товара
                 # Получение списка товаров для текущей локации
-                products = self.db_controller.select(columns=["id", "name"], table="Consumables", filters={"location_id": self.location_id})
+                products = self.db_controller.references.consumables(self.location_id)
                 if products:
-                    product_combo.addItems([product[1] for product in products])  # Индекс 1 соответствует "name"
+                    product_combo.addItems([product.name for product in products])
 
                 quantity_spin = QDoubleSpinBox()
                 quantity_spin.setObjectName("quantitySpin")  # Уникальное имя для выбора количества
@@ -137,9 +136,9 @@ class AddReceiptDialog(QDialog):
                 instrument_combo = QComboBox()
                 instrument_combo.setObjectName("instrumentCombo")  # Уникальное имя для выбора инструмента
                 # Получение списка инструментов для текущей локации
-                instruments = self.db_controller.select(columns=["id", "name"], table="Instruments", filters={"location_id": self.location_id})
+                instruments = self.db_controller.references.instruments(self.location_id)
                 if instruments:
-                    instrument_combo.addItems([instrument[1] for instrument in instruments])  # Индекс 1 соответствует "name"
+                    instrument_combo.addItems([instrument.name for instrument in instruments])
 
                 details_layout.addRow("Инструмент:", instrument_combo)
 
@@ -182,22 +181,18 @@ class AddReceiptDialog(QDialog):
                         if room_combo and date_picker and rehearsal_combo:
                             print(room_combo.currentText(), date_picker.date(), rehearsal_combo.currentText())
                             room_name = room_combo.currentText()
-                            room_id = self.db_controller.select(
-                                columns=["id"], table="Rooms", filters={"location_id": self.location_id, "name": room_name}
-                            )
-                            if not room_id:
+                            room = self.db_controller.references.find("Rooms", self.location_id, room_name)
+                            if not room:
                                 print(f"Комната {room_name} не найдена!")
                                 continue
-                            room_id = room_id[0][0]
+                            room_id = room.id
 
                             rehearsal_time = rehearsal_combo.currentText()
                             rehearsal_start_time = f"{date_picker.date().toString('yyyy-MM-dd')} {rehearsal_time}:00"
                             print(rehearsal_start_time)
 
-                            # Получаем цену аренды зала
-                            room_price = self.db_controller.select(
-                                columns=["hourly_rate"], table="Rooms", filters={"id": room_id}
-                            )[0][0]
+                            # Цена аренды зала
+                            room_price = room.hourly_rate
 
                             # Получаем продолжительность репетиции из расписания
                             schedule = self.db_controller.select(
@@ -225,22 +220,18 @@ class AddReceiptDialog(QDialog):
 
                         if product_combo and quantity_spin:
                             product_name = product_combo.currentText()
-                            product_id = self.db_controller.select(
-                                columns=["id"], table="Consumables", filters={"location_id": self.location_id, "name": product_name}
-                            )
-                            if not product_id:
+                            product = self.db_controller.references.find("Consumables", self.location_id, product_name)
+                            if not product:
                                 print(f"Продукт {product_name} не найден!")
                                 continue
-                            product_id = product_id[0][0]
+                            product_id = product.id
                             quantity = quantity_spin.value()
 
-                            product = self.db_controller.select(
-                                columns=["price", "quantity"], table="Consumables", filters={"id": product_id}
-                            )
-                            # Получаем цену товара
-                            product_price = product[0][0]
+                            # Цена товара из справочника, остаток — из БД (меняется при каждой продаже)
+                            product_price = product.price
+                            stock = self.db_controller.select(columns=["quantity"], table="Consumables", filters={"id": product_id})
 
-                            self.db_controller.update_record("Consumables", {"quantity": product[0][1]-quantity}, {"id": product_id})
+                            self.db_controller.update_record("Consumables", {"quantity": stock[0][0]-quantity}, {"id": product_id})
 
                             total_cost = float(product_price) * quantity
                             total_amount = float(total_amount)
@@ -260,18 +251,14 @@ class AddReceiptDialog(QDialog):
 
                         if instrument_combo:
                             instrument_name = instrument_combo.currentText()
-                            instrument_id = self.db_controller.select(
-                                columns=["id"], table="Instruments", filters={"location_id": self.location_id, "name": instrument_name}
-                            )
-                            if not instrument_id:
+                            instrument = self.db_controller.references.find("Instruments", self.location_id, instrument_name)
+                            if not instrument:
                                 print(f"Инструмент {instrument_name} не найден!")
                                 continue
-                            instrument_id = instrument_id[0][0]
+                            instrument_id = instrument.id
 
-                            # Получаем цену аренды инструмента
-                            instrument_price = self.db_controller.select(
-                                columns=["hourly_rate"], table="Instruments", filters={"id": instrument_id}
-                            )[0][0]
+                            # Цена аренды инструмента
+                            instrument_price = instrument.hourly_rate
 
                             total_cost = instrument_price
                             total_amount += total_cost
@@ -14,7 +14,7 @@ class AddRecordDialog(QDialog):
         super().__init__(parent)
         self.db_controller = db_controller
         self.table = table
-        self.location = db_controller.select(['id', 'name'], 'Locations', location)
+        self.location = db_controller.references.location(location)
         self.room = room
         self.type = type
         self.employee_id = employee_id
@@ -28,11 +28,11 @@ class AddRecordDialog(QDialog):
 
         # Фильтры
         filter_layout = QHBoxLayout()
-        location_label = QLabel(f"Локация: {self.location[1]}")
+        location_label = QLabel(f"Локация: {self.location.name}")
         filter_layout.addWidget(location_label)
         if room:
-            self.room = db_controller.select(['id', 'name'], 'Rooms', room)
-            room_label = QLabel(f"Зал: {self.room[1]}")
+            self.room = db_controller.references.room(room)
+            room_label = QLabel(f"Зал: {self.room.name}")
             filter_layout.addWidget(room_label)
         main_layout.addLayout(filter_layout)
 
@@ -59,9 +59,9 @@ class AddRecordDialog(QDialog):
         elif table == "checks":
             filters = {}
             if self.room:
-                filters['room_id'] = self.room[0]
+                filters['room_id'] = self.room.id
             else:
-                filters['location_id'] = self.location[0]
+                filters['location_id'] = self.location.id
             self.items = self.db_controller.select(['id', 'name'], self.type, None, filters)
             self.input_name = QComboBox(self)
             self.input_description = QTextEdit(self)
@@ -75,9 +75,9 @@ class AddRecordDialog(QDialog):
         else:
             filters = {}
             if self.room:
-                filters['room_id'] = self.room[0]
+                filters['room_id'] = self.room.id
             else:
-                filters['location_id'] = self.location[0]
+                filters['location_id'] = self.location.id
             self.items = self.db_controller.select(['id', 'name'], self.type, None, filters)
             self.input_legal_entity = QLineEdit(self)
             self.input_price = QDoubleSpinBox(self)
@@ -117,13 +117,13 @@ class AddRecordDialog(QDialog):
                         id=None,
                         name=self.input_name.text(),
                         type=self.input_type.text(),
-                        room_id=self.room[0],
+                        room_id=self.room.id,
                         status='OK'
                     )
                 else:
                     shema = Instrument(
                         id=None,
-                        location_id=self.location[0],
+                        location_id=self.location.id,
                         name=self.input_name.text(),
                         hourly_rate=self.input_hourly_rate.value()
                     )
@@ -43,7 +43,6 @@ class AddRowDialog(QDialog):
             print(query, values)
             # Выполняем запрос
             self.db_controller.execute_query(query, tuple(values))
-            self.db_controller.connection.commit()
 
             QMessageBox.information(self, "Успех", "Запись успешно добавлена.")
             self.accept()
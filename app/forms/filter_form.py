@@ -1,6 +1,14 @@
-from PyQt6.QtWidgets import QPushButton, QMessageBox, QLineEdit, QDialog, QFormLayout
+from PyQt6.QtWidgets import QPushButton, QMessageBox, QLineEdit, QDialog, QFormLayout, QLabel
 
 from utils.controller import DBController
+from utils.filters import NUMERIC_TYPES, DATE_TYPES, build_conditions
+
+# Подсказки к синтаксису фильтров в зависимости от типа столбца
+PLACEHOLDERS = {
+    "number": "5 | 1,2,3 | 10..20",
+    "date": "2024-05-01 | 2024-05-01..2024-05-31",
+    "text": "начало | =точно | *подстрока",
+}
 
 class FindRecordsDialog(QDialog):
     def __init__(self, table_columns, db_controller: DBController, table_name, parent=None):
@@ -15,11 +23,20 @@ class FindRecordsDialog(QDialog):
 
         # Layout для формы ввода данных
         self.layout = QFormLayout(self)
+        self.layout.addRow(QLabel("Текст ищется по началу строки, \"*\" в начале — поиск подстроки", self))
 
         # Поля ввода для каждой колонки
+        self.column_types = self.db_controller.get_column_types(self.table_name)
         self.inputs = {}
         for column in self.table_columns:
             input_field = QLineEdit(self)
+            data_type = self.column_types.get(column)
+            if data_type in NUMERIC_TYPES:
+                input_field.setPlaceholderText(PLACEHOLDERS["number"])
+            elif data_type in DATE_TYPES:
+                input_field.setPlaceholderText(PLACEHOLDERS["date"])
+            else:
+                input_field.setPlaceholderText(PLACEHOLDERS["text"])
             input_field.textChanged.connect(self.find)
             self.inputs[column] = input_field
             self.layout.addRow(f"{column}:", input_field)
@@ -37,9 +54,14 @@ class FindRecordsDialog(QDialog):
         try:
             # Получаем значения из полей
             values = [self.inputs[column].text() for column in self.table_columns]
+            try:
+                build_conditions(dict(zip(self.table_columns, values)), self.column_types)
+            except ValueError:
+                return  # Значение ещё вводится (например, неполная дата) — не перезагружаем таблицу
             self._parent.column_filters = {}
             for column, value in zip(self.table_columns, values):
                 self._parent.column_filters[column] = value
+            self._parent.page_cursors = [None]  # Фильтры изменились — листаем с первой страницы
 
             self._parent.load_data()
             #self._parent.column_filters = None
@@ -49,6 +71,7 @@ class FindRecordsDialog(QDialog):
 
     def drop_filters(self):
         self._parent.column_filters = None
+        self._parent.page_cursors = [None]
         self.accept()
 
     def save_filters(self):
@@ -1,9 +1,12 @@
+import os
+
 from PyQt6.QtWidgets import QMainWindow, QTabWidget, QMessageBox
 from PyQt6.QtGui import QAction
 
 from utils.controller import DBController
+from utils.reports import ReportQueue
 from widgets.edit_tab import EditTab
-from widgets.report_tab import ReportTab
+from widgets.report_tab import ReportTab, ReportSignals
 from widgets.schedule_tab import ScheduleTab
 from widgets.accounting_tab import EquipmentInstrumentsTab
 from widgets.receipt_tab import ReceiptTab
@@ -17,10 +20,20 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.db_controller = db_controller
         self.employee_id = employee_id
-        self.location_id = self.db_controller.select(["location_id"], "Employees", employee_id)[0]
+        self.location_id = self.db_controller.references.employee(employee_id).location_id
         self.current_offset = 0
         self.limit = 10
         self.column_filters = None
+
+        # Отчёты формируются в фоне; REPORTS_DIR — папка результатов.
+        # Очередь одна на окно: обновление вкладок не теряет поставленные задания
+        self.report_signals = ReportSignals()
+        self.report_queue = ReportQueue(
+            db_controller,
+            os.getenv("REPORTS_DIR", "reports"),
+            max_workers=int(os.getenv("REPORT_WORKERS", "2")),
+            on_update=self.report_signals.job_updated.emit,
+        )
         self.init_ui()
 
     def init_ui(self):
@@ -42,8 +55,12 @@ class MainWindow(QMainWindow):
     def load_tabs(self):
         """Загружает вкладки в виджет."""
         self.tab_widget.clear()  # Очищаем все текущие вкладки
+        if getattr(self, "report_tab", None) is not None:
+            # Снятая вкладка не удаляется Qt; отключаем её от обновлений очереди
+            self.report_signals.job_updated.disconnect(self.report_tab.update_job)
+            self.report_tab = None
 
-        emp_role: str = self.db_controller.select(["role"], "Employees", self.employee_id)[0]
+        emp_role: str = self.db_controller.references.employee(self.employee_id).role
         print(emp_role)
         if emp_role.lower() == "manager":
             self.edit_tab = EditTab(self.db_controller)
@@ -71,7 +88,7 @@ class MainWindow(QMainWindow):
             self.clients_tab = InstrumentRentalTab(db_controller=self.db_controller, location_id=self.location_id, employee_id=self.employee_id)
             self.tab_widget.addTab(self.clients_tab, "Аренда")
 
-            self.report_tab = ReportTab(self.db_controller, self.employee_id)
+            self.report_tab = ReportTab(self.db_controller, self.employee_id, self.report_queue, self.report_signals)
             self.tab_widget.addTab(self.report_tab, "Отчеты")
 
     def refresh_tabs(self):
@@ -79,3 +96,8 @@ class MainWindow(QMainWindow):
         self.load_tabs()
         QMessageBox.information(self, "Обновление", "Вкладки обновлены.")
 
+    def closeEvent(self, event):
+        # Незавершённые отчёты отменяются, пул потоков останавливается
+        self.report_queue.shutdown()
+        super().closeEvent(event)
+
@@ -1,14 +1,30 @@
 import sys
+from concurrent.futures import Future
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import QPushButton, QMessageBox, QLabel, QDialog, QFormLayout, QTextEdit, QFileDialog
 from utils.controller import DBController
-from utils.documents import save_report_to_docx, save_standart_report_to_docx
+from utils.documents import equipment_report_data
+from utils.reports import ReportQueue
+
+# Сколько строк каждого раздела показывать в предпросмотре
+PREVIEW_LINES = 10
+
+def _preview(text: str) -> str:
+    lines = text.splitlines()
+    if len(lines) <= PREVIEW_LINES:
+        return text
+    return "\n".join(lines[:PREVIEW_LINES] + [f"... и еще {len(lines) - PREVIEW_LINES}"])
 
 class ReportWindow(QDialog):
-    def __init__(self, db_controller: DBController, parent=None):
+    # Результат загрузки предпросмотра; испускается из потока очереди отчетов
+    preview_loaded = pyqtSignal(object)
+
+    def __init__(self, db_controller: DBController, report_queue: ReportQueue, parent=None):
         super().__init__()
         self.setWindowTitle("Отчет о состоянии оборудования")
         self.setFixedSize(400, 300)
         self.db_controller = db_controller
+        self.report_queue = report_queue
 
         # UI компоненты
         self.eq_label = QLabel("Оборудование:", self)
@@ -44,52 +60,60 @@ class ReportWindow(QDialog):
         self.cancel_button.clicked.connect(self.reject)
         self.layout.addRow(self.cancel_button)
 
-        self.close_flag = False
+        self.preview_loaded.connect(self.show_data)
         self.get_data()
 
-        if self.close_flag:
-            self.close()
-            self.reject()
-
     def get_data(self):
-        try:
-            equipment_data = self.db_controller.execute_query("SELECT * FROM Equipment")
-            checks_data = self.db_controller.execute_query("SELECT * FROM Checks")
-
-            self.eq_data_label.setText("\n".join([str(row) for row in equipment_data]))
-            self.checks_data_label.setText("\n".join([str(row) for row in checks_data]))
+        # Данные читаются в пуле очереди отчетов, окно не ждет запросов к БД
+        self.eq_data_label.setText("Загрузка...")
+        self.preview_future = self.report_queue.run(equipment_report_data, self.db_controller)
+        self.preview_future.add_done_callback(self._preview_done)
 
-            # Пример сводной статистики
-            total_equipment = len(equipment_data)
-            total_checks = len(checks_data)
-            self.stats_data_label.setText(f"Всего оборудования: {total_equipment}\nВсего проверок: {total_checks}")
+    def _preview_done(self, future: Future):
+        try:
+            self.preview_loaded.emit(future)
+        except RuntimeError:
+            # Окно уже закрыто
+            pass
 
+    def show_data(self, future: Future):
+        if future.cancelled():
+            return
+        try:
+            equipment_data, checks_data, stats_data = future.result()
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось получить данные: {e}")
-            self.close_flag = True
+            self.reject()
+            return
+
+        self.eq_data_label.setText(_preview(equipment_data))
+        self.checks_data_label.setText(_preview(checks_data))
+        self.stats_data_label.setText(stats_data)
+
+    def done(self, result):
+        self.preview_future.cancel()
+        super().done(result)
 
     def save_report(self):
-        equipment_data = self.eq_data_label.text()
-        checks_data = self.checks_data_label.text()
-        stats_data = self.stats_data_label.text()
         comments = self.comments_text_edit.toPlainText()
         if comments == '':
             QMessageBox.critical(self, "Ошибка", f"Заполните необходимые поля: Комментарии")
             return
 
-        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", "", "Word Documents (*.docx);;All Files (*)")
+        # Данные перечитываются и документ собирается в фоне (ReportTab показывает ход выполнения)
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", str(self.report_queue.results_dir), "Word Documents (*.docx);;All Files (*)")
         if file_path:
             try:
-                save_report_to_docx(equipment_data, checks_data, stats_data, comments, file_path)
-                QMessageBox.information(self, "Успех", "Отчет успешно сохранен")
-                self.exec()
+                self.report_queue.submit("equipment", file_path, title=self.windowTitle(), comments=comments)
+                self.accept()
             except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить отчет: {e}")
+                QMessageBox.critical(self, "Ошибка", f"Не удалось поставить отчет в очередь: {e}")
 
 class StandartReportWindow(QDialog):
-    def __init__(self, db_controller: DBController, parent=None, emp_id=1):
+    def __init__(self, db_controller: DBController, report_queue: ReportQueue, parent=None, emp_id=1):
         super().__init__()
         self.emp_id = emp_id
+        self.report_queue = report_queue
         self.setWindowTitle("Отчет о состоянии оборудования")
         self.setFixedSize(400, 300)
         self.db_controller = db_controller
@@ -118,12 +142,11 @@ class StandartReportWindow(QDialog):
             QMessageBox.critical(self, "Ошибка", f"Заполните необходимые поля: Текст отчета")
             return
 
-        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", "", "Word Documents (*.docx);;All Files (*)")
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить отчет", str(self.report_queue.results_dir), "Word Documents (*.docx);;All Files (*)")
         if file_path:
             try:
-                save_standart_report_to_docx(comments, file_path, self.emp_id)
-                QMessageBox.information(self, "Успех", "Отчет успешно сохранен")
-                self.exec()
+                self.report_queue.submit("standard", file_path, title="Стандартный отчет", comments=comments, emp_id=self.emp_id)
+                self.accept()
             except Exception as e:
-                QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить отчет: {e}")
+                QMessageBox.critical(self, "Ошибка", f"Не удалось поставить отчет в очередь: {e}")
                 self.reject()
\ No newline at end of file
@@ -0,0 +1,52 @@
+import os
+import sys
+import logging
+import argparse
+
+from utils.backends import create_backend
+from utils.controller import DBController
+from utils.reports import ReportQueue, submit_location_reports
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    Пакетная генерация отчётов о состоянии оборудования по всем локациям без интерфейса,
+    например ночным заданием cron. Подключение к БД — те же переменные окружения, что у api.py.
+    Код возврата 1, если хотя бы один отчёт не удалось сформировать.
+    """
+    parser = argparse.ArgumentParser(description="Отчёты о состоянии оборудования по локациям")
+    parser.add_argument("--results-dir", default=os.getenv("REPORTS_DIR", "reports"), help="Папка результатов")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("REPORT_WORKERS", "2")), help="Отчётов одновременно")
+    parser.add_argument("--location", type=int, action="append", dest="locations", help="Номер локации (можно несколько раз)")
+    parser.add_argument("--comments", default="", help="Текст раздела «Комментарии»")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    controller = DBController(
+        backend=create_backend(
+            os.getenv("DB_BACKEND", "mssql"),
+            server=os.getenv("DB_SERVER"),
+            database=os.getenv("DB_NAME"),
+            username=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            sqlite_path=os.getenv("DB_SQLITE_PATH", ":memory:"),
+        ),
+        max_pool_size=max(args.workers, 1),
+    )
+    queue = ReportQueue(controller, args.results_dir, max_workers=args.workers)
+    try:
+        jobs = submit_location_reports(queue, args.comments, args.locations)
+        results = queue.wait([job.id for job in jobs])
+    finally:
+        queue.shutdown(cancel=True)
+
+    for job in results:
+        if job.status == "done":
+            logging.info(f"{job.title}: {job.path}")
+        else:
+            logging.error(f"{job.title}: {job.status} {job.error or ''}")
+    return 0 if all(job.status == "done" for job in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
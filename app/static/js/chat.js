@@ -1,12 +1,89 @@
-const ws = new WebSocket("ws://localhost:8000/ws");
+// Сообщения чата приходят дельтами с порядковыми номерами (seq).
+// Список, отрисованный сервером, дополняется новыми сообщениями; при разрыве соединения
+// клиент переподключается с последним полученным seq и получает только пропущенное.
+// Дельты могут приходить не по порядку (сообщение другого процесса, зафиксированное позже
+// следующих), поэтому повторы отсекаются по множеству полученных seq, а сообщение
+// вставляется в список на своё место.
+let lastSeq = null;
+let seenSeqs = new Set();
+let retryDelay = 1000;
 
-ws.onmessage = function(event) {
-    const messages = JSON.parse(event.data);
+function renderMessage(msg) {
+    const li = document.createElement("li");
+    li.dataset.seq = msg.seq;
+    const author = document.createElement("strong");
+    author.textContent = `${msg.username}:`;
+    li.appendChild(author);
+    li.append(` ${msg.message ? msg.message : ''} `);
+    if (msg.file) {
+        const link = document.createElement("a");
+        // Вложения из хранилища адресуются хэшем содержимого, старые — именем файла
+        link.href = msg.file_hash
+            ? `/download/${msg.file_hash}/${encodeURIComponent(msg.file)}`
+            : `/download/${encodeURIComponent(msg.file)}`;
+        link.textContent = `Download ${msg.file}`;
+        li.appendChild(link);
+    }
+    return li;
+}
+
+function applyMessages(messages) {
     const messagesList = document.getElementById("messages");
-    messagesList.innerHTML = "";
     messages.forEach(msg => {
-        const li = document.createElement("li");
-        li.innerHTML = `<strong>${msg.username}:</strong> ${msg.message ? msg.message : ''} ${msg.file ? `<a href="/download/${msg.file}">Download ${msg.file}</a>` : ''}`;
-        messagesList.appendChild(li);
+        // Повтор (например, сообщение пришло и в истории, и дельтой) пропускается
+        if (seenSeqs.has(msg.seq)) {
+            return;
+        }
+        seenSeqs.add(msg.seq);
+        let next = null;
+        if (lastSeq !== null && msg.seq < lastSeq) {
+            // Опоздавшее сообщение — перед первым сообщением с большим seq
+            next = Array.from(messagesList.children).find(li => Number(li.dataset.seq) > msg.seq) || null;
+        }
+        messagesList.insertBefore(renderMessage(msg), next);
+        if (lastSeq === null || msg.seq > lastSeq) {
+            lastSeq = msg.seq;
+        }
     });
-};
\ No newline at end of file
+}
+
+function applySnapshot(messages) {
+    const messagesList = document.getElementById("messages");
+    messagesList.replaceChildren(...messages.map(renderMessage));
+    seenSeqs = new Set(messages.map(msg => msg.seq));
+    lastSeq = messages.length ? messages[messages.length - 1].seq : 0;
+}
+
+function connect() {
+    const protocol = location.protocol === "https:" ? "wss:" : "ws:";
+    const query = lastSeq !== null ? `?last_seq=${lastSeq}` : "";
+    const ws = new WebSocket(`${protocol}//${location.host}/ws${query}`);
+
+    ws.onopen = function() {
+        retryDelay = 1000;
+    };
+
+    ws.onmessage = function(event) {
+        const data = JSON.parse(event.data);
+        if (data.type === "snapshot") {
+            applySnapshot(data.messages);
+        } else {
+            applyMessages(data.messages);
+        }
+    };
+
+    ws.onclose = function() {
+        setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+    };
+}
+
+document.addEventListener("DOMContentLoaded", function() {
+    // Последнее сообщение, отрисованное сервером вместе со страницей
+    const rendered = document.querySelectorAll("#messages li[data-seq]");
+    rendered.forEach(li => seenSeqs.add(Number(li.dataset.seq)));
+    if (rendered.length) {
+        lastSeq = Math.max(...seenSeqs);
+    }
+    connect();
+});
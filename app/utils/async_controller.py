@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from utils.controller import DBController
+from utils.shemas import *
+
+
+class AsyncDBController:
+    """
+    Асинхронная обёртка над DBController для FastAPI.
+
+    Блокирующие вызовы драйвера БД выполняются на отдельном ограниченном пуле потоков,
+    размер которого совпадает с размером пула соединений, поэтому event loop
+    (и websocket-чат) не останавливается на время выполнения запросов.
+    """
+
+    def __init__(self, controller: DBController, max_workers: int | None = None):
+        self.controller = controller
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or controller.pool.max_size,
+            thread_name_prefix="db-worker",
+        )
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Выполняет произвольную блокирующую функцию в пуле потоков БД.
+        Контекстные переменные (например, источник запросов для utils.query_stats) передаются в поток.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, partial(context.run, func, *args, **kwargs))
+
+    async def run_in_transaction(self, func: Callable[[DBController], Any]) -> Any:
+        """
+        Выполняет func(controller) в одном потоке и одной транзакции:
+        все запросы внутри используют одно соединение из пула.
+        """
+        def task():
+            with self.controller.transaction():
+                return func(self.controller)
+        return await self.run(task)
+
+    async def execute_query(self, query: str, params: tuple = (), transactional: bool = False):
+        return await self.run(self.controller.execute_query, query, params, transactional)
+
+    async def select(self, columns: list[str] | None, table: str, id: int | None = None, filters: dict | None = None) -> list:
+        return await self.run(self.controller.select, columns, table, id, filters)
+
+    async def insert(self, table: str, data: dict):
+        return await self.run(self.controller.insert, table, data)
+
+    async def bulk_insert(self, table: str, rows: list, batch_size: int = 1000, return_ids: bool = False) -> int | list[int]:
+        return await self.run(self.controller.bulk_insert, table, rows, batch_size, return_ids)
+
+    async def update_record(self, table_name: str, record: dict, filters: dict):
+        return await self.run(self.controller.update_record, table_name, record, filters)
+
+    async def register_client(self, name: str, phone_number: str, email: str | None = None) -> BookingResult:
+        return await self.run(self.controller.register_client, name, phone_number, email)
+
+    async def book_room(self, room_id: int, start_time, duration_hours: int, **kwargs) -> BookingResult:
+        return await self.run(self.controller.book_room, room_id, start_time, duration_hours, **kwargs)
+
+    async def load_schedule(self, location_id, date, room_id) -> list[ScheduleRecord]:
+        return await self.run(self.controller.load_schedule, location_id, date, room_id)
+
+    async def load_accounting(self, type, location_id, room_id) -> list[EquipmentRecord] | list[InstrumentRecord]:
+        return await self.run(self.controller.load_accounting, type, location_id, room_id)
+
+    async def load_checks(self, type, location_id, room_id, status=None) -> list[CheckRecord]:
+        return await self.run(self.controller.load_checks, type, location_id, room_id, status)
+
+    async def load_repairs(self, type, location_id, room_id, status=None) -> list[RepairRecord]:
+        return await self.run(self.controller.load_repairs, type, location_id, room_id, status)
+
+    def pool_stats(self) -> PoolStats:
+        return self.controller.pool_stats()
+
+    def query_metrics(self) -> list[QueryStat]:
+        return self.controller.query_metrics()
+
+    async def statement_stats(self, server: bool = False) -> StatementStats:
+        return await self.run(self.controller.statement_stats, server)
+
+    def close(self):
+        """Останавливает пул потоков и закрывает соединения."""
+        self.executor.shutdown(wait=True)
+        self.controller.close_connection()
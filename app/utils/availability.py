@@ -0,0 +1,197 @@
+import time
+import math
+import threading
+from datetime import date, datetime, timedelta
+
+from utils.controller import DBController, day_range
+
+# Часы работы залов: бронировать можно с 10:00, закончить — не позже 22:00
+OPEN_HOUR = 10
+CLOSE_HOUR = 22
+MAX_DURATION = 6
+
+def hours_mask(start_hour: int, hours: int) -> int:
+    """Битовая маска часов [start_hour, start_hour + hours) в пределах суток (бит i — час i)."""
+    end_hour = min(start_hour + hours, 24)
+    if end_hour <= start_hour:
+        return 0
+    return ((1 << (end_hour - start_hour)) - 1) << start_hour
+
+OPEN_MASK = hours_mask(OPEN_HOUR, CLOSE_HOUR - OPEN_HOUR)
+
+# Бронирование S пересекается с интервалом [start, end), если S.start_time < end AND S.end_time > start.
+# Бронирование длится не больше MAX_DURATION часов, поэтому нижняя граница start_time превращает
+# условие в поиск по диапазону ключей IX_Schedules_Room_StartTime; end_time (вычисляемый
+# сохраняемый столбец) берётся из INCLUDE индекса. То же условие проверяет процедура BookRoom
+OVERLAP_CONDITION = "S.start_time > ? AND S.start_time < ? AND S.end_time > ?"
+
+def overlap_params(start: datetime, end: datetime) -> tuple[datetime, datetime, datetime]:
+    """Параметры OVERLAP_CONDITION для интервала [start, end)."""
+    return (start - timedelta(hours=MAX_DURATION), end, start)
+
+def interval_mask(start: datetime, end: datetime, day: date) -> int:
+    """Маска часов дня day, которые задевает интервал [start, end)."""
+    day_start = datetime.combine(day, datetime.min.time())
+    first = max(math.floor((start - day_start).total_seconds() / 3600), 0)
+    last = min(math.ceil((end - day_start).total_seconds() / 3600), 24)
+    return hours_mask(first, last - first)
+
+
+class AvailabilityIndex:
+    """
+    Занятость залов по интервалам бронирований [start_time, end_time).
+
+    Для каждой пары (room_id, дата) кэшируется 24-битная маска занятых часов.
+    Маска строится одним диапазонным запросом по индексу IX_Schedules_Room_StartTime
+    с условием пересечения OVERLAP_CONDITION, сбрасывается при новых бронированиях
+    и по истечении ttl секунд (на случай записей, сделанных из десктоп-приложения).
+    Маска, загрузка которой пересеклась со сбросом, в кэш не кладётся.
+    Свободные залы на интервал (free_rooms) ищутся тем же условием без кэша.
+    """
+
+    def __init__(self, controller: DBController, ttl: float = 30.0, max_entries: int = 10000):
+        self.controller = controller
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._masks: dict[tuple[int, date], tuple[int, float]] = {}
+        # Счётчики сбросов: маска, загруженная до сброса, не попадает в кэш после него
+        self._day_generations: dict[tuple[int, date], int] = {}
+        self._room_generations: dict[int, int] = {}
+
+    def _generation(self, key: tuple[int, date]) -> tuple[int, int]:
+        # Вызывается под self._lock
+        return self._room_generations.get(key[0], 0), self._day_generations.get(key, 0)
+
+    def peek(self, room_id: int, day: date) -> int | None:
+        """Возвращает маску из кэша без обращения к БД или None, если её нет или она устарела."""
+        with self._lock:
+            entry = self._masks.get((room_id, day))
+        if entry is None or time.monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    def load(self, room_id: int, day: date) -> int:
+        """
+        Загружает маску занятых часов из БД и кладёт её в кэш.
+        Если во время загрузки зал был сброшен invalidate(), маска возвращается, но не кэшируется.
+        """
+        key = (room_id, day)
+        with self._lock:
+            generation = self._generation(key)
+        query = f"""
+        SELECT S.start_time, S.end_time
+        FROM Schedules S
+        WHERE S.room_id = ? AND {OVERLAP_CONDITION}
+        """
+        rows = self.controller.execute_query(query, (room_id, *overlap_params(*day_range(day))))
+
+        mask = 0
+        for start_time, end_time in rows:
+            mask |= interval_mask(start_time, end_time, day)
+
+        self._store({key: mask}, {key: generation})
+        return mask
+
+    def _store(self, masks: dict[tuple[int, date], int], generations: dict[tuple[int, date], tuple[int, int]]):
+        now = time.monotonic()
+        with self._lock:
+            for key, mask in masks.items():
+                if self._generation(key) != generations[key]:
+                    # Бронирование появилось во время загрузки: маска могла его не увидеть
+                    continue
+                self._masks.pop(key, None)
+                if len(self._masks) >= self.max_entries:
+                    self._masks.pop(next(iter(self._masks)))
+                self._masks[key] = (mask, now)
+
+    def busy_masks(self, room_ids: list[int], start: date, days: int) -> dict[int, list[int]]:
+        """
+        Маски занятости залов на days дней начиная со start: {room_id: [маска дня 0, маска дня 1, ...]}.
+
+        Если в кэше нет хотя бы одной пары (зал, день), все расписания диапазона
+        загружаются одним запросом по индексу IX_Schedules_Room_StartTime,
+        а результат кладётся в кэш (в том числе пустые дни).
+        """
+        day_list = [start + timedelta(days=offset) for offset in range(days)]
+        cached = {(room_id, day): self.peek(room_id, day) for room_id in room_ids for day in day_list}
+        if room_ids and any(mask is None for mask in cached.values()):
+            masks = dict.fromkeys(cached, 0)
+            with self._lock:
+                generations = {key: self._generation(key) for key in masks}
+            query = f"""
+            SELECT S.room_id, S.start_time, S.end_time
+            FROM Schedules S
+            WHERE S.room_id IN ({", ".join("?" for _ in room_ids)}) AND {OVERLAP_CONDITION}
+            """
+            rows = self.controller.execute_query(query, (*room_ids, *overlap_params(*day_range(start, days))))
+            for room_id, start_time, end_time in rows:
+                # Бронирование может задевать и следующий день, если заканчивается после полуночи
+                day = start_time.date()
+                while datetime.combine(day, datetime.min.time()) < end_time:
+                    if (room_id, day) in masks:
+                        masks[(room_id, day)] |= interval_mask(start_time, end_time, day)
+                    day += timedelta(days=1)
+            self._store(masks, generations)
+            cached = masks
+        return {room_id: [cached[(room_id, day)] for day in day_list] for room_id in room_ids}
+
+    def free_rooms(self, start: datetime, duration: int, location_id: int | None = None) -> list:
+        """
+        Залы, свободные на всём интервале [start, start + duration ч): строки (id, name).
+        Для каждого зала выполняется поиск по IX_Schedules_Room_StartTime, а не сканирование расписания.
+
+        :param location_id: Только залы локации; None — все залы.
+        """
+        location_condition = "R.location_id = ? AND " if location_id is not None else ""
+        query = f"""
+        SELECT R.id, R.name
+        FROM Rooms R
+        WHERE {location_condition}NOT EXISTS (
+            SELECT 1
+            FROM Schedules S
+            WHERE S.room_id = R.id AND {OVERLAP_CONDITION}
+        )
+        ORDER BY R.id
+        """
+        params = (*(() if location_id is None else (location_id,)), *overlap_params(start, start + timedelta(hours=duration)))
+        return self.controller.execute_query(query, params)
+
+    @staticmethod
+    def free_string(busy: int) -> str:
+        """Свободные часы работы строкой: символ i — час OPEN_HOUR + i, "1" — свободен."""
+        free = (OPEN_MASK & ~busy) >> OPEN_HOUR
+        return format(free, f"0{CLOSE_HOUR - OPEN_HOUR}b")[::-1]
+
+    def busy_mask(self, room_id: int, day: date) -> int:
+        mask = self.peek(room_id, day)
+        if mask is None:
+            mask = self.load(room_id, day)
+        return mask
+
+    def invalidate(self, room_id: int, day: date | None = None):
+        """Сбрасывает кэш зала на указанную дату (или на все даты)."""
+        with self._lock:
+            if day is not None:
+                self._masks.pop((room_id, day), None)
+                self._day_generations[(room_id, day)] = self._day_generations.get((room_id, day), 0) + 1
+            else:
+                for key in [key for key in self._masks if key[0] == room_id]:
+                    del self._masks[key]
+                self._room_generations[room_id] = self._room_generations.get(room_id, 0) + 1
+
+    @staticmethod
+    def free_hours(busy: int) -> list[int]:
+        """Свободные часы начала бронирования по маске занятости."""
+        free = OPEN_MASK & ~busy
+        return [hour for hour in range(OPEN_HOUR, CLOSE_HOUR) if free >> hour & 1]
+
+    @staticmethod
+    def durations(busy: int, start_hour: int, max_duration: int = MAX_DURATION) -> list[int]:
+        """Допустимые продолжительности бронирования, начиная с start_hour."""
+        result = []
+        for duration in range(1, max_duration + 1):
+            if start_hour + duration > CLOSE_HOUR or busy & hours_mask(start_hour, duration):
+                break
+            result.append(duration)
+        return result
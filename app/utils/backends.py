@@ -0,0 +1,436 @@
+import re
+import inspect
+import sqlite3
+import itertools
+from abc import ABC, abstractmethod
+from collections import namedtuple
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from utils.shemas import ColumnInfo, PlanCacheStat
+
+try:
+    import pyodbc
+except ImportError:
+    # Нет драйвера ODBC (например, в тестовом окружении) — доступен только SQLiteBackend
+    pyodbc = None
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "Scripts"
+
+
+class Dialect:
+    """
+    Диалект SQL Server. Запросы в DBController написаны на T-SQL,
+    поэтому здесь они не меняются; конструкции, которые нельзя
+    перевести механически (пагинация, возврат ID), строятся методами диалекта.
+    """
+    name = "mssql"
+
+    def translate(self, query: str) -> str:
+        """Переводит запрос на T-SQL в SQL базы данных."""
+        return query
+
+    def limit_clause(self, limit: int, offset: int = 0) -> tuple[str, list]:
+        """Окончание запроса с ORDER BY, выбирающее limit строк после offset, и его параметры."""
+        return "OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", [offset, limit]
+
+    def insert_returning_ids(self, table: str, columns: list[str], rows: int = 1) -> str:
+        """
+        INSERT нескольких строк (параметры — значения строк подряд), возвращающий ID вставленных
+        записей; порядок ID приводится к порядку строк методом ids_in_row_order.
+        """
+        # Порядок IDENTITY в многострочном INSERT ... OUTPUT не совпадает с порядком VALUES,
+        # поэтому вставка через MERGE: OUTPUT может вернуть номер исходной строки.
+        # OUTPUT ... INTO: у таблицы могут быть триггеры
+        column_list = ", ".join(columns)
+        if rows == 1:
+            return (
+                "SET NOCOUNT ON; DECLARE @ids TABLE (id INT); "
+                f"INSERT INTO {table} ({column_list}) OUTPUT INSERTED.id INTO @ids VALUES ({', '.join('?' for _ in columns)}); "
+                "SELECT id FROM @ids;"
+            )
+        values = ", ".join(f"({ordinal}, {', '.join('?' for _ in columns)})" for ordinal in range(rows))
+        return (
+            "SET NOCOUNT ON; DECLARE @ids TABLE (ordinal INT, id INT); "
+            f"MERGE INTO {table} USING (VALUES {values}) AS S (ordinal, {column_list}) ON 1 = 0 "
+            f"WHEN NOT MATCHED THEN INSERT ({column_list}) VALUES ({', '.join(f'S.{column}' for column in columns)}) "
+            "OUTPUT S.ordinal, INSERTED.id INTO @ids; "
+            "SELECT id FROM @ids ORDER BY ordinal;"
+        )
+
+    def ids_in_row_order(self, rows: list) -> list[int]:
+        """ID из результата insert_returning_ids в порядке вставляемых строк."""
+        return [row[0] for row in rows]
+
+
+class SQLiteDialect(Dialect):
+    """Перевод используемого в приложении подмножества T-SQL на SQLite."""
+    name = "sqlite"
+
+    _RULES = [
+        (re.compile(r"(?<![\w'])N'"), "'"),
+        (re.compile(r"\bGETDATE\(\)", re.IGNORECASE), "datetime('now', 'localtime')"),
+        (re.compile(r"\bCURRENT_TIMESTAMP\b", re.IGNORECASE), "datetime('now', 'localtime')"),
+        (re.compile(r"\bCAST\(\s*([\w.]+)\s+AS\s+DATE\s*\)", re.IGNORECASE), r"date(\1)"),
+        (re.compile(r"\bCONVERT\(\s*date\s*,\s*([\w.]+)\s*\)", re.IGNORECASE), r"date(\1)"),
+        (re.compile(r"\bISNULL\(", re.IGNORECASE), "IFNULL("),
+        (re.compile(r"\bLEN\(", re.IGNORECASE), "LENGTH("),
+    ]
+
+    @lru_cache(maxsize=1024)
+    def translate(self, query: str) -> str:
+        for pattern, replacement in self._RULES:
+            query = pattern.sub(replacement, query)
+        return query
+
+    def limit_clause(self, limit: int, offset: int = 0) -> tuple[str, list]:
+        return "LIMIT ? OFFSET ?", [limit, offset]
+
+    def insert_returning_ids(self, table: str, columns: list[str], rows: int = 1) -> str:
+        values = ", ".join(f"({', '.join('?' for _ in columns)})" for _ in range(rows))
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {values} RETURNING id"
+
+    def ids_in_row_order(self, rows: list) -> list[int]:
+        # Порядок строк RETURNING не определён, но строки VALUES вставляются по порядку
+        # под блокировкой записи базы, и rowid каждой следующей больше предыдущего
+        return sorted(row[0] for row in rows)
+
+
+class Backend(ABC):
+    """
+    Хранилище под DBController: открывает соединения (DB-API 2.0), знает диалект,
+    читает метаданные схемы и выполняет хранимые процедуры.
+    """
+    dialect: Dialect = Dialect()
+    # Ошибки, после которых соединение нельзя возвращать в пул
+    operational_errors: tuple[type[Exception], ...] = ()
+    # Ограничение размера пула самим хранилищем (None — без ограничения)
+    max_pool_size: int | None = None
+
+    @abstractmethod
+    def connect(self) -> Any:
+        """Открывает новое соединение DB-API 2.0."""
+
+    def prepare_bulk_cursor(self, cursor) -> Any:
+        """Настраивает курсор для executemany с большим числом строк."""
+        return cursor
+
+    @abstractmethod
+    def schema_version(self, controller) -> Any:
+        """Значение, которое меняется при любом изменении схемы."""
+
+    @abstractmethod
+    def table_names(self, controller) -> list[str]:
+        """Имена пользовательских таблиц."""
+
+    @abstractmethod
+    def table_columns(self, controller, table_name: str) -> list[ColumnInfo]:
+        """Столбцы таблицы в порядке объявления."""
+
+    @abstractmethod
+    def procedure_params(self, controller, proc_name: str) -> list[dict[str, str]]:
+        """Параметры хранимой процедуры: имя и тип."""
+
+    @abstractmethod
+    def call_procedure(self, connection, proc_name: str, params: list) -> tuple[list[str], list]:
+        """Выполняет хранимую процедуру и возвращает имена столбцов и строки её результата."""
+
+    def plan_cache_stats(self, controller) -> list[PlanCacheStat] | None:
+        """Повторное использование планов в кэше сервера; None, если хранилище его не отдаёт."""
+        return None
+
+    def close(self):
+        pass
+
+
+class MSSQLBackend(Backend):
+    """SQL Server через pyodbc."""
+    dialect = Dialect()
+
+    def __init__(self, server: str, database: str, username: str, password: str, driver: str = "ODBC Driver 17 for SQL Server"):
+        if pyodbc is None:
+            raise RuntimeError("pyodbc is not available: install it and the ODBC driver or use SQLiteBackend.")
+        self.connection_string = f"DRIVER={{{driver}}};SERVER={server};DATABASE={database};UID={username};PWD={password};CHARSET=UTF8"
+        self.operational_errors = (pyodbc.OperationalError,)
+
+    def connect(self):
+        return pyodbc.connect(self.connection_string, autocommit=False)
+
+    def prepare_bulk_cursor(self, cursor):
+        # Параметры всего пакета передаются массивом за один обмен с сервером
+        cursor.fast_executemany = True
+        return cursor
+
+    def schema_version(self, controller):
+        return controller.execute_query("SELECT MAX(modify_date) FROM sys.objects")[0][0]
+
+    def table_names(self, controller) -> list[str]:
+        query = "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'"
+        return [row[0] for row in controller.execute_query(query)]
+
+    def table_columns(self, controller, table_name: str) -> list[ColumnInfo]:
+        query = """
+        SELECT
+            c.COLUMN_NAME,
+            c.DATA_TYPE,
+            c.IS_NULLABLE,
+            COLUMNPROPERTY(OBJECT_ID(c.TABLE_SCHEMA + '.' + c.TABLE_NAME), c.COLUMN_NAME, 'IsIdentity'),
+            CASE WHEN pk.COLUMN_NAME IS NULL THEN 0 ELSE 1 END,
+            COLUMNPROPERTY(OBJECT_ID(c.TABLE_SCHEMA + '.' + c.TABLE_NAME), c.COLUMN_NAME, 'IsComputed')
+        FROM INFORMATION_SCHEMA.COLUMNS c
+        LEFT JOIN (
+            SELECT ku.TABLE_NAME, ku.COLUMN_NAME
+            FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+            JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE ku ON tc.CONSTRAINT_NAME = ku.CONSTRAINT_NAME
+            WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+        ) pk ON pk.TABLE_NAME = c.TABLE_NAME AND pk.COLUMN_NAME = c.COLUMN_NAME
+        WHERE c.TABLE_NAME = ?
+        ORDER BY c.ORDINAL_POSITION
+        """
+        return [
+            ColumnInfo(
+                name=row[0],
+                data_type=row[1],
+                is_nullable=row[2] == "YES",
+                is_identity=bool(row[3]),
+                is_primary_key=bool(row[4]),
+                is_computed=bool(row[5]),
+            )
+            for row in controller.execute_query(query, (table_name,))
+        ]
+
+    def procedure_params(self, controller, proc_name: str) -> list[dict[str, str]]:
+        query = """
+        SELECT p.name AS parameter_name,
+               t.name AS parameter_type
+        FROM sys.parameters p
+        JOIN sys.types t ON p.user_type_id = t.user_type_id
+        WHERE p.object_id = OBJECT_ID(?)
+        ORDER BY p.parameter_id
+        """
+        return [{'parameter_name': param_name, 'parameter_type': param_type}
+                for param_name, param_type in controller.execute_query(query, (proc_name,))]
+
+    def call_procedure(self, connection, proc_name: str, params: list) -> tuple[list[str], list]:
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"EXEC {proc_name} {', '.join('?' for _ in params)};", params)
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description]
+            return columns, rows
+        finally:
+            cursor.close()
+
+    def plan_cache_stats(self, controller) -> list[PlanCacheStat] | None:
+        # Планы текущей базы по типам; для чтения DMV нужно право VIEW SERVER STATE
+        query = """
+        SELECT cp.objtype,
+               COUNT(*),
+               SUM(CASE WHEN cp.usecounts = 1 THEN 1 ELSE 0 END),
+               SUM(CAST(cp.usecounts AS BIGINT))
+        FROM sys.dm_exec_cached_plans cp
+        CROSS APPLY sys.dm_exec_plan_attributes(cp.plan_handle) pa
+        WHERE cp.cacheobjtype = 'Compiled Plan'
+          AND pa.attribute = 'dbid' AND CAST(pa.value AS INT) = DB_ID()
+        GROUP BY cp.objtype
+        """
+        try:
+            rows = controller.execute_query(query)
+        except pyodbc.Error as e:
+            controller.logger.warning(f"Plan cache statistics are not available: {e}")
+            return None
+        return [
+            PlanCacheStat(
+                objtype=objtype,
+                plans=plans,
+                single_use_plans=single_use,
+                use_counts=use_counts,
+                # Доля выполнений, использовавших уже скомпилированный план
+                hit_rate=1 - plans / use_counts if use_counts else 0.0,
+            )
+            for objtype, plans, single_use, use_counts in rows
+        ]
+
+
+# Преобразование типов Python <-> SQLite, совместимое с тем, что возвращает pyodbc
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+sqlite3.register_converter("BIT", lambda value: bool(int(value)))
+
+@lru_cache(maxsize=256)
+def _row_type(columns: tuple[str, ...]):
+    return namedtuple("Row", columns, rename=True)
+
+def _row_factory(cursor, row):
+    # Строки с доступом к столбцам по имени (row.name), как pyodbc.Row
+    return _row_type(tuple(description[0] for description in cursor.description))._make(row)
+
+# Типы SQLite, приводимые к DATA_TYPE SQL Server (используются фильтрами)
+_SQLITE_TYPES = {"integer": "int"}
+
+def translate_schema(script: str) -> list[str]:
+    """
+    Переводит DDL из Scripts/JamStationTables.sql на SQLite.
+    CHECK с GETDATE() (chk_start_time) пропускается: SQLite не допускает
+    недетерминированные функции в ограничениях. Вычисляемый столбец
+    AS DATEADD(hour, ...) PERSISTED становится сохраняемым генерируемым столбцом.
+    Таблицы и индексы создаются с IF NOT EXISTS, поэтому скрипт можно повторно
+    применить к существующей базе, чтобы добавить новые таблицы.
+    """
+    rules = [
+        (r"--[^\n]*", ""),
+        (r"(?im)^\s*use\s+\w+\s*$", ""),
+        (r"(?m)^\s*GO\s*$", ";"),
+        (r"\bINT\s+IDENTITY\s*\(\s*1\s*,\s*1\s*\)\s+PRIMARY\s+KEY", "INTEGER PRIMARY KEY AUTOINCREMENT"),
+        (r"\bFOREIGN\s+KEY\s+REFERENCES\b", "REFERENCES"),
+        (r"DEFAULT\s+GETDATE\(\)", "DEFAULT (datetime('now', 'localtime'))"),
+        (r"(?<![\w'])N'", "'"),
+        (r"\s+INCLUDE\s*\([^)]*\)", ""),
+        (r",\s*CONSTRAINT\s+\w+\s+CHECK\s*\([^,()]*DATEADD\([^)]*GETDATE\(\)\)\)", ""),
+        (
+            r"\b(\w+)\s+AS\s+DATEADD\(\s*hour\s*,\s*(\w+)\s*,\s*(\w+)\s*\)\s+PERSISTED",
+            r"\1 DATETIME GENERATED ALWAYS AS (datetime(\3, '+' || \2 || ' hours')) STORED",
+        ),
+        (r",\s*\)", "\n)"),
+        (r"\bCREATE\s+(TABLE|INDEX)\s+(?!IF\b)", r"CREATE \1 IF NOT EXISTS "),
+    ]
+    for pattern, replacement in rules:
+        script = re.sub(pattern, replacement, script)
+    return [statement.strip() for statement in script.split(";") if statement.strip()]
+
+
+class SQLiteBackend(Backend):
+    """
+    SQLite для локальных тестов и профилирования без SQL Server.
+    Схема создаётся из Scripts/JamStationTables.sql, хранимые процедуры
+    реализованы на Python (utils.sqlite_procedures).
+
+    :param path: Файл базы данных или ":memory:" — база в памяти, живущая вместе с backend.
+    """
+    dialect = SQLiteDialect()
+    _memory_ids = itertools.count(1)
+
+    def __init__(self, path: str = ":memory:", schema_path: str | Path | None = None, timeout: float = 30.0):
+        self.timeout = timeout
+        self.schema_path = Path(schema_path) if schema_path else SCRIPTS_DIR / "JamStationTables.sql"
+        self._lock = threading.Lock()
+        self._anchor = None
+        if path == ":memory:":
+            # Общая база в памяти: существует, пока открыто хотя бы одно соединение (self._anchor).
+            # Одновременно работает одно соединение пула — блокировки shared cache не ждут busy timeout
+            self.database = f"file:jamstation_{next(self._memory_ids)}?mode=memory&cache=shared"
+            self.max_pool_size = 1
+        else:
+            self.database = Path(path).resolve().as_uri()
+        self._anchor = self._open()
+        self._ensure_schema(self._anchor)
+
+    def _open(self):
+        connection = sqlite3.connect(
+            self.database,
+            uri=True,
+            timeout=self.timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.row_factory = _row_factory
+        return connection
+
+    def _ensure_schema(self, connection):
+        with self._lock:
+            is_new = not connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+            if is_new and "mode=memory" not in self.database:
+                connection.execute("PRAGMA journal_mode = WAL")
+            # Для существующей базы создаются только недостающие таблицы и индексы
+            for statement in translate_schema(self.schema_path.read_text(encoding="utf-8")):
+                connection.execute(statement)
+            connection.commit()
+            self._migrate(connection)
+
+    @staticmethod
+    def _migrate(connection):
+        # Базы, созданные до появления Schedules.end_time. SQLite добавляет через ALTER TABLE
+        # только виртуальные генерируемые столбцы; новые базы получают сохраняемый (STORED)
+        columns = {row[1] for row in connection.execute("PRAGMA table_xinfo(Schedules)")}
+        if columns and "end_time" not in columns:
+            connection.execute(
+                "ALTER TABLE Schedules ADD COLUMN end_time DATETIME "
+                "GENERATED ALWAYS AS (datetime(start_time, '+' || duration_hours || ' hours')) VIRTUAL"
+            )
+            connection.commit()
+        columns = {row[1] for row in connection.execute("PRAGMA table_xinfo(ChatMessages)")}
+        if columns and "file_hash" not in columns:
+            connection.execute("ALTER TABLE ChatMessages ADD COLUMN file_hash NVARCHAR(64)")
+            connection.commit()
+
+    def connect(self):
+        return self._open()
+
+    def schema_version(self, controller):
+        return controller.execute_query("SELECT schema_version FROM pragma_schema_version")[0][0]
+
+    def table_names(self, controller) -> list[str]:
+        query = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        return [row[0] for row in controller.execute_query(query)]
+
+    def table_columns(self, controller, table_name: str) -> list[ColumnInfo]:
+        # table_xinfo, в отличие от table_info, возвращает и генерируемые столбцы (hidden 2 и 3)
+        query = 'SELECT name, type, "notnull", pk, hidden FROM pragma_table_xinfo(?) WHERE hidden <> 1 ORDER BY cid'
+        columns = []
+        for name, declared_type, not_null, pk, hidden in controller.execute_query(query, (table_name,)):
+            data_type = declared_type.split("(")[0].strip().lower()
+            data_type = _SQLITE_TYPES.get(data_type, data_type)
+            columns.append(ColumnInfo(
+                name=name,
+                data_type=data_type,
+                is_nullable=not not_null and not pk,
+                is_identity=bool(pk) and declared_type.upper() == "INTEGER",
+                is_primary_key=bool(pk),
+                is_computed=hidden in (2, 3),
+            ))
+        return columns
+
+    def procedure_params(self, controller, proc_name: str) -> list[dict[str, str]]:
+        from utils.sqlite_procedures import PROCEDURES, SQL_TYPES
+
+        parameters = list(inspect.signature(PROCEDURES[proc_name]).parameters.values())[1:]
+        return [
+            {'parameter_name': f"@{parameter.name}", 'parameter_type': SQL_TYPES.get(parameter.annotation, "sql_variant")}
+            for parameter in parameters
+        ]
+
+    def call_procedure(self, connection, proc_name: str, params: list) -> tuple[list[str], list]:
+        from utils.sqlite_procedures import PROCEDURES
+
+        if proc_name not in PROCEDURES:
+            raise ValueError(f"Процедура {proc_name} не реализована для SQLite.")
+        return PROCEDURES[proc_name](connection, *params)
+
+    def close(self):
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+
+
+def create_backend(
+    kind: str = "mssql",
+    server: str | None = None,
+    database: str | None = None,
+    username: str | None = None,
+    password: str | None = None,
+    sqlite_path: str = ":memory:",
+) -> Backend:
+    """Создаёт backend по имени ("mssql" или "sqlite"), например из переменной окружения DB_BACKEND."""
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    if kind == "mssql":
+        return MSSQLBackend(server, database, username, password)
+    raise ValueError(f"Unknown database backend: {kind!r}")
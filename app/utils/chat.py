@@ -0,0 +1,265 @@
+import json
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+from fastapi import WebSocket
+
+from utils.async_controller import AsyncDBController
+from utils.chat_bus import ChatBus, LocalChatBus
+from utils.shemas import ChatMessage
+
+# Код закрытия websocket для клиента, не успевающего принимать сообщения (RFC 6455, "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ChatStore:
+    """
+    История чата: последние max_messages сообщений в кольцевом буфере в памяти,
+    все сообщения — в таблице ChatMessages. Порядковый номер сообщения (seq) — его id в таблице.
+
+    Буфер загружается из таблицы при первом обращении и пополняется сообщениями,
+    пришедшими через шину чата (в том числе от других процессов). Клиент, переподключившийся
+    с последним полученным seq, догружает пропущенное из буфера, а если разрыв длиннее
+    буфера — из таблицы (не больше max_resume сообщений).
+    """
+
+    def __init__(self, db_controller: AsyncDBController, max_messages: int = 200, max_resume: int = 1000):
+        """
+        :param max_messages: Размер кольцевого буфера и снимка истории для нового клиента.
+        :param max_resume: Сколько пропущенных сообщений можно догрузить при переподключении;
+                           при большем разрыве клиент получает снимок.
+        """
+        self.db_controller = db_controller
+        self.max_messages = max_messages
+        self.max_resume = max_resume
+        self._buffer: deque[ChatMessage] = deque(maxlen=max_messages)
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _message(row) -> ChatMessage:
+        return ChatMessage(seq=row[0], username=row[1], message=row[2], file=row[3], file_hash=row[4], created_at=row[5])
+
+    async def _select(self, condition: str, params: tuple, limit: int, descending: bool = False) -> list[ChatMessage]:
+        limit_clause, limit_params = self.db_controller.controller.dialect.limit_clause(limit)
+        query = f"""
+        SELECT id, username, message, file_name, file_hash, created_at
+        FROM ChatMessages
+        {condition}
+        ORDER BY id {"DESC" if descending else "ASC"}
+        {limit_clause}
+        """
+        rows = await self.db_controller.execute_query(query, (*params, *limit_params))
+        return [self._message(row) for row in rows]
+
+    async def load(self):
+        """Загружает последние сообщения из таблицы в буфер (один раз)."""
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            messages = await self._select("", (), self.max_messages, descending=True)
+            self._buffer.extend(reversed(messages))
+            self._loaded = True
+
+    async def after(self, seq: int, limit: int) -> list[ChatMessage]:
+        """Первые limit сообщений таблицы с номером больше seq."""
+        return await self._select("WHERE id > ?", (seq,), limit)
+
+    async def last_seq(self) -> int:
+        """Номер последнего сообщения в таблице (0, если сообщений нет)."""
+        rows = await self.db_controller.execute_query("SELECT MAX(id) FROM ChatMessages")
+        return rows[0][0] or 0
+
+    async def recent(self) -> list[ChatMessage]:
+        """Последние сообщения в порядке отправки."""
+        await self.load()
+        return list(self._buffer)
+
+    async def append(self, username: str, message: str | None = None, file: str | None = None, file_hash: str | None = None) -> ChatMessage:
+        """Сохраняет сообщение в таблицу и возвращает его с присвоенным seq; в буфер оно попадает через add()."""
+        await self.load()
+        created_at = datetime.now().replace(microsecond=0)
+        seq = await self.db_controller.insert(
+            "ChatMessages",
+            {"username": username, "message": message, "file_name": file, "file_hash": file_hash, "created_at": created_at},
+        )
+        return ChatMessage(seq=seq, username=username, message=message, file=file, file_hash=file_hash, created_at=created_at)
+
+    def add(self, message: ChatMessage) -> bool:
+        """
+        Добавляет сообщение в буфер с сохранением порядка seq.
+        Возвращает False, если сообщение уже есть в буфере или старше всего буфера.
+        """
+        if not self._loaded:
+            # Буфер ещё не загружен: сообщение попадёт в него вместе с историей из таблицы
+            return True
+        if not self._buffer or message.seq > self._buffer[-1].seq:
+            self._buffer.append(message)
+            return True
+        seqs = [item.seq for item in self._buffer]
+        index = bisect_left(seqs, message.seq)
+        if index < len(seqs) and seqs[index] == message.seq:
+            return False
+        if index == 0 and len(self._buffer) == self._buffer.maxlen:
+            return False
+        # Сообщение другого процесса, записанное раньше уже полученных (редко): вставка в середину
+        self._buffer.insert(index, message)
+        return True
+
+    async def since(self, seq: int) -> list[ChatMessage] | None:
+        """
+        Сообщения с номером больше seq в порядке отправки.
+        None — клиенту нужен снимок: пропущено больше max_resume сообщений
+        или seq больше последнего известного (например, история была очищена).
+        """
+        buffer = await self.recent()
+        if buffer and seq > buffer[-1].seq:
+            return None
+        if not buffer or seq >= buffer[0].seq - 1:
+            return [message for message in buffer if message.seq > seq]
+        messages = await self.after(seq, self.max_resume + 1)
+        return messages if len(messages) <= self.max_resume else None
+
+
+class _Subscriber:
+    __slots__ = ("websocket", "queue", "task", "overflowed")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=queue_size)
+        self.task: asyncio.Task | None = None
+        self.overflowed = False
+
+
+class ChatHub:
+    """
+    Рассылка новых сообщений чата подключённым websocket-клиентам.
+
+    Новое сообщение публикуется в шину чата (ChatBus); шина доставляет его в deliver()
+    каждого процесса приложения, и процесс рассылает его своим соединениям.
+    У каждого соединения своя очередь исходящих сообщений и своя задача отправки:
+    deliver не ждёт клиентов, и медленный клиент не задерживает остальных. Если в очереди
+    клиента накопилось queue_size неотправленных сообщений, соединение закрывается
+    с кодом 1013, а клиент переподключается и догружает пропущенное по seq.
+
+    Протокол (JSON, сервер -> клиент):
+    {"type": "snapshot", "messages": [...]} — последние сообщения целиком (заменяют список на клиенте);
+    {"type": "messages", "messages": [...]} — новые сообщения (дельта).
+    Клиент подключается к /ws?last_seq=N и пропускает сообщения с seq <= N.
+    """
+
+    def __init__(self, store: ChatStore, bus: ChatBus | None = None, queue_size: int = 100):
+        self.store = store
+        self.bus = bus or LocalChatBus()
+        self.queue_size = queue_size
+        self.logger = logging.getLogger(__name__)
+        self._subscribers: set[_Subscriber] = set()
+        self._started = False
+        self.delivered = 0
+        self.slow_disconnects = 0
+
+    @staticmethod
+    def _payload(kind: str, messages: list[ChatMessage]) -> str:
+        # Сериализуется один раз на сообщение, а не для каждого соединения
+        return json.dumps({"type": kind, "messages": [message.model_dump(mode="json") for message in messages]}, ensure_ascii=False)
+
+    async def start(self):
+        """Подключает процесс к шине; вызывается при запуске приложения (или при первом сообщении)."""
+        if not self._started:
+            self._started = True
+            await self.bus.start(self.deliver)
+
+    async def stop(self):
+        if self._started:
+            self._started = False
+            await self.bus.stop()
+
+    async def post(self, username: str, message: str | None = None, file: str | None = None, file_hash: str | None = None) -> ChatMessage:
+        """Сохраняет сообщение и публикует его в шину для всех процессов приложения."""
+        await self.start()
+        chat_message = await self.store.append(username, message, file, file_hash)
+        await self.bus.publish(chat_message)
+        return chat_message
+
+    def deliver(self, message: ChatMessage):
+        """Ставит сообщение из шины в очереди всех соединений процесса, не дожидаясь отправки."""
+        if not self.store.add(message):
+            return
+        payload = self._payload("messages", [message])
+        self.delivered += 1
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def _drop(self, subscriber: _Subscriber):
+        # Клиент не успевает принимать сообщения: отключаем его, остальные продолжают получать рассылку
+        self._subscribers.discard(subscriber)
+        subscriber.overflowed = True
+        self.slow_disconnects += 1
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+
+    @staticmethod
+    async def _send_loop(subscriber: _Subscriber):
+        while True:
+            payload = await subscriber.queue.get()
+            await subscriber.websocket.send_text(payload)
+
+    @staticmethod
+    async def _receive_loop(websocket: WebSocket):
+        # Сообщения от клиента не ожидаются; чтение нужно, чтобы заметить отключение
+        while True:
+            await websocket.receive_text()
+
+    async def serve(self, websocket: WebSocket, last_seq: int | None = None):
+        """
+        Обслуживает принятое websocket-соединение до его закрытия.
+
+        :param last_seq: Последний seq, полученный клиентом до переподключения; None — прислать снимок.
+        """
+        await self.start()
+        subscriber = _Subscriber(websocket, self.queue_size)
+        # Подписка до чтения истории: сообщение, опубликованное между ними, придёт
+        # и в истории, и дельтой (клиент отбросит повтор по seq), но не потеряется
+        self._subscribers.add(subscriber)
+        receiver = None
+        try:
+            messages = await self.store.since(last_seq) if last_seq is not None else None
+            if messages is None:
+                await websocket.send_text(self._payload("snapshot", await self.store.recent()))
+            elif messages:
+                await websocket.send_text(self._payload("messages", messages))
+
+            if not subscriber.overflowed:
+                subscriber.task = asyncio.create_task(self._send_loop(subscriber))
+                receiver = asyncio.create_task(self._receive_loop(websocket))
+                await asyncio.wait({subscriber.task, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        except Exception as e:
+            self.logger.info(f"Chat connection closed: {e}")
+        finally:
+            self._subscribers.discard(subscriber)
+            tasks = [task for task in (subscriber.task, receiver) if task is not None]
+            for task in tasks:
+                task.cancel()
+            # Забираем результаты задач, чтобы их исключения (отключение клиента) не попадали в лог asyncio
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if subscriber.overflowed:
+            try:
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception:
+                pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "connections": len(self._subscribers),
+            "delivered": self.delivered,
+            "slow_disconnects": self.slow_disconnects,
+        }
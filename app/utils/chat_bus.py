@@ -0,0 +1,131 @@
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable
+
+from utils.shemas import ChatMessage
+
+
+class ChatBus(ABC):
+    """
+    Шина рассылки сообщений чата между процессами (воркерами uvicorn) приложения.
+    Сообщение, опубликованное в любом процессе, передаётся в deliver каждого процесса,
+    подключённого к шине, включая отправителя.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: Callable[[ChatMessage], None]):
+        """Подключает процесс к шине: deliver будет вызываться в event loop для каждого сообщения."""
+
+    @abstractmethod
+    async def publish(self, message: ChatMessage):
+        """Публикует сохранённое сообщение для всех процессов."""
+
+    async def stop(self):
+        pass
+
+
+class LocalChatBus(ChatBus):
+    """Шина в пределах одного процесса: сообщение сразу передаётся в deliver."""
+
+    def __init__(self):
+        self._deliver: Callable[[ChatMessage], None] | None = None
+
+    async def start(self, deliver: Callable[[ChatMessage], None]):
+        self._deliver = deliver
+
+    async def publish(self, message: ChatMessage):
+        if self._deliver is not None:
+            self._deliver(message)
+
+
+class TableChatBus(ChatBus):
+    """
+    Шина поверх таблицы ChatMessages для нескольких процессов с общей базой данных
+    (SQL Server или файл SQLite; база SQLite в памяти у каждого процесса своя).
+
+    Свои сообщения процесс доставляет сразу, чужие — опросом таблицы раз в poll_interval
+    секунд (запрос id > последнего прочитанного по первичному ключу). Номер IDENTITY
+    выдаётся до фиксации вставки, поэтому сообщение с меньшим id может стать видимым
+    позже следующих: пропуски в id перечитываются ещё gap_timeout секунд, а повторы
+    отбрасываются по seq.
+    """
+
+    def __init__(self, store, poll_interval: float = 0.5, gap_timeout: float = 5.0, batch_size: int = 500):
+        """
+        :param store: ChatStore, через который читается таблица.
+        :param poll_interval: Период опроса таблицы в секундах (задержка доставки между процессами).
+        :param gap_timeout: Сколько секунд ждать сообщение с пропущенным id (незафиксированная или откаченная вставка).
+        :param batch_size: Сколько сообщений читать за один запрос.
+        """
+        self.store = store
+        self.poll_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+        self._deliver: Callable[[ChatMessage], None] | None = None
+        self._task: asyncio.Task | None = None
+        self._cursor = 0
+        # Пропущенный id -> время, когда пропуск обнаружен
+        self._gaps: dict[int, float] = {}
+        # Уже доставленные seq (ограниченное окно для отбрасывания повторов)
+        self._delivered: OrderedDict[int, None] = OrderedDict()
+
+    async def start(self, deliver: Callable[[ChatMessage], None]):
+        self._deliver = deliver
+        # Процесс получает только сообщения, отправленные после его запуска; историю он читает из таблицы сам
+        self._cursor = await self.store.last_seq()
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def publish(self, message: ChatMessage):
+        # Сообщение уже записано в таблицу (ChatStore.append): остальные процессы прочитают его при опросе
+        self._dispatch(message)
+
+    def _dispatch(self, message: ChatMessage):
+        if message.seq in self._delivered or self._deliver is None:
+            return
+        self._delivered[message.seq] = None
+        while len(self._delivered) > 10 * self.batch_size:
+            self._delivered.popitem(last=False)
+        self._deliver(message)
+
+    async def _poll_loop(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                self.logger.error(f"Chat bus poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll(self):
+        """Читает и доставляет новые сообщения таблицы."""
+        now = time.monotonic()
+        for seq in [seq for seq, found_at in self._gaps.items() if now - found_at > self.gap_timeout]:
+            del self._gaps[seq]
+        # Пока есть пропуски, чтение начинается с самого раннего из них
+        low = min(self._gaps) - 1 if self._gaps else self._cursor
+        messages = await self.store.after(low, self.batch_size)
+        for message in messages:
+            self._gaps.pop(message.seq, None)
+            if message.seq > self._cursor:
+                for missing in range(self._cursor + 1, message.seq):
+                    self._gaps.setdefault(missing, now)
+                self._cursor = message.seq
+            self._dispatch(message)
+
+
+def create_chat_bus(kind: str, store, poll_interval: float = 0.5) -> ChatBus:
+    """Создаёт шину по имени ("local" или "table"), например из переменной окружения CHAT_BUS."""
+    if kind == "local":
+        return LocalChatBus()
+    if kind == "table":
+        return TableChatBus(store, poll_interval)
+    raise ValueError(f"Unknown chat bus: {kind!r}")
@@ -1,154 +1,375 @@
-import pyodbc
 import logging
-from typing import List, Any
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import List, Any, Callable
 
 from utils.shemas import *
+from utils.pool import ConnectionPool
+from utils.backends import Backend, MSSQLBackend
+from utils.filters import build_conditions
+from utils.schema_cache import SchemaCache
+from utils.statements import StatementRegistry
+from utils.query_stats import QueryStats
+from utils.reference_cache import ReferenceCache, written_table
 
 # Настройка логгера
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+def day_range(day: date, days: int = 1) -> tuple[datetime, datetime]:
+    """
+    Полуинтервал [day 00:00, day + days) для фильтрации по start_time.
+    В отличие от CAST/CONVERT над столбцом, условие
+    start_time >= ? AND start_time < ? позволяет искать по индексу.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=days)
+
+# Таблицы, для которых ведутся проверки и ремонты (Checks.item_table)
+ITEM_TABLES = ("Equipment", "Instruments")
+
+def _check_item_table(table: str):
+    # Имя таблицы подставляется в текст запроса, поэтому допускаются только известные таблицы
+    if table not in ITEM_TABLES:
+        raise ValueError(f"Unknown item table: {table!r}")
+
 class DBController:
-    def __init__(self, server: str, database: str, username: str, password: str):
-        self.connection_string = f"DRIVER={{ODBC Driver 17 for SQL Server}};SERVER={server};DATABASE={database};UID={username};PWD={password};CHARSET=UTF8"
-        self.connection = pyodbc.connect(self.connection_string, autocommit=False)
+    def __init__(
+        self,
+        server: str | None = None,
+        database: str | None = None,
+        username: str | None = None,
+        password: str | None = None,
+        min_pool_size: int = 1,
+        max_pool_size: int = 10,
+        pool_timeout: float = 30.0,
+        max_connection_uses: int = 1000,
+        max_connection_idle: float = 300.0,
+        backend: Backend | None = None,
+        slow_query_threshold: float | None = 0.5,
+        slow_query_log: str | None = None,
+    ):
+        """
+        :param backend: Хранилище (utils.backends); по умолчанию SQL Server с указанными
+                        server, database, username и password.
+        :param slow_query_threshold: Запросы дольше стольких секунд пишутся в журнал медленных запросов; None — не писать.
+        :param slow_query_log: Файл журнала медленных запросов (по умолчанию только логгер utils.query_stats.slow).
+        """
+        self.backend = backend or MSSQLBackend(server, database, username, password)
+        self.dialect = self.backend.dialect
         self.logger = logging.getLogger(__name__)
-        self.cursor = self.connection.cursor()
-        self.transaction_active = False
+        if self.backend.max_pool_size is not None:
+            max_pool_size = min(max_pool_size, self.backend.max_pool_size)
+        # Шаблоны запросов и курсоры, переиспользуемые для одинаковых запросов
+        self.statements = StatementRegistry()
+        # Длительность, строки и объём данных по каждому запросу (см. query_stats())
+        self.query_stats = QueryStats(slow_query_threshold, slow_query_log)
+        self.pool = ConnectionPool(
+            self.backend.connect,
+            min_size=min(min_pool_size, max_pool_size),
+            max_size=max_pool_size,
+            timeout=pool_timeout,
+            max_uses=max_connection_uses,
+            max_idle=max_connection_idle,
+            on_close=self.statements.forget,
+        )
+        # Соединение, закреплённое за потоком на время транзакции или вложенного вызова
+        self._local = threading.local()
+        # Кэш метаданных схемы (столбцы, таблицы, параметры процедур)
+        self.schema = SchemaCache(self)
+        # Кэш справочников (залы, локации, инструменты, расходники, сотрудники)
+        self.references = ReferenceCache(self)
+        # Подписчики на изменения таблиц (например, кэш ответов API)
+        self._change_listeners: list[Callable[[str], None]] = []
+
+    @contextmanager
+    def _connection(self):
+        """
+        Выдаёт соединение из пула. Вложенные вызовы в том же потоке
+        (например, внутри transaction()) получают то же самое соединение.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            yield connection
+            return
+
+        connection = self.pool.acquire()
+        self._local.connection = connection
+        broken = False
+        try:
+            yield connection
+        except self.backend.operational_errors:
+            # Сетевая ошибка: такое соединение в пул не возвращаем
+            broken = True
+            raise
+        finally:
+            self._local.connection = None
+            self.pool.release(connection, discard=broken)
+
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """
+        Подписывает listener(table) на изменения таблиц через DBController
+        (execute_query с INSERT/UPDATE/DELETE, insert, bulk_insert).
+        """
+        self._change_listeners.append(listener)
+
+    def _table_changed(self, table: str):
+        # Внутри transaction() изменения ещё не видны другим соединениям: кэши сбрасываются
+        # после коммита, иначе другой поток успеет перечитать и закэшировать старые строки
+        if self._in_transaction():
+            self._local.changed_tables.add(table)
+            return
+        self._notify_changed(table)
+
+    def _notify_changed(self, table: str):
+        self.references.invalidate(table)
+        for listener in self._change_listeners:
+            try:
+                listener(table)
+            except Exception as e:
+                self.logger.error(f"Table change listener failed for {table}: {e}")
+
+    def _in_transaction(self) -> bool:
+        return getattr(self._local, "in_transaction", False)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Выполняет все запросы блока на одном соединении в рамках одной транзакции.
+        Коммит выполняется при успешном выходе, откат — при исключении.
+        """
+        if self._in_transaction():
+            yield
+            return
+
+        with self._connection() as connection:
+            self._local.in_transaction = True
+            self._local.changed_tables = set()
+            try:
+                yield
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                self._local.in_transaction = False
+                changed_tables, self._local.changed_tables = self._local.changed_tables, set()
+            # Сюда доходим только после коммита; при откате изменённые таблицы отбрасываются
+            for table in changed_tables:
+                self._notify_changed(table)
+
+    def pool_stats(self) -> PoolStats:
+        """Метрики пула соединений: размер, ожидание и задержка выдачи."""
+        return self.pool.stats()
+
+    def query_metrics(self) -> list[QueryStat]:
+        """Статистика запросов по отпечатку, методу контроллера и источнику вызова."""
+        return self.query_stats.series()
+
+    def statement_stats(self, server: bool = False) -> StatementStats:
+        """
+        Метрики повторного использования запросов: шаблоны, курсоры и самые частые запросы.
+
+        :param server: Добавить статистику кэша планов сервера (для SQL Server нужно право VIEW SERVER STATE).
+        """
+        stats = self.statements.stats()
+        if server:
+            stats.server_plan_cache = self.backend.plan_cache_stats(self)
+        return stats
 
     def execute_query(self, query: str, params: tuple = (), transactional: bool = False):
         """
-        Выполняет запрос к базе данных.
+        Выполняет запрос к базе данных на соединении из пула.
+        Запросы без результата фиксируются сразу, если не выполняются внутри transaction().
+        Одинаковые запросы выполняются на одном курсоре соединения (см. utils.statements),
+        поэтому повторно не подготавливаются.
 
         :param query: SQL-запрос.
         :param params: Параметры для запроса.
-        :param transactional: Флаг выполнения в рамках транзакции.
+        :param transactional: Оставлен для совместимости: изменения и так фиксируются по завершении запроса.
         :return: Результаты запроса, если они есть (иначе None).
         """
-        try:
-            if transactional and not self.transaction_active:
-                self.transaction_active = True
-
-            # Выполнение запроса
-            result = self.connection.execute(query, params)
-
-            # Если запрос возвращает данные, пытаемся их получить
-            if query.strip().upper().startswith("SELECT"):
-                return result.fetchall()
-
-            # Для запросов без результата коммитим транзакцию, если необходимо
-            if transactional and self.transaction_active:
-                self.connection.commit()
-                self.transaction_active = False
-
-            return 0  # Для запросов без возвращаемого результата
-
-        except Exception as e:
-            self.logger.error(f"Error executing query: {e}")
-
-            # Откат транзакции в случае ошибки
-            if transactional and self.transaction_active:
-                self.connection.rollback()
-                self.transaction_active = False
-            raise
+        query = self.dialect.translate(query)
+        with self._connection() as connection:
+            try:
+                with self.query_stats.track(query) as record:
+                    # Выполнение запроса
+                    result = self.statements.cursor(connection, query).execute(query, params)
+
+                    # Если запрос возвращает данные, пытаемся их получить
+                    if query.strip().upper().startswith("SELECT"):
+                        rows = result.fetchall()
+                        record.fetched(rows)
+                        return rows
+
+                    # Для запросов без результата коммитим, если нет внешней транзакции
+                    record.rows = max(result.rowcount, 0)
+                    if not self._in_transaction():
+                        connection.commit()
+
+                # Изменённый справочник перечитается при следующем обращении
+                table = written_table(query)
+                if table:
+                    self._table_changed(table)
+
+                return 0  # Для запросов без возвращаемого результата
+
+            except Exception as e:
+                self.logger.error(f"Error executing query: {e}")
+                self.statements.discard(connection, query)
+
+                # Откат в случае ошибки (внешнюю транзакцию откатит transaction())
+                if not self._in_transaction():
+                    connection.rollback()
+                raise
+
+    def _filter_conditions(self, table_name: str, filters: dict | None) -> tuple[list[str], list]:
+        # Параметризованные условия фильтрации с учётом типов столбцов таблицы
+        if not filters:
+            return [], []
+        return build_conditions(filters, self.get_column_types(table_name))
 
     def paginate_table(self, table_name: str, offset: int, limit: int, order_column: str | None = None, filters: dict = None, join_clause: str = ""):
+        """
+        Постраничная выборка через OFFSET/FETCH. Стоимость растёт с глубиной страницы,
+        для последовательного листания используйте paginate_table_keyset.
+
+        :param filters: Словарь {столбец: значение}. Строки из полей ввода разбираются с учётом
+                        типа столбца (см. utils.filters.parse_filter), остальные значения
+                        сравниваются на равенство. Все значения передаются параметрами.
+        """
         # Добавляем ORDER BY для корректного запроса в SQL Server
         if order_column is None:
             order_column = 'NULL'
         
         # Формируем условия фильтрации
-        filter_conditions = ""
-        if filters:
-            filter_conditions = " AND ".join([f"{col} LIKE '%{val}%'" for col, val in filters.items()])
-            filter_conditions = f"WHERE {filter_conditions}"
+        conditions, params = self._filter_conditions(table_name, filters)
+        filter_conditions = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause, limit_params = self.dialect.limit_clause(limit, offset)
         
-        query = f"""
+        query = self.statements.template(
+            ("paginate_table", table_name, join_clause, order_column, filter_conditions),
+            lambda: f"""
         SELECT * 
         FROM {table_name}
         {join_clause}
         {filter_conditions}
         ORDER BY (SELECT {order_column}) DESC
-        OFFSET {offset} ROWS
-        FETCH NEXT {limit} ROWS ONLY;
-        """
+        {limit_clause};
+        """,
+        )
         
-        rows = self.execute_query(query)
+        rows = self.execute_query(query, tuple(params + limit_params))
         columns = self.get_table_columns(table_name)
         
         # Преобразование кортежей в словари
         result = [dict(zip(columns, row)) for row in rows]
         
         return result
+
+    def paginate_table_keyset(self, table_name: str, limit: int, order_column: str | None = None, after: tuple | None = None, filters: dict = None, join_clause: str = ""):
+        """
+        Постраничная выборка по ключу (seek-пагинация) в порядке убывания (order_column, id).
+        Следующая страница начинается сразу после курсора последней строки предыдущей,
+        поэтому её стоимость не зависит от глубины страницы.
+
+        :param table_name: Название таблицы.
+        :param limit: Размер страницы.
+        :param order_column: Столбец сортировки (по умолчанию id).
+        :param after: Курсор из keyset_cursor() для последней строки предыдущей страницы; None — первая страница.
+        :param filters: Фильтры, как в paginate_table (см. utils.filters.build_conditions).
+        :param join_clause: Дополнительный JOIN.
+        :return: Список словарей со строками страницы.
+        """
+        id_column = f"{table_name}.id"
+        conditions, params = self._filter_conditions(table_name, filters)
+
+        if order_column is None or order_column.split(".")[-1] == "id":
+            order_clause = f"{id_column} DESC"
+            if after is not None:
+                conditions.append(f"{id_column} < ?")
+                params.append(after[-1])
+        else:
+            order_clause = f"{order_column} DESC, {id_column} DESC"
+            if after is not None:
+                conditions.append(f"({order_column} < ? OR ({order_column} = ? AND {id_column} < ?))")
+                params.extend([after[0], after[0], after[1]])
+
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        limit_clause, limit_params = self.dialect.limit_clause(limit)
+        query = self.statements.template(
+            ("paginate_table_keyset", table_name, join_clause, order_clause, where_clause),
+            lambda: f"""
+        SELECT {table_name}.*
+        FROM {table_name}
+        {join_clause}
+        {where_clause}
+        ORDER BY {order_clause}
+        {limit_clause};
+        """,
+        )
+
+        rows = self.execute_query(query, (*params, *limit_params))
+        columns = self.get_table_columns(table_name)
+        return [dict(zip(columns, row)) for row in rows]
+
+    @staticmethod
+    def keyset_cursor(row: dict, order_column: str | None = None) -> tuple:
+        """Курсор (значение столбца сортировки, id) строки для paginate_table_keyset."""
+        key = "id" if order_column is None else order_column.split(".")[-1]
+        return (row[key], row["id"])
     
     def get_table_columns(self, table_name: str):
-        query = f"""
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.COLUMNS
-        WHERE TABLE_NAME = ?
-        """
-        return [row[0] for row in self.execute_query(query, (table_name,))]
+        return [column.name for column in self.schema.table(table_name).columns]
+
+    def get_computed_columns(self, table_name: str) -> set[str]:
+        """Вычисляемые столбцы таблицы (например, Schedules.end_time): их нельзя задать в INSERT и UPDATE."""
+        return {column.name for column in self.schema.table(table_name).columns if column.is_computed}
 
-    def commit_transaction(self):
-        if self.transaction_active:
-            self.connection.commit_transaction()
-            self.transaction_active = False
+    def get_column_types(self, table_name: str) -> dict[str, str]:
+        """Типы столбцов таблицы ({имя столбца: DATA_TYPE})."""
+        return {column.name: column.data_type for column in self.schema.table(table_name).columns}
 
-    def rollback_transaction(self):
-        if self.transaction_active:
-            self.connection.rollback_transaction()
-            self.transaction_active = False
+    def get_tables(self) -> list[str]:
+        """Список пользовательских таблиц базы данных."""
+        return self.schema.tables()
+
+    def invalidate_schema(self, table_name: str | None = None):
+        """Сбрасывает кэш метаданных (например, после выполнения миграции)."""
+        self.schema.invalidate(table_name)
 
     def _execute_sql(self, sql: str, params: List[Any] = None, in_transaction: bool = False):
         """Выполнение SQL-запроса (не хранимой процедуры)."""
-        try:
-            if in_transaction:
-                self.connection.autocommit = False
-            self.cursor.execute(sql, params or [])
-            if in_transaction:
-                self.connection.commit()
-        except Exception as e:
-            if in_transaction:
-                self.connection.rollback()
-            self.logger.error(f"Error executing SQL: {e}")
-            raise
+        with self._connection() as connection:
+            try:
+                sql = self.dialect.translate(sql)
+                with self.query_stats.track(sql):
+                    cursor = connection.cursor()
+                    cursor.execute(sql, params or [])
+                if not self._in_transaction():
+                    connection.commit()
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                self.logger.error(f"Error executing SQL: {e}")
+                raise
 
     def get_procedure_params(self, proc_name: str) -> list[dict[str, str]]: 
-        """Получаем параметры хранимой процедуры и их типы из базы данных.""" 
+        """Получаем параметры хранимой процедуры и их типы (из кэша схемы).""" 
         try: 
-            # Получаем параметры хранимой процедуры и их типы из базы данных 
-            cursor = self.connection.cursor() 
-            cursor.execute(f""" 
-                SELECT p.name AS parameter_name, 
-                       t.name AS parameter_type 
-                FROM sys.parameters p 
-                JOIN sys.types t ON p.user_type_id = t.user_type_id 
-                WHERE p.object_id = OBJECT_ID('{proc_name}'); 
-            """) 
-
-            # Читаем параметры и их типы 
-            params_with_types = cursor.fetchall() 
-            return [{'parameter_name': param_name, 'parameter_type': param_type} 
-                    for param_name, param_type in params_with_types] 
+            return self.schema.procedure_params(proc_name)
         except Exception as e: 
             self.logger.error(f"Error retrieving procedure parameters: {e}") 
             raise 
 
     def check_password(self, login: str, password: str) -> bool:
         try:
+            with self._connection() as connection:
+                # Выполняем процедуру с параметрами; результат — таблица из одной строки
+                with self.query_stats.track("EXEC CheckEmployeePassword"):
+                    _, result = self.backend.call_procedure(connection, "CheckEmployeePassword", [login, password])
 
-            # Генерация строки EXEC с плейсхолдерами для параметров
-            exec_query = f"EXEC CheckEmployeePassword N'{login}', N'{password}';"
-
-            # Выполняем запрос
-            self.cursor.execute(exec_query)
-
-            # Извлекаем результат — это будет таблица, поэтому fetchall() всегда вернет данные
-            result = self.cursor.fetchall()
-
-            # Если нужно, можно извлечь описание колонок
-            columns = [desc[0] for desc in self.cursor.description]  # Имена колонок результата
-
-            # Возвращаем результат и описание колонок
+            # Возвращаем результат
             return result[0][0]
 
         except Exception as e:
@@ -165,103 +386,132 @@ class DBController:
         :param in_transaction: Указывает, требуется ли транзакция.
         :return: Словарь с результатами выполнения процедуры (таблицей).
         """
-        try:
-            if in_transaction:
-                self.connection.autocommit = False  # Отключаем автокоммит
-
-            # Получаем параметры и их типы для процедуры
-            params_with_types = self.get_procedure_params(proc_name)
-
-            # Генерация SQL-запроса для передачи параметров
-            exec_placeholders = []
-
-            # Формируем запрос EXEC
-            for param in params_with_types:
-                param_name = param['parameter_name']
-                exec_placeholders.append(f"@{param_name}")
-
-            # Генерация строки EXEC с плейсхолдерами для параметров
-            exec_query = f"EXEC {proc_name} {', '.join(exec_placeholders)};"
-
-            # Выполняем запрос
-            self.execute_query(
-                f'''
-                EXEC {proc_name} 
-                
-                ''')
-
-            # Извлекаем результат — это будет таблица, поэтому fetchall() всегда вернет данные
-            result = self.cursor.fetchall()
-
-            # Если нужно, можно извлечь описание колонок
-            columns = [desc[0] for desc in self.cursor.description]  # Имена колонок результата
-
-            if in_transaction:
-                self.connection.commit()
-
-            # Возвращаем результат и описание колонок
-            return {"result": result, "columns": columns}
+        with self._connection() as connection:
+            try:
+                # Выполняем процедуру; результат — таблица и имена её колонок
+                with self.query_stats.track(f"EXEC {proc_name}") as record:
+                    columns, result = self.backend.call_procedure(connection, proc_name, params or [])
+                    record.fetched(result)
+
+                if not self._in_transaction():
+                    connection.commit()
+
+                # Возвращаем результат и описание колонок
+                return {"result": result, "columns": columns}
+
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                self.logger.error(f"Error executing procedure: {e}")
+                raise
+
+    def _call_booking(self, proc_name: str, params: list) -> tuple:
+        # Процедуры бронирования сами открывают транзакцию и держат блокировки до её конца
+        with self._connection() as connection:
+            try:
+                with self.query_stats.track(f"EXEC {proc_name}") as record:
+                    _, rows = self.backend.call_procedure(connection, proc_name, params)
+                    record.fetched(rows)
+                    if not self._in_transaction():
+                        connection.commit()
+                return rows[0]
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                self.logger.error(f"Error executing booking procedure: {e}")
+                raise
+
+    def register_client(self, name: str, phone_number: str, email: str | None = None) -> BookingResult:
+        """
+        Находит клиента по телефону или добавляет нового (процедура RegisterClient) за один запрос.
 
-        except Exception as e:
-            if in_transaction:
-                self.connection.rollback()
-            self.logger.error(f"Error executing procedure: {e}")
-            raise
+        :return: BookingResult со статусом "penalties", если у клиента есть несписанные штрафы.
+        """
+        client_id, has_penalties = self._call_booking("RegisterClient", [name, phone_number, email])
+        return BookingResult(status="penalties" if has_penalties else "ok", client_id=client_id)
+
+    def book_room(
+        self,
+        room_id: int,
+        start_time: datetime,
+        duration_hours: int,
+        client_id: int | None = None,
+        name: str | None = None,
+        phone_number: str | None = None,
+        email: str | None = None,
+        is_paid: bool = False,
+    ) -> BookingResult:
+        """
+        Атомарно бронирует зал процедурой BookRoom: регистрирует клиента (если не передан client_id),
+        проверяет штрафы и пересечение с другими бронированиями и добавляет запись в Schedules.
+
+        :param room_id: ID зала.
+        :param start_time: Время начала.
+        :param duration_hours: Продолжительность в часах.
+        :param client_id: ID известного клиента; иначе клиент ищется или добавляется по телефону.
+        :param is_paid: Бронирование уже оплачено.
+        :return: BookingResult со статусом "ok", "penalties" или "overlap".
+        """
+        params = [room_id, start_time, duration_hours, is_paid, client_id, name, phone_number, email]
+        status, client_id, schedule_id = self._call_booking("BookRoom", params)
+        return BookingResult(
+            status={0: "ok", 1: "penalties", 2: "overlap"}[status],
+            client_id=client_id,
+            schedule_id=schedule_id,
+        )
 
     def execute_function(self, func_name: str, params: List[Any] = None, in_transaction: bool = False) -> Any:
         """Выполнение функции и возврат результата."""
-        try:
-            if in_transaction:
-                self.connection.autocommit = False
-            placeholders = ', '.join(['?'] * len(params)) if params else ''
-            query = f"SELECT {func_name}({placeholders})"
-            self.cursor.execute(query, params or [])
-            result = self.cursor.fetchone()
-            if in_transaction:
-                self.connection.commit()
-            return result[0] if result else None
-        except Exception as e:
-            if in_transaction:
-                self.connection.rollback()
-            self.logger.error(f"Error executing function: {e}")
-            raise
-
-    def _start_transaction(self, isolation_level: str):
-        """Открытие транзакции с указанным уровнем изоляции."""
-        try:
-            self.connection.autocommit = False
-            self.connection.setisolatedlevel(isolation_level)
-            self.logger.info(f"Transaction started with isolation level: {isolation_level}")
-        except Exception as e:
-            self.logger.error(f"Error starting transaction: {e}")
-            raise
+        with self._connection() as connection:
+            try:
+                placeholders = ', '.join(['?'] * len(params)) if params else ''
+                query = self.dialect.translate(f"SELECT {func_name}({placeholders})")
+                with self.query_stats.track(query):
+                    cursor = connection.cursor()
+                    cursor.execute(query, params or [])
+                    result = cursor.fetchone()
+                if not self._in_transaction():
+                    connection.commit()
+                return result[0] if result else None
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                self.logger.error(f"Error executing function: {e}")
+                raise
 
     def close_connection(self):
-        """Закрытие соединения с базой данных."""
+        """Закрытие всех соединений пула."""
         try:
-            self.cursor.close()
-            self.connection.close()
-            self.logger.info("Database connection closed.")
+            self.pool.close()
+            self.backend.close()
+            self.logger.info("Database connection pool closed.")
         except Exception as e:
-            self.logger.error(f"Error closing connection: {e}")
+            self.logger.error(f"Error closing connection pool: {e}")
             raise
 
     def select(self, columns: list[str] | None, table: str, id: int | None = None, filters: dict | None = None) -> list:
-        if not columns:
-            query = f"SELECT * FROM {table}"
-        else:
-            selected_columns = ", ".join(columns)
-            query = f"SELECT {selected_columns} FROM {table}"
-        
-        if filters:
-            filter_conditions = " AND ".join([f"{col} = ?" for col in filters.keys()])
-            query += f" WHERE {filter_conditions}"
-            
-        if id:
-            if filters:
-                query += f" AND id = ?"
+        def build() -> str:
+            if not columns:
+                query = f"SELECT * FROM {table}"
             else:
-                query += f" WHERE id = ?"
+                selected_columns = ", ".join(columns)
+                query = f"SELECT {selected_columns} FROM {table}"
+
+            if filters:
+                filter_conditions = " AND ".join([f"{col} = ?" for col in filters.keys()])
+                query += f" WHERE {filter_conditions}"
+
+            if id:
+                if filters:
+                    query += f" AND id = ?"
+                else:
+                    query += f" WHERE id = ?"
+            return query
+
+        # Один шаблон на набор столбцов и фильтров; значения передаются параметрами
+        query = self.statements.template(
+            ("select", table, tuple(columns or ()), tuple(filters or ()), bool(id)), build
+        )
 
         # Преобразуем словарь значений в кортеж
         params = tuple(filters.values()) if filters else ()
@@ -276,8 +526,8 @@ class DBController:
         return rows
     
     def delete_by_id(self, table: str, id: int) -> int:
-        query = f'DELETE FROM {table} WHERE id = {id}'
-        result = self.execute_query(query)
+        query = self.statements.template(("delete_by_id", table), lambda: f"DELETE FROM {table} WHERE id = ?")
+        result = self.execute_query(query, (id,))
         if result == 0: return 0
         else: return 1
 
@@ -289,27 +539,92 @@ class DBController:
         :param data: словарь данных для вставки, где ключи - это имена столбцов, а значения - данные для вставки.
         :return: ID вставленной записи.
         """
-        columns = ', '.join(data.keys())
-        values = ', '.join(['?' for _ in data])
-        output_clause = "OUTPUT INSERTED.id"  # Предполагается, что идентификатор называется "id"
-        query = f"INSERT INTO {table} ({columns}) {output_clause} VALUES ({values})"
-
-        cursor = self.connection.cursor()
-        
-        try:
-            cursor.execute(query, tuple(data.values()))
-            result = cursor.fetchone()
-            self.connection.commit()
-            if result:
-                return result[0]
-            else:
-                raise ValueError("Не удалось получить ID вставленной записи.")
-        except Exception as e:
-            self.connection.rollback()
-            print(f"Ошибка при выполнении вставки: {e}")
-            raise
-        finally:
-            cursor.close()
+        # Предполагается, что идентификатор называется "id"
+        query = self.dialect.insert_returning_ids(table, list(data.keys()))
+
+        with self._connection() as connection:
+            cursor = connection.cursor()
+            try:
+                with self.query_stats.track(query) as record:
+                    cursor.execute(query, tuple(data.values()))
+                    result = cursor.fetchone()
+                    record.rows = 1
+                if not self._in_transaction():
+                    connection.commit()
+                self._table_changed(table)
+                if result:
+                    return result[0]
+                else:
+                    raise ValueError("Не удалось получить ID вставленной записи.")
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                print(f"Ошибка при выполнении вставки: {e}")
+                raise
+            finally:
+                cursor.close()
+
+    def bulk_insert(self, table: str, rows: list[dict] | list[BaseModel], batch_size: int = 1000, return_ids: bool = False) -> int | list[int]:
+        """
+        Вставляет набор строк пакетами: каждый пакет — один запрос и одна транзакция
+        (внутри transaction() фиксация выполняется внешней транзакцией).
+
+        Без return_ids строки передаются через executemany (для SQL Server — с fast_executemany,
+        массив параметров за один обмен с сервером). С return_ids пакет вставляется одним
+        запросом с возвратом ID (dialect.insert_returning_ids, для SQL Server — MERGE ... OUTPUT
+        с номером строки); размер такого пакета ограничен 2100 параметрами запроса.
+
+        :param table: Имя таблицы.
+        :param rows: Словари или модели с одинаковым набором столбцов (id не вставляется).
+        :param batch_size: Количество строк в пакете.
+        :param return_ids: Вернуть ID вставленных записей в порядке строк rows.
+        :return: Количество вставленных строк или список ID.
+        """
+        rows = [row.dict(exclude_unset=True) if isinstance(row, BaseModel) else dict(row) for row in rows]
+        if not rows:
+            return [] if return_ids else 0
+        for row in rows:
+            row.pop("id", None)
+
+        columns = list(rows[0].keys())
+        if any(list(row.keys()) != columns for row in rows):
+            raise ValueError("Все строки для вставки должны содержать одинаковый набор столбцов.")
+        column_list = ", ".join(columns)
+        if return_ids:
+            # Ограничение SQL Server: не более 2100 параметров и 1000 строк в VALUES
+            batch_size = max(1, min(batch_size, 1000, 2099 // len(columns)))
+
+        inserted, ids = 0, []
+        with self._connection() as connection:
+            cursor = self.backend.prepare_bulk_cursor(connection.cursor())
+            try:
+                for start in range(0, len(rows), batch_size):
+                    batch = [tuple(row[column] for column in columns) for row in rows[start:start + batch_size]]
+                    if return_ids:
+                        query = self.dialect.insert_returning_ids(table, columns, len(batch))
+                    else:
+                        query = f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in columns)})"
+                    with self.query_stats.track(query) as record:
+                        if return_ids:
+                            cursor.execute(query, [value for row in batch for value in row])
+                            ids.extend(self.dialect.ids_in_row_order(cursor.fetchall()))
+                        else:
+                            cursor.executemany(query, batch)
+                        record.rows = len(batch)
+                    if not self._in_transaction():
+                        connection.commit()
+                    inserted += len(batch)
+            except Exception as e:
+                if not self._in_transaction():
+                    connection.rollback()
+                self.logger.error(f"Bulk insert into {table} failed after {inserted} rows: {e}")
+                raise
+            finally:
+                cursor.close()
+                self._table_changed(table)
+
+        self.logger.info(f"Bulk inserted {inserted} rows into {table}")
+        return ids if return_ids else inserted
 
     def add_record(self, table_name: str, record: BaseModel):
         """
@@ -337,7 +652,6 @@ class DBController:
         try:
             # Выполняем запрос с параметрами
             self.execute_query(query, params=values)
-            self.connection.commit()
             self.logger.info(f"Record added to {table_name}: {record}")
         except Exception as e:
             self.logger.error(f"Failed to add record to {table_name}: {e}")
@@ -370,7 +684,6 @@ class DBController:
         try:
             # Выполняем запрос с параметрами
             self.execute_query(query, params=values)
-            self.connection.commit()
             self.logger.info(f"Record updated in {table_name}. SET: {record}, WHERE: {filters}")
         except Exception as e:
             self.logger.error(f"Failed to update record in {table_name}: {e}")
@@ -382,9 +695,9 @@ class DBController:
         FROM Schedules S
         JOIN Rooms R ON S.room_id = R.id
         JOIN Clients C ON S.client_id = C.id
-        WHERE R.location_id = ? AND CONVERT(date, S.start_time) = ?
+        WHERE R.location_id = ? AND S.start_time >= ? AND S.start_time < ?
         """
-        params = [location_id, date]
+        params = [location_id, *day_range(date)]
         if room_id is not None:
             query += " AND R.id = ?"
             params.append(room_id)
@@ -437,25 +750,36 @@ class DBController:
 
 
     def load_checks(self, type, location_id, room_id, status = None) -> list[CheckRecord]:
-        query = f"""
+        _check_item_table(type)
+        by_room = room_id is not None
+        by_status = status is not None
+
+        def build() -> str:
+            query = f"""
             SELECT 
             	C.id, T.name, E.first_name, E.last_name, C.inspection_date, C.description, C.status
             FROM 
             	Checks C, Employees E, {type} T, Locations L{', Rooms R' if type=='Equipment' else ''}
             WHERE 
-            	C.item_table = '{type}' 
+            	C.item_table = ? 
             	AND C.item_id = T.id
             	AND E.id = C.employee_id
             	{'AND T.room_id = R.id' if type=='Equipment' else ''}
                 {'AND R.location_id = L.id' if type=='Equipment' else 'AND T.location_id = L.id'}
             	AND L.id = ?
-        """
-        params = [location_id]
-        if room_id is not None:
-            query += " AND R.id = ?"
+            """
+            if by_room:
+                query += " AND R.id = ?"
+            if by_status:
+                query += " AND C.status = ?"
+            return query
+
+        # Тип — имя таблицы и часть шаблона, item_table передаётся параметром
+        query = self.statements.template(("load_checks", type, by_room, by_status), build)
+        params = [type, location_id]
+        if by_room:
             params.append(room_id) 
-        if status is not None:
-            query += " AND C.status = ?"
+        if by_status:
             params.append(status)    
         records = self.execute_query(query, tuple(params))
         record_shemas = []
@@ -472,7 +796,12 @@ class DBController:
         return record_shemas     
     
     def load_repairs(self, type, location_id, room_id, status = None) -> list[RepairRecord]:
-        query = f"""
+        _check_item_table(type)
+        by_room = room_id is not None
+        by_status = status is not None
+
+        def build() -> str:
+            query = f"""
             SELECT 
             	Rep.id, 
                 T.name, 
@@ -485,19 +814,24 @@ class DBController:
             FROM 
             	Repairs Rep, Checks C, {type} T, Locations L{', Rooms R' if type=='Equipment' else ''}
             WHERE 
-            	item_table = '{type}' 
+            	C.item_table = ? 
                 AND Rep.check_id = C.id
             	AND C.item_id = T.id
             	{'AND T.room_id = R.id' if type=='Equipment' else ''}
             	{'AND R.location_id = L.id' if type=='Equipment' else 'AND T.location_id = L.id'}
             	AND L.id = ?
-        """
-        params = [location_id]
-        if room_id is not None:
-            query += " AND R.id = ?"
+            """
+            if by_room:
+                query += " AND R.id = ?"
+            if by_status:
+                query += " AND Rep.repair_status = ?"
+            return query
+
+        query = self.statements.template(("load_repairs", type, by_room, by_status), build)
+        params = [type, location_id]
+        if by_room:
             params.append(room_id) 
-        if status is not None:
-            query += " AND R.repair_status = ?"
+        if by_status:
             params.append(status)    
         records = self.execute_query(query, tuple(params))
         record_shemas = []
@@ -516,56 +850,73 @@ class DBController:
         return record_shemas       
     
     def last_check(self, item_table, item_id):
+        limit_clause, limit_params = self.dialect.limit_clause(1)
         last_check = self.execute_query(
                     f"""
-                    SELECT TOP 1 id
+                    SELECT id
                     FROM Checks
                     WHERE item_table = ? AND item_id = ?
                     ORDER BY inspection_date DESC
+                    {limit_clause}
                     """,
-                    (item_table, item_id)
+                    (item_table, item_id, *limit_params)
                 )
         if len(last_check) == 0:
             return None
         return last_check[0][0]
 
-    def select_all_receipts(self, location_id: int, offset: int = 0, limit: int = 10) -> list[ReceiptRecord]:
+    def select_all_receipts(self, location_id: int, offset: int = 0, limit: int = 10, after: tuple | None = None) -> list[ReceiptRecord]:
+        """
+        Получает чеки локации (новые сначала) вместе с позициями.
+
+        :param after: Курсор (created_at, id) последнего загруженного чека: если указан,
+                      страница выбирается по ключу и offset игнорируется.
+        """
         # Получение чеков с пагинацией и фильтрацией по локации через связь с таблицей Employees
         join_clause = """
         JOIN Employees e ON Receipts.employee_id = e.id
         """
         filters = {"e.location_id": location_id}
-        receipts_data = self.paginate_table("Receipts", offset, limit, "Receipts.created_at", filters, join_clause)
-
-        receipt_records = []
-        for receipt_data in receipts_data:
-            receipt = Receipt(
-                id=receipt_data["id"],
-                employee_id=receipt_data["employee_id"],
-                total_amount=receipt_data["total_amount"],
-                created_at=receipt_data["created_at"]
-            )
-
-            # Получение позиций для каждого чека
-            query_items = """
+        if after is not None or offset == 0:
+            receipts_data = self.paginate_table_keyset("Receipts", limit, "Receipts.created_at", after, filters, join_clause)
+        else:
+            receipts_data = self.paginate_table("Receipts", offset, limit, "Receipts.created_at", filters, join_clause)
+        if not receipts_data:
+            return []
+
+        # Получение позиций всех чеков страницы одним запросом (пачками из-за лимита параметров SQL Server)
+        receipt_ids = [receipt_data["id"] for receipt_data in receipts_data]
+        items_by_receipt: dict[int, list[Receipt_Item]] = {receipt_id: [] for receipt_id in receipt_ids}
+        for i in range(0, len(receipt_ids), 1000):
+            chunk = receipt_ids[i:i + 1000]
+            query_items = f"""
             SELECT id, receipt_id, item_table, item_id, quantity, total
             FROM Receipt_Items
-            WHERE receipt_id = ?
+            WHERE receipt_id IN ({", ".join("?" for _ in chunk)})
+            ORDER BY receipt_id, id
             """
-            items_data = self.execute_query(query_items, (receipt.id,))
-            items = [Receipt_Item(
-                id=item[0],
-                receipt_id=item[1],
-                item_table=item[2],
-                item_id=item[3],
-                quantity=item[4],
-                total=item[5]
-            ) for item in items_data]
-
-            receipt_record = ReceiptRecord(receipt=receipt, items=items)
-            receipt_records.append(receipt_record)
-
-        return receipt_records
+            for item in self.execute_query(query_items, tuple(chunk)):
+                items_by_receipt[item[1]].append(Receipt_Item(
+                    id=item[0],
+                    receipt_id=item[1],
+                    item_table=item[2],
+                    item_id=item[3],
+                    quantity=item[4],
+                    total=item[5]
+                ))
+
+        return [
+            ReceiptRecord(
+                receipt=Receipt(
+                    id=receipt_data["id"],
+                    employee_id=receipt_data["employee_id"],
+                    total_amount=receipt_data["total_amount"],
+                    created_at=receipt_data["created_at"]
+                ),
+                items=items_by_receipt[receipt_data["id"]]
+            )
+            for receipt_data in receipts_data
+        ]
 
     def get_clients_by_location(self, location_id: int) -> list[ClientRecord]:
         """
@@ -700,7 +1051,6 @@ class DBController:
         """
         try:
             self.execute_query(query, (client_id, description, amount))
-            self.connection.commit()
             return True
         except Exception as e:
             print(f"Ошибка при добавлении штрафа: {e}")
@@ -728,12 +1078,10 @@ class DBController:
             WHERE id = ? AND quantity + ? >= 0
         """
         self.execute_query(query, (quantity_to_add, consumable_id, quantity_to_add))
-        self.connection.commit()
 
     def delete_zero_quantity_consumables(self, location_id: int):
         query = "DELETE FROM Consumables WHERE location_id = ? AND quantity = 0"
         self.execute_query(query, (location_id,))
-        self.connection.commit()
 
     def get_keys_status(self, location_id: int) -> list[dict]:
         query = """
@@ -753,11 +1101,12 @@ class DBController:
         JOIN Clients c ON s.client_id = c.id
         JOIN Rooms r ON s.room_id = r.id
         WHERE r.location_id = ? AND s.room_id = ? 
-            AND s.start_time >= CONVERT(DATE, GETDATE())
+            AND s.start_time >= ?
             AND s.status = N'Активно'
         """
         columns = ["id", "start_time", "client_name"]
-        return [dict(zip(columns, row)) for row in self.execute_query(query, (location_id, room_id))]
+        today, _ = day_range(date.today())
+        return [dict(zip(columns, row)) for row in self.execute_query(query, (location_id, room_id, today))]
 
     def get_keys_history(self, location_id: int) -> list[dict]:
         query = """
@@ -781,7 +1130,6 @@ class DBController:
         WHERE r.id = (SELECT room_id FROM Schedules WHERE id = ?)
         """
         result = self.execute_query(query, (schedule_id, employee_id, schedule_id))
-        self.connection.commit()
 
     def get_instruments_status(self, location_id: int) -> list[dict]:
         query = """
@@ -820,8 +1168,9 @@ class DBController:
         FROM Schedules s
         JOIN Rooms r ON s.room_id = r.id
         JOIN Clients c ON s.client_id = c.id
-        WHERE r.location_id = ? AND s.start_time >= CAST(GETDATE() AS DATE) AND s.status = N'Активно'
+        WHERE r.location_id = ? AND s.start_time >= ? AND s.status = N'Активно'
         ORDER BY s.start_time
         """
         columns = ["schedule_id", "room_name", "client_name", "start_time"]
-        return [dict(zip(columns, row)) for row in self.execute_query(query, (location_id,))]
+        today, _ = day_range(date.today())
+        return [dict(zip(columns, row)) for row in self.execute_query(query, (location_id, today))]
@@ -25,4 +25,21 @@ def save_standart_report_to_docx(comments, file_path, emp_id):
     doc.add_heading(f'Сотрудник ID: {emp_id}', level=1)
     doc.add_paragraph(comments)
 
-    doc.save(file_path)    
\ No newline at end of file
+    doc.save(file_path)
+
+def equipment_report_data(controller, location_id: int | None = None) -> tuple[str, str, str]:
+    """
+    Данные отчёта о состоянии оборудования: тексты разделов «Оборудование», «Проверки»
+    и «Сводная статистика».
+
+    :param location_id: Только оборудование залов локации; None — всё оборудование.
+    """
+    if location_id is None:
+        equipment_data = controller.execute_query("SELECT * FROM Equipment")
+        checks_data = controller.execute_query("SELECT * FROM Checks")
+    else:
+        equipment_data = controller.load_accounting("Equipment", location_id, None)
+        checks_data = controller.load_checks("Equipment", location_id, None)
+
+    stats = f"Всего оборудования: {len(equipment_data)}\nВсего проверок: {len(checks_data)}"
+    return "\n".join(str(row) for row in equipment_data), "\n".join(str(row) for row in checks_data), stats
@@ -0,0 +1,319 @@
+import os
+import re
+import uuid
+import asyncio
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+try:
+    from python_multipart.exceptions import ParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.exceptions import ParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Размер блока при копировании загрузки и при отдаче файла без sendfile
+CHUNK_SIZE = 1024 * 1024
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+# Один диапазон байтов: bytes=start-end, bytes=start- или bytes=-suffix
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# Запас на заголовки частей и границы multipart сверх размера файла при проверке Content-Length
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class FileTooLargeError(Exception):
+    """Загружаемый файл больше допустимого размера."""
+
+
+class UploadError(Exception):
+    """Тело запроса не является multipart/form-data с файлом."""
+
+
+class RangeNotSatisfiable(Exception):
+    """Запрошенный диапазон начинается за концом файла."""
+
+
+def parse_byte_range(http_range: str, size: int) -> tuple[int, int] | None:
+    """
+    Разбирает заголовок Range с одним диапазоном и возвращает (начало, конец) с концом
+    не включительно. None — заголовок не поддерживается (другие единицы, несколько диапазонов,
+    ошибка синтаксиса): такой Range игнорируется и файл отдаётся целиком (RFC 9110, 14.2).
+    RangeNotSatisfiable — диапазон за пределами файла.
+    """
+    match = _BYTE_RANGE.match(http_range.strip().replace(" ", ""))
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Последние suffix байт
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+        if last and int(last) < start:
+            return None
+    if start >= size or start >= end:
+        raise RangeNotSatisfiable(f"Range {http_range!r} is outside of {size} bytes")
+    return start, end
+
+
+class _MultipartUpload:
+    """
+    Потоковый разбор multipart/form-data: данные файла из поля field накапливаются в pending
+    до записи, остальные части пропускаются. Сохраняется только первый файл поля.
+    """
+
+    __slots__ = ("field", "parser", "file_name", "pending", "pending_size", "_headers", "_name", "_value", "_target")
+
+    def __init__(self, boundary: bytes, field: str):
+        self.field = field.encode()
+        self.file_name: str | None = None
+        self.pending: list[bytes] = []
+        self.pending_size = 0
+        self._headers: dict[bytes, bytes] = {}
+        self._name = self._value = b""
+        self._target = False
+        self.parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+        })
+
+    def take(self) -> list[bytes]:
+        """Забирает накопленные данные файла."""
+        chunks, self.pending, self.pending_size = self.pending, [], 0
+        return chunks
+
+    def _on_part_begin(self):
+        self._headers = {}
+        self._target = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._name.lower()] = self._value
+        self._name = self._value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.file_name is None and options.get(b"name") == self.field and b"filename" in options:
+            self._target = True
+            self.file_name = os.path.basename(options[b"filename"].decode("utf-8", "replace")) or "file"
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._target:
+            self.pending.append(data[start:end])
+            self.pending_size += end - start
+
+
+class _HashingWriter:
+    """Временный файл хранилища, в который пишется загрузка с подсчётом sha256 и размера."""
+
+    __slots__ = ("store", "path", "file", "digest", "size")
+
+    def __init__(self, store: "FileStore"):
+        self.store = store
+        self.path = store._tmp / uuid.uuid4().hex
+        self.file = open(self.path, "wb")
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.store.max_size:
+            raise FileTooLargeError(f"File is larger than {self.store.max_size} bytes")
+        self.digest.update(data)
+        self.file.write(data)
+
+    def commit(self) -> str:
+        """Переносит файл в хранилище под именем-хэшем и возвращает хэш."""
+        self.file.close()
+        name = self.digest.hexdigest()
+        path = self.store.root / name[:2] / name
+        if path.exists():
+            # Такой файл уже есть: повторная загрузка не занимает места
+            self.path.unlink()
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(self.path, path)
+        return name
+
+    def abort(self):
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class FileStore:
+    """
+    Хранилище вложений чата с адресацией по содержимому: файл лежит под именем
+    root/<первые 2 символа>/<sha256 содержимого>, поэтому одинаковые файлы хранятся один раз,
+    а ссылку на файл можно кэшировать бессрочно.
+
+    Загрузка копируется на диск блоками по CHUNK_SIZE в отдельном потоке с подсчётом
+    хэша на лету: память процесса не зависит от размера файла.
+    """
+
+    def __init__(self, root: str | Path, max_size: int = 512 * 1024 * 1024):
+        """
+        :param root: Каталог хранилища (не внутри static: файлы отдаются только через /download).
+        :param max_size: Максимальный размер файла в байтах.
+        """
+        self.root = Path(root)
+        self.max_size = max_size
+        self._tmp = self.root / "tmp"
+        self._tmp.mkdir(parents=True, exist_ok=True)
+
+    def path(self, digest: str) -> Path | None:
+        """Путь к файлу с хэшем digest или None, если такого файла нет."""
+        if not _DIGEST.match(digest):
+            return None
+        path = self.root / digest[:2] / digest
+        return path if path.is_file() else None
+
+    async def save_multipart(self, headers: Headers, stream: AsyncIterator[bytes], field: str = "file") -> tuple[str, str]:
+        """
+        Принимает файл из тела запроса multipart/form-data по мере поступления, без промежуточной
+        копии: данные части field сразу пишутся в файл хранилища блоками по CHUNK_SIZE.
+        Возвращает (sha256, имя файла из запроса).
+
+        FileTooLargeError — Content-Length или принятые данные больше max_size: чтение
+        прекращается сразу, остаток тела не принимается.
+        UploadError — не multipart или в запросе нет файла field.
+        """
+        content_length = headers.get("content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_size + MULTIPART_OVERHEAD:
+            raise FileTooLargeError(f"File is larger than {self.max_size} bytes")
+        content_type, params = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise UploadError("Expected multipart/form-data body")
+
+        upload = _MultipartUpload(params[b"boundary"], field)
+        writer = await asyncio.to_thread(_HashingWriter, self)
+        try:
+            async for chunk in stream:
+                upload.parser.write(chunk)
+                if upload.pending_size >= CHUNK_SIZE:
+                    # Запись и хэширование — в потоке, чтобы не останавливать event loop
+                    await asyncio.to_thread(self._write_all, writer, upload.take())
+            upload.parser.finalize()
+            await asyncio.to_thread(self._write_all, writer, upload.take())
+            if upload.file_name is None:
+                raise UploadError(f"Missing file field {field!r}")
+            return await asyncio.to_thread(writer.commit), upload.file_name
+        except ParseError as e:
+            await asyncio.to_thread(writer.abort)
+            raise UploadError(f"Malformed multipart body: {e}")
+        except BaseException:
+            await asyncio.to_thread(writer.abort)
+            raise
+
+    @staticmethod
+    def _write_all(writer: _HashingWriter, chunks: list[bytes]):
+        for chunk in chunks:
+            writer.write(chunk)
+
+
+class StoredFileResponse(FileResponse):
+    """
+    Отдача файла с поддержкой условных запросов и диапазонов.
+
+    - ETag задаётся вызывающим кодом (для хранилища — хэш содержимого), If-None-Match
+      и If-Modified-Since дают 304 без тела;
+    - Range с одним диапазоном даёт 206, за пределами файла — 416; If-Range сравнивается
+      с ETag и Last-Modified; несколько диапазонов не поддерживаются — файл отдаётся целиком;
+    - если ASGI-сервер поддерживает расширение http.response.zerocopysend, тело отправляется
+      через sendfile без копирования в память процесса, иначе — блоками по CHUNK_SIZE.
+
+    От FileResponse берутся только заголовки (Content-Type, Content-Disposition, Last-Modified);
+    ответ целиком отправляет свой __call__.
+    """
+
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, path: str | Path, etag: str, immutable: bool = False, **kwargs):
+        """
+        :param etag: Значение ETag без кавычек.
+        :param immutable: Содержимое по этому URL никогда не меняется (адресация по хэшу).
+        """
+        headers = {"etag": f'"{etag}"', "accept-ranges": "bytes"}
+        headers["cache-control"] = "public, max-age=31536000, immutable" if immutable else "no-cache"
+        super().__init__(path, headers=headers, stat_result=os.stat(path), **kwargs)
+
+    def _not_modified(self, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.headers["etag"] in tags
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                return int(self.stat_result.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range_allowed(self, request_headers: Headers) -> bool:
+        # Диапазон применяется, только если If-Range совпадает с текущей версией файла
+        if_range = request_headers.get("if-range")
+        return if_range is None or if_range in (self.headers["etag"], formatdate(self.stat_result.st_mtime, usegmt=True))
+
+    async def __call__(self, scope, receive, send):
+        request_headers = Headers(scope=scope)
+        if self._not_modified(request_headers):
+            headers = {name: self.headers[name] for name in ("etag", "cache-control", "last-modified")}
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        size = self.stat_result.st_size
+        status_code, start, end = self.status_code, 0, size
+        http_range = request_headers.get("range")
+        if http_range is not None and self._range_allowed(request_headers):
+            try:
+                byte_range = parse_byte_range(http_range, size)
+            except RangeNotSatisfiable:
+                await Response(status_code=416, headers={"content-range": f"bytes */{size}"})(scope, receive, send)
+                return
+            if byte_range is not None:
+                status_code, (start, end) = 206, byte_range
+                self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+                self.headers["content-length"] = str(end - start)
+
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in (scope.get("extensions") or {}):
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopysend", "file": file, "offset": start, "count": end - start, "more_body": False})
+        else:
+            await self._send_chunks(send, start, end)
+        if self.background is not None:
+            await self.background()
+
+    async def _send_chunks(self, send, start: int, end: int):
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(start)
+            remaining = end - start
+            while True:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                more_body = remaining > 0 and bool(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                if not more_body:
+                    break
@@ -0,0 +1,134 @@
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any
+
+from utils.shemas import ColumnFilter
+
+INTEGER_TYPES = {"int", "bigint", "smallint", "tinyint", "bit"}
+NUMERIC_TYPES = INTEGER_TYPES | {"decimal", "numeric", "float", "real", "money", "smallmoney"}
+DATE_TYPES = {"date", "datetime", "datetime2", "smalldatetime", "datetimeoffset"}
+
+# Имя столбца: column или alias.column
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?$")
+
+def _escape_like(value: str) -> str:
+    # Экранируем спецсимволы LIKE, чтобы пользовательский ввод сравнивался буквально.
+    # ESCAPE поддерживают и SQL Server, и SQLite; "[" — спецсимвол только в SQL Server
+    return re.sub(r"([\\%_\[])", r"\\\1", value)
+
+def parse_filter(text: str, data_type: str | None) -> ColumnFilter | None:
+    """
+    Разбирает текст из поля фильтра с учётом типа столбца.
+
+    Для всех типов: "=v" — точное совпадение, "=v1,v2" — список значений.
+    Числа и даты: "v" — равенство, "v1,v2" — список, "a..b", "a..", "..b" — диапазон.
+    Строки: "v" — поиск по началу строки (использует индекс), "*v" — поиск подстроки.
+    Пустая строка — фильтр не применяется.
+    """
+    text = text.strip()
+    if not text:
+        return None
+
+    kind = _kind(data_type)
+    if text.startswith("="):
+        values = [v.strip() for v in text[1:].split(",")]
+        return ColumnFilter(op="in", value=values) if len(values) > 1 else ColumnFilter(op="eq", value=values[0])
+    if kind == "text":
+        if text.startswith("*"):
+            return ColumnFilter(op="contains", value=text.lstrip("*"))
+        return ColumnFilter(op="prefix", value=text)
+    if ".." in text:
+        low, high = (part.strip() for part in text.split("..", 1))
+        return ColumnFilter(op="range", value=low or None, value_to=high or None)
+    if "," in text:
+        return ColumnFilter(op="in", value=[v.strip() for v in text.split(",")])
+    return ColumnFilter(op="eq", value=text)
+
+def _kind(data_type: str | None) -> str:
+    if data_type in NUMERIC_TYPES:
+        return "number"
+    if data_type in DATE_TYPES:
+        return "date"
+    return "text"
+
+def _convert(value: Any, kind: str, data_type: str | None = None) -> Any:
+    # Приводим строку к типу столбца, чтобы сравнение не требовало неявного преобразования столбца
+    if not isinstance(value, str):
+        return value
+    try:
+        if kind == "number":
+            return int(value) if data_type in INTEGER_TYPES else Decimal(value)
+        if kind == "date":
+            return datetime.fromisoformat(value) if "T" in value or " " in value else date.fromisoformat(value)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f"Некорректное значение фильтра: {value!r}")
+    return value
+
+def build_conditions(filters: dict | None, column_types: dict[str, str]) -> tuple[list[str], list]:
+    """
+    Строит параметризованные условия WHERE.
+
+    :param filters: Словарь {столбец: значение}. Значение — ColumnFilter, строка из поля ввода
+                    (разбирается parse_filter) или любое другое значение (равенство).
+    :param column_types: Типы столбцов таблицы (DATA_TYPE из INFORMATION_SCHEMA.COLUMNS).
+    :return: Список условий и список параметров к ним.
+    """
+    conditions, params = [], []
+    for column, raw in (filters or {}).items():
+        if not _IDENTIFIER.match(column):
+            raise ValueError(f"Недопустимое имя столбца в фильтре: {column!r}")
+        data_type = column_types.get(column.split(".")[-1])
+        kind = _kind(data_type)
+
+        if isinstance(raw, ColumnFilter):
+            column_filter = raw
+        elif isinstance(raw, str):
+            column_filter = parse_filter(raw, data_type)
+        elif raw is None:
+            column_filter = None
+        else:
+            column_filter = ColumnFilter(op="eq", value=raw)
+        if column_filter is None:
+            continue
+
+        op = column_filter.op
+        if op == "prefix":
+            conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append(_escape_like(str(column_filter.value)) + "%")
+        elif op == "contains":
+            conditions.append(f"{column} LIKE ? ESCAPE '\\'")
+            params.append("%" + _escape_like(str(column_filter.value)) + "%")
+        elif op == "in":
+            values = [_convert(v, kind, data_type) for v in column_filter.value]
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+        elif op == "eq":
+            value = _convert(column_filter.value, kind, data_type)
+            if kind == "date" and data_type != "date" and type(value) is date:
+                # Дата без времени для столбца datetime — полуинтервал по суткам
+                start = datetime.combine(value, datetime.min.time())
+                conditions.append(f"{column} >= ? AND {column} < ?")
+                params.extend([start, start + timedelta(days=1)])
+            else:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        elif op == "range":
+            low = _convert(column_filter.value, kind, data_type)
+            high = _convert(column_filter.value_to, kind, data_type)
+            if type(low) is date and data_type != "date":
+                low = datetime.combine(low, datetime.min.time())
+            if low is not None:
+                conditions.append(f"{column} >= ?")
+                params.append(low)
+            if high is not None:
+                if kind == "date" and data_type != "date" and type(high) is date:
+                    # Верхняя граница-дата включает весь день
+                    conditions.append(f"{column} < ?")
+                    params.append(datetime.combine(high, datetime.min.time()) + timedelta(days=1))
+                else:
+                    conditions.append(f"{column} <= ?")
+                    params.append(high)
+        else:
+            raise ValueError(f"Неизвестный оператор фильтра: {op!r}")
+    return conditions, params
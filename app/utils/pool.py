@@ -0,0 +1,271 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from utils.shemas import PoolStats
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведённое время."""
+
+
+class _PoolEntry:
+    """Служебные данные о соединении, находящемся в пуле."""
+
+    __slots__ = ("connection", "created_at", "last_used", "uses")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений с базой данных.
+
+    Соединения создаются лениво до max_size, при выдаче проверяются запросом
+    SELECT 1 (если простаивали дольше health_check_interval) и пересоздаются
+    после max_uses выдач или простоя дольше max_idle секунд.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        max_uses: int = 1000,
+        max_idle: float = 300.0,
+        health_check_interval: float = 30.0,
+        on_close: Callable[[Any], None] | None = None,
+    ):
+        """
+        :param connect: Фабрика, открывающая новое соединение.
+        :param min_size: Количество соединений, открываемых сразу.
+        :param max_size: Максимальное количество одновременно открытых соединений.
+        :param timeout: Сколько секунд ждать свободное соединение.
+        :param max_uses: После скольких выдач соединение пересоздаётся.
+        :param max_idle: После скольких секунд простоя соединение пересоздаётся.
+        :param health_check_interval: Простой в секундах, после которого соединение проверяется при выдаче.
+        :param on_close: Вызывается с соединением перед его закрытием (например, чтобы закрыть закэшированные курсоры).
+        """
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1.")
+
+        self.logger = logging.getLogger(__name__)
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.health_check_interval = health_check_interval
+        self._on_close = on_close
+
+        self._lock = threading.Condition()
+        self._idle: deque[_PoolEntry] = deque()
+        self._in_use: dict[int, _PoolEntry] = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Метрики
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._failed_checks = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._checkout_total = 0.0
+        self._checkout_max = 0.0
+
+        for _ in range(min_size):
+            self._idle.append(self._open())
+
+    def _open(self) -> _PoolEntry:
+        entry = _PoolEntry(self._connect())
+        self._size += 1
+        self._created += 1
+        return entry
+
+    def _close_entry(self, entry: _PoolEntry):
+        # Закрывает соединение; вызывается без удержания блокировки (закрытие может ждать сеть),
+        # _size уменьшает вызывающий код
+        try:
+            if self._on_close is not None:
+                self._on_close(entry.connection)
+            entry.connection.close()
+        except Exception as e:
+            self.logger.warning(f"Error closing pooled connection: {e}")
+
+    def _discard(self, entry: _PoolEntry, recycled: bool = False, failed_check: bool = False):
+        # Закрывает соединение вне блокировки и освобождает его место в пуле
+        self._close_entry(entry)
+        with self._lock:
+            self._size -= 1
+            if recycled:
+                self._recycled += 1
+            if failed_check:
+                self._failed_checks += 1
+            self._lock.notify()
+
+    def _is_expired(self, entry: _PoolEntry, now: float) -> bool:
+        if self.max_uses and entry.uses >= self.max_uses:
+            return True
+        return bool(self.max_idle) and now - entry.last_used > self.max_idle
+
+    def _is_alive(self, entry: _PoolEntry, now: float) -> bool:
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Pooled connection failed health check: {e}")
+            return False
+
+    def acquire(self) -> Any:
+        """
+        Выдаёт соединение из пула, при необходимости ожидая освобождения.
+
+        Блокировка пула удерживается только на время выбора соединения и обновления счётчиков:
+        проверка SELECT 1, закрытие и открытие соединений выполняются вне её, поэтому
+        зависшее соединение не задерживает выдачу и возврат соединений в других потоках.
+        Взятое на проверку соединение остаётся учтённым в _size.
+
+        :return: Открытое соединение.
+        :raises PoolTimeoutError: Если свободное соединение не появилось за timeout секунд.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                while True:
+                    entry = None
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Резервируем место под новое соединение и открываем его вне блокировки
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool size {self.max_size})."
+                        )
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if entry is None:
+                break
+
+            now = time.monotonic()
+            if self._is_expired(entry, now):
+                self._discard(entry, recycled=True)
+                continue
+            if not self._is_alive(entry, now):
+                self._discard(entry, recycled=True, failed_check=True)
+                continue
+            with self._lock:
+                return self._checkout(entry, started, waited)
+
+        # Открываем новое соединение без удержания блокировки
+        try:
+            entry = _PoolEntry(self._connect())
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._created += 1
+            return self._checkout(entry, started, waited)
+
+    def _checkout(self, entry: _PoolEntry, started: float, waited: bool) -> Any:
+        elapsed = time.monotonic() - started
+        entry.uses += 1
+        self._in_use[id(entry.connection)] = entry
+        self._checkouts += 1
+        self._checkout_total += elapsed
+        self._checkout_max = max(self._checkout_max, elapsed)
+        if waited:
+            self._wait_total += elapsed
+            self._wait_max = max(self._wait_max, elapsed)
+        return entry.connection
+
+    def release(self, connection: Any, discard: bool = False):
+        """
+        Возвращает соединение в пул.
+
+        :param connection: Соединение, полученное через acquire.
+        :param discard: Закрыть соединение вместо возврата (например, после сетевой ошибки).
+        """
+        with self._lock:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                raise ValueError("Connection does not belong to this pool.")
+            entry.last_used = time.monotonic()
+            if not (discard or self._closed or self._is_expired(entry, entry.last_used)):
+                self._idle.append(entry)
+                self._lock.notify()
+                return
+            recycled = not discard and not self._closed
+        self._discard(entry, recycled=recycled)
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: выдаёт соединение и возвращает его в пул по выходу."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def stats(self) -> PoolStats:
+        """Возвращает снимок метрик пула."""
+        with self._lock:
+            return PoolStats(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=len(self._in_use),
+                waiting=self._waiting,
+                max_size=self.max_size,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                created=self._created,
+                recycled=self._recycled,
+                failed_health_checks=self._failed_checks,
+                wait_time_total=self._wait_total,
+                wait_time_max=self._wait_max,
+                checkout_latency_avg=self._checkout_total / self._checkouts if self._checkouts else 0.0,
+                checkout_latency_max=self._checkout_max,
+            )
+
+    def close(self):
+        """Закрывает все свободные соединения; занятые закрываются при возврате."""
+        with self._lock:
+            self._closed = True
+            entries = list(self._idle)
+            self._idle.clear()
+            self._lock.notify_all()
+        for entry in entries:
+            self._discard(entry)
@@ -0,0 +1,251 @@
+import re
+import sys
+import time
+import hashlib
+import logging
+import threading
+import sysconfig
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from utils.shemas import QueryStat
+from utils.tracing import add_span
+
+# Источник запросов, заданный вызывающим кодом (например, маршрут API: "GET /rooms/{location_id}").
+# Если не задан, источником считается первый кадр стека вне utils (форма или вкладка приложения)
+call_site: contextvars.ContextVar[str | None] = contextvars.ContextVar("call_site", default=None)
+
+# Границы корзин гистограммы длительности запросов, секунды
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_UTILS_DIR = str(Path(__file__).resolve().parent)
+_CONTROLLER_FILE = str(Path(__file__).resolve().parent / "controller.py")
+_STDLIB_DIR = sysconfig.get_paths()["stdlib"]
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"--[^\n]*"), ""),
+    (re.compile(r"N?'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![\w@.])-?\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)"), "(?, ...)"),
+    (re.compile(r"\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+"), "(?, ...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """
+    Нормализованный текст запроса: литералы заменены на ?, списки IN (?, ?, ...)
+    и многострочные VALUES свёрнуты, пробелы схлопнуты. Запросы, отличающиеся
+    только значениями или длиной списков, получают один отпечаток.
+    """
+    for pattern, replacement in _FINGERPRINT_RULES:
+        query = pattern.sub(replacement, query)
+    return query.strip().rstrip(";").strip()
+
+def fingerprint_id(text: str) -> str:
+    """Короткий идентификатор отпечатка для меток Prometheus."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+def _value_size(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, Decimal):
+        return 17
+    return 8
+
+def result_size(rows) -> int:
+    """Приблизительный объём выбранных данных в байтах."""
+    return sum(_value_size(value) for row in rows for value in row)
+
+def _call_site() -> tuple[str, str]:
+    """Метод DBController (самый внешний в стеке) и вызывающий его код вне utils."""
+    method, caller = "", call_site.get()
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename == _CONTROLLER_FILE:
+            method = frame.f_code.co_name
+        elif caller is None and not filename.startswith((_UTILS_DIR, _STDLIB_DIR)):
+            path = Path(filename)
+            caller = f"{path.parent.name}/{path.stem}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return method, caller or ""
+
+
+class QueryRecord:
+    """Результат выполнения запроса, заполняемый внутри QueryStats.track()."""
+
+    __slots__ = ("rows", "bytes")
+
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+    def fetched(self, rows) -> None:
+        self.rows = len(rows)
+        self.bytes = result_size(rows)
+
+
+class _Series:
+    """Накопленная статистика одного отпечатка запроса для пары (метод, источник)."""
+
+    __slots__ = ("fingerprint", "method", "caller", "count", "errors",
+                 "duration_total", "duration_max", "rows_total", "bytes_total", "buckets")
+
+    def __init__(self, fingerprint: str, method: str, caller: str):
+        self.fingerprint = fingerprint
+        self.method = method
+        self.caller = caller
+        self.count = 0
+        self.errors = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+        self.rows_total = 0
+        self.bytes_total = 0
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+
+    def snapshot(self) -> QueryStat:
+        return QueryStat(
+            fingerprint=self.fingerprint,
+            method=self.method,
+            caller=self.caller,
+            count=self.count,
+            errors=self.errors,
+            duration_total=self.duration_total,
+            duration_max=self.duration_max,
+            rows_total=self.rows_total,
+            bytes_total=self.bytes_total,
+            buckets=list(self.buckets),
+        )
+
+
+class QueryStats:
+    """
+    Инструментирование запросов DBController: длительность, число строк и объём данных
+    по отпечатку запроса, методу контроллера и источнику вызова, гистограмма
+    длительности и журнал медленных запросов.
+
+    Журнал медленных запросов пишется в логгер "utils.query_stats.slow"
+    (и в файл slow_log, если он указан).
+    """
+
+    def __init__(self, slow_threshold: float | None = 0.5, slow_log: str | None = None, max_series: int = 1000):
+        """
+        :param slow_threshold: Длительность в секундах, начиная с которой запрос пишется в журнал; None — не писать.
+        :param slow_log: Файл журнала медленных запросов.
+        :param max_series: Предел числа рядов; запросы сверх него учитываются в ряду "<other>".
+        """
+        self.slow_threshold = slow_threshold
+        self.max_series = max_series
+        self.slow_logger = logging.getLogger(f"{__name__}.slow")
+        if slow_log:
+            handler = logging.FileHandler(slow_log, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.slow_logger.addHandler(handler)
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, str, str], _Series] = {}
+
+    @contextmanager
+    def track(self, query: str):
+        """
+        Замеряет выполнение запроса в блоке with; число строк передаётся через record.fetched(rows).
+        Исключение учитывается как ошибка и пробрасывается дальше.
+        """
+        record = QueryRecord()
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield record
+        except Exception:
+            failed = True
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            self.record(query, duration, record.rows, record.bytes, failed)
+            add_span(fingerprint(query)[:200], "db", started, duration)
+
+    def record(self, query: str, duration: float, rows: int = 0, size: int = 0, failed: bool = False):
+        text = fingerprint(query)
+        method, caller = _call_site()
+        key = (text, method, caller)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    key = ("<other>", "", "")
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = _Series(*key)
+            series.count += 1
+            series.errors += failed
+            series.duration_total += duration
+            series.duration_max = max(series.duration_max, duration)
+            series.rows_total += rows
+            series.bytes_total += size
+            series.buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            self.slow_logger.warning(
+                f"Slow query {duration * 1000:.1f} ms, rows={rows}, bytes={size}, "
+                f"method={method or '-'}, caller={caller or '-'}: {text}"
+            )
+
+    def series(self) -> list[QueryStat]:
+        """Снимок накопленной статистики, самые затратные запросы первыми."""
+        with self._lock:
+            snapshot = [series.snapshot() for series in self._series.values()]
+        return sorted(snapshot, key=lambda series: series.duration_total, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def prometheus(self) -> str:
+        """Статистика в текстовом формате Prometheus."""
+        series = self.series()
+        lines = [
+            "# HELP jamstation_db_query_info Normalized SQL of a query fingerprint.",
+            "# TYPE jamstation_db_query_info gauge",
+        ]
+        for sql in sorted({item.fingerprint for item in series}):
+            lines.append(f'jamstation_db_query_info{{query_id="{fingerprint_id(sql)}",sql="{_escape(sql)}"}} 1')
+
+        lines += [
+            "# HELP jamstation_db_query_duration_seconds Query execution time.",
+            "# TYPE jamstation_db_query_duration_seconds histogram",
+        ]
+        for item in series:
+            labels = _labels(item)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, item.buckets):
+                cumulative += count
+                lines.append(f'jamstation_db_query_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'jamstation_db_query_duration_seconds_bucket{{{labels},le="+Inf"}} {item.count}')
+            lines.append(f"jamstation_db_query_duration_seconds_sum{{{labels}}} {item.duration_total:.6f}")
+            lines.append(f"jamstation_db_query_duration_seconds_count{{{labels}}} {item.count}")
+
+        for name, help_text, attribute in (
+            ("jamstation_db_query_rows_total", "Rows returned by queries.", "rows_total"),
+            ("jamstation_db_query_bytes_total", "Approximate bytes fetched by queries.", "bytes_total"),
+            ("jamstation_db_query_errors_total", "Failed query executions.", "errors"),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{{{_labels(item)}}} {getattr(item, attribute)}" for item in series]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", " ").replace('"', '\\"')
+
+def _labels(series: QueryStat) -> str:
+    return (
+        f'query_id="{fingerprint_id(series.fingerprint)}",'
+        f'method="{_escape(series.method)}",caller="{_escape(series.caller)}"'
+    )
@@ -0,0 +1,137 @@
+import re
+import time
+import threading
+
+from pydantic import BaseModel
+
+from utils.shemas import Location, Room, Instrument, Consumable, EmployeeRecord
+
+# Справочные таблицы: модель и загружаемые столбцы.
+# Количество расходников меняется при каждой продаже, поэтому в кэш не попадает.
+REFERENCE_TABLES: dict[str, tuple[type[BaseModel], list[str]]] = {
+    "Locations": (Location, ["id", "name", "address", "phone_number", "email"]),
+    "Rooms": (Room, ["id", "location_id", "name", "capacity", "hourly_rate"]),
+    "Instruments": (Instrument, ["id", "location_id", "name", "hourly_rate"]),
+    "Consumables": (Consumable, ["id", "location_id", "name", "price"]),
+    "Employees": (EmployeeRecord, ["id", "location_id", "first_name", "second_name", "last_name", "role"]),
+}
+
+# Таблица, изменяемая DML-запросом
+_DML_TABLE = re.compile(r"^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+\[?(\w+)\]?", re.IGNORECASE)
+
+def written_table(query: str) -> str | None:
+    """Имя таблицы, которую изменяет запрос INSERT/UPDATE/DELETE, или None."""
+    match = _DML_TABLE.match(query)
+    return match.group(1) if match else None
+
+
+class ReferenceCache:
+    """
+    Кэш небольших, редко меняющихся справочников (залы, локации, инструменты,
+    расходники, сотрудники) с разбивкой по локациям.
+
+    Записи живут ttl секунд; DBController сбрасывает таблицу при любом изменении
+    через insert/update_record/delete_by_id/execute_query. Выборка идёт без блокировки,
+    поэтому результат сохраняется, только если за время запроса таблицу не сбросили
+    (счётчик поколений таблицы не изменился).
+    """
+
+    def __init__(self, controller, ttl: float = 300.0):
+        self.controller = controller
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # (таблица, location_id) -> (время загрузки, строки); location_id = None — вся таблица
+        self._lists: dict[tuple[str, int | None], tuple[float, list]] = {}
+        # (таблица, id) -> (время загрузки, строка) для выборок по id
+        self._rows: dict[tuple[str, int], tuple[float, BaseModel | None]] = {}
+        # Таблица -> число сбросов
+        self._generations: dict[str, int] = {table: 0 for table in REFERENCE_TABLES}
+
+    def invalidate(self, table: str | None = None):
+        """Сбрасывает кэш таблицы или, без аргументов, весь кэш."""
+        with self._lock:
+            if table is None:
+                self._lists.clear()
+                self._rows.clear()
+                for name in self._generations:
+                    self._generations[name] += 1
+                return
+            if table in self._generations:
+                self._generations[table] += 1
+            for key in [key for key in self._lists if key[0] == table]:
+                del self._lists[key]
+            for key in [key for key in self._rows if key[0] == table]:
+                del self._rows[key]
+
+    def _fresh(self, entry) -> bool:
+        return entry is not None and time.monotonic() - entry[0] <= self.ttl
+
+    def _to_model(self, table: str, row) -> BaseModel:
+        model, columns = REFERENCE_TABLES[table]
+        data = dict(zip(columns, row))
+        if model is Consumable:
+            data["quantity"] = None
+        return model(**data)
+
+    def rows(self, table: str, location_id: int | None = None) -> list:
+        """Все строки справочника (для таблиц с location_id — строки указанной локации)."""
+        key = (table, location_id)
+        with self._lock:
+            entry = self._lists.get(key)
+            generation = self._generations[table]
+        if self._fresh(entry):
+            return entry[1]
+
+        _, columns = REFERENCE_TABLES[table]
+        filters = {"location_id": location_id} if location_id is not None else None
+        rows = [self._to_model(table, row) for row in self.controller.select(columns, table, filters=filters)]
+        with self._lock:
+            if self._generations[table] == generation:
+                self._lists[key] = (time.monotonic(), rows)
+        return rows
+
+    def row(self, table: str, id: int) -> BaseModel | None:
+        """Строка справочника по id: из уже загруженных списков или отдельным запросом."""
+        with self._lock:
+            entries = [entry for key, entry in self._lists.items() if key[0] == table and self._fresh(entry)]
+            cached = self._rows.get((table, id))
+            generation = self._generations[table]
+        for _, rows in entries:
+            for row in rows:
+                if row.id == id:
+                    return row
+        if self._fresh(cached):
+            return cached[1]
+
+        _, columns = REFERENCE_TABLES[table]
+        rows = self.controller.select(columns, table, filters={"id": id})
+        row = self._to_model(table, rows[0]) if rows else None
+        with self._lock:
+            if self._generations[table] == generation:
+                self._rows[(table, id)] = (time.monotonic(), row)
+        return row
+
+    def find(self, table: str, location_id: int | None, name: str) -> BaseModel | None:
+        """Строка справочника локации по названию."""
+        return next((row for row in self.rows(table, location_id) if row.name == name), None)
+
+    def locations(self) -> list[Location]:
+        return self.rows("Locations")
+
+    def location(self, location_id: int) -> Location | None:
+        return self.row("Locations", location_id)
+
+    def rooms(self, location_id: int) -> list[Room]:
+        return self.rows("Rooms", location_id)
+
+    def room(self, room_id: int) -> Room | None:
+        return self.row("Rooms", room_id)
+
+    def instruments(self, location_id: int) -> list[Instrument]:
+        return self.rows("Instruments", location_id)
+
+    def consumables(self, location_id: int) -> list[Consumable]:
+        return self.rows("Consumables", location_id)
+
+    def employee(self, employee_id: int) -> EmployeeRecord | None:
+        return self.row("Employees", employee_id)
@@ -0,0 +1,231 @@
+import os
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from utils.documents import equipment_report_data, save_report_to_docx, save_standart_report_to_docx
+from utils.shemas import ReportJobInfo
+
+
+class ReportCancelled(Exception):
+    """Генерация отчёта отменена."""
+
+
+class ReportJob:
+    """
+    Состояние задания генерации отчёта. Изменяется только потоком, выполняющим задание;
+    наружу отдаётся копией (ReportJobInfo) через info() и on_update.
+    """
+
+    __slots__ = ("id", "kind", "title", "path", "status", "progress", "stage", "error",
+                 "created_at", "finished_at", "cancel_event", "future", "_notify")
+
+    def __init__(self, job_id: int, kind: str, title: str, path: Path, notify: Callable[["ReportJob"], None]):
+        self.id = job_id
+        self.kind = kind
+        self.title = title
+        self.path = path
+        self.status = "queued"
+        self.progress = 0
+        self.stage = ""
+        self.error: str | None = None
+        self.created_at = datetime.now().replace(microsecond=0)
+        self.finished_at: datetime | None = None
+        self.cancel_event = threading.Event()
+        self.future: Future | None = None
+        self._notify = notify
+
+    def info(self) -> ReportJobInfo:
+        return ReportJobInfo(
+            id=self.id, kind=self.kind, title=self.title, status=self.status,
+            progress=self.progress, stage=self.stage, path=str(self.path), error=self.error,
+            created_at=self.created_at, finished_at=self.finished_at,
+        )
+
+    def check_cancelled(self):
+        """Бросает ReportCancelled, если задание отменено; вызывается построителем между этапами."""
+        if self.cancel_event.is_set():
+            raise ReportCancelled(f"Report job {self.id} cancelled")
+
+    def update(self, progress: int, stage: str):
+        """Сообщает о переходе к следующему этапу генерации (и проверяет отмену)."""
+        self.check_cancelled()
+        self.progress = progress
+        self.stage = stage
+        self._notify(self)
+
+    def finish(self, status: str, error: str | None = None):
+        self.status = status
+        self.error = error
+        if status == "done":
+            self.progress = 100
+        self.finished_at = datetime.now().replace(microsecond=0)
+        self._notify(self)
+
+
+def build_equipment_report(controller, job: ReportJob, path: Path, comments: str = "", location_id: int | None = None):
+    """Отчёт о состоянии оборудования (всего или по одной локации)."""
+    job.update(10, "Чтение данных")
+    equipment_data, checks_data, stats_data = equipment_report_data(controller, location_id)
+    job.update(60, "Формирование документа")
+    save_report_to_docx(equipment_data, checks_data, stats_data, comments, path)
+
+
+def build_standard_report(controller, job: ReportJob, path: Path, comments: str = "", emp_id: int = 1):
+    """Стандартный отчёт сотрудника."""
+    job.update(50, "Формирование документа")
+    save_standart_report_to_docx(comments, path, emp_id)
+
+
+# Построители отчётов по виду задания: (controller, job, path, **params)
+REPORT_BUILDERS: dict[str, Callable[..., None]] = {
+    "equipment": build_equipment_report,
+    "standard": build_standard_report,
+}
+
+
+class ReportQueue:
+    """
+    Очередь генерации DOCX-отчётов в пуле потоков: запросы к БД и сборка документа
+    не блокируют вызывающий поток (интерфейс Qt или пакетный запуск generate_reports.py).
+
+    Ход выполнения передаётся в on_update(ReportJobInfo) из рабочего потока при каждом
+    изменении задания. Отмена кооперативная: построитель проверяет её между этапами,
+    задание из очереди снимается сразу. Документ пишется во временный файл <имя>.part
+    и переименовывается после успешной сборки, поэтому в папке результатов не остаётся
+    недописанных или отменённых отчётов.
+    """
+
+    def __init__(self, controller, results_dir: str | Path, max_workers: int = 2,
+                 on_update: Callable[[ReportJobInfo], None] | None = None):
+        """
+        :param controller: DBController; соединения берутся из его пула в рабочих потоках.
+        :param results_dir: Папка результатов: в неё сохраняются отчёты с относительным именем файла.
+        :param max_workers: Сколько отчётов генерируется одновременно.
+        :param on_update: Вызывается из рабочего потока при изменении любого задания.
+        """
+        self.controller = controller
+        self.results_dir = Path(results_dir)
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.on_update = on_update
+        self.logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report")
+        # Отдельный поток для предпросмотра: не ждёт, пока освободятся генераторы отчётов
+        self._preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-preview")
+        self._jobs: dict[int, ReportJob] = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def _notify(self, job: ReportJob):
+        if self.on_update is not None:
+            try:
+                self.on_update(job.info())
+            except Exception as e:
+                self.logger.error(f"Report job {job.id} update handler failed: {e}")
+
+    def submit(self, kind: str, file_name: str | Path | None = None, title: str | None = None, **params) -> ReportJobInfo:
+        """
+        Ставит отчёт в очередь.
+
+        :param kind: Вид отчёта (ключ REPORT_BUILDERS).
+        :param file_name: Путь к файлу; относительный — внутри папки результатов,
+                          None — имя по виду отчёта, номеру задания и времени постановки.
+        :param params: Параметры построителя (comments, location_id, emp_id).
+        """
+        if kind not in REPORT_BUILDERS:
+            raise ValueError(f"Unknown report kind: {kind!r}")
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            if file_name is None:
+                file_name = f"{kind}_{job_id}_{datetime.now():%Y%m%d_%H%M%S}.docx"
+            job = ReportJob(job_id, kind, title or kind, self.results_dir / file_name, self._notify)
+            self._jobs[job_id] = job
+        self._notify(job)
+        job.future = self._executor.submit(self._run, job, params)
+        return job.info()
+
+    def _run(self, job: ReportJob, params: dict):
+        job.status = "running"
+        part_path = job.path.with_name(job.path.name + ".part")
+        try:
+            job.update(0, "Запуск")
+            job.path.parent.mkdir(parents=True, exist_ok=True)
+            REPORT_BUILDERS[job.kind](self.controller, job, part_path, **params)
+            job.check_cancelled()
+            os.replace(part_path, job.path)
+        except ReportCancelled:
+            part_path.unlink(missing_ok=True)
+            job.finish("cancelled")
+        except Exception as e:
+            part_path.unlink(missing_ok=True)
+            self.logger.error(f"Report job {job.id} ({job.kind}) failed: {e}")
+            job.finish("failed", str(e))
+        else:
+            # Файл уже на месте: отмена после переименования не учитывается
+            job.stage = "Готово"
+            job.finish("done")
+
+    def run(self, func: Callable, *args, **kwargs) -> Future:
+        """Выполняет вспомогательную задачу (например, загрузку предпросмотра отчёта) вне очереди заданий."""
+        return self._preview_executor.submit(func, *args, **kwargs)
+
+    def cancel(self, job_id: int) -> bool:
+        """Отменяет задание; False — задание не найдено или уже завершено."""
+        job = self._jobs.get(job_id)
+        if job is None or job.status in ("done", "failed", "cancelled"):
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Задание ещё не начало выполняться: рабочий поток его не увидит
+            job.finish("cancelled")
+        return True
+
+    def job(self, job_id: int) -> ReportJobInfo | None:
+        job = self._jobs.get(job_id)
+        return job.info() if job is not None else None
+
+    def jobs(self) -> list[ReportJobInfo]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.info() for job in jobs]
+
+    def wait(self, job_ids: list[int] | None = None, timeout: float | None = None) -> list[ReportJobInfo]:
+        """Ждёт завершения заданий (по умолчанию всех) и возвращает их состояние."""
+        with self._lock:
+            jobs = [self._jobs[job_id] for job_id in job_ids] if job_ids is not None else list(self._jobs.values())
+        wait([job.future for job in jobs if job.future is not None], timeout=timeout)
+        return [job.info() for job in jobs]
+
+    def shutdown(self, cancel: bool = True):
+        """Останавливает пул; cancel — отменить незавершённые задания, а не дожидаться их."""
+        if cancel:
+            for job_id in list(self._jobs):
+                self.cancel(job_id)
+        self._preview_executor.shutdown(wait=True, cancel_futures=cancel)
+        self._executor.shutdown(wait=True)
+
+
+def submit_location_reports(queue: ReportQueue, comments: str = "", location_ids: list[int] | None = None) -> list[ReportJobInfo]:
+    """
+    Ставит в очередь отчёты о состоянии оборудования по каждой локации.
+
+    :param location_ids: Номера локаций; None — все локации из справочника.
+    """
+    locations = queue.controller.references.locations()
+    if location_ids is not None:
+        locations = [location for location in locations if location.id in location_ids]
+    stamp = f"{datetime.now():%Y%m%d}"
+    return [
+        queue.submit(
+            "equipment",
+            f"equipment_location{location.id}_{stamp}.docx",
+            title=f"Оборудование: {location.name}",
+            comments=comments,
+            location_id=location.id,
+        )
+        for location in locations
+    ]
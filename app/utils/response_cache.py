@@ -0,0 +1,150 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Iterable
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+class _CachedResponse:
+    __slots__ = ("body", "status_code", "media_type", "etag", "expires", "tables")
+
+    def __init__(self, body: bytes, status_code: int, media_type: str | None, etag: str, expires: float, tables: tuple[str, ...]):
+        self.body = body
+        self.status_code = status_code
+        self.media_type = media_type
+        self.etag = etag
+        self.expires = expires
+        self.tables = tables
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Слабое сравнение (RFC 9110): W/"x" совпадает с "x"
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+class ResponseCache:
+    """
+    Кэш готовых HTTP-ответов эндпоинтов API.
+
+    Ответ хранится ttl секунд под ключом (путь, строка запроса) и сбрасывается раньше,
+    если через DBController меняется одна из таблиц, от которых зависит страница
+    (см. DBController.add_change_listener). Ответы несут ETag: при совпадении
+    If-None-Match возвращается 304 без тела. Изменения, сделанные в обход DBController
+    или другим процессом, станут видны не позже чем через ttl.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, _CachedResponse] = OrderedDict()
+        # Счётчик изменений таблицы: ответ, рендер которого начался до изменения, не кэшируется
+        self._generations: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def invalidate(self, table: str | None = None):
+        """Сбрасывает ответы, зависящие от таблицы, или, без аргументов, все ответы."""
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                for name in self._generations:
+                    self._generations[name] += 1
+                self.invalidations += 1
+                return
+            if table not in self._generations:
+                return
+            self._generations[table] += 1
+            for key in [key for key, entry in self._entries.items() if table in entry.tables]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def _lookup(self, key: tuple) -> _CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(self, key: tuple, entry: _CachedResponse, generations: tuple[int, ...]):
+        with self._lock:
+            if generations != tuple(self._generations[table] for table in entry.tables):
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def cached(self, ttl: float, tables: Iterable[str] = (), max_age: int | None = None) -> Callable:
+        """
+        Декоратор эндпоинта, возвращающего Response и принимающего request: Request.
+
+        :param ttl: Сколько секунд хранить ответ на сервере.
+        :param tables: Таблицы, изменение которых сбрасывает ответ.
+        :param max_age: Cache-Control max-age для браузера; None — no-cache
+                        (браузер хранит страницу, но каждый раз сверяет ETag).
+        """
+        tables = tuple(tables)
+        with self._lock:
+            for table in tables:
+                self._generations.setdefault(table, 0)
+        cache_control = "no-cache" if max_age is None else f"public, max-age={max_age}"
+
+        def decorator(endpoint: Callable) -> Callable:
+            @wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                request: Request = kwargs["request"]
+                key = (request.url.path, request.url.query)
+                if_none_match = request.headers.get("if-none-match")
+
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    with self._lock:
+                        generations = tuple(self._generations[table] for table in tables)
+                    response = await endpoint(*args, **kwargs)
+                    body = getattr(response, "body", None)
+                    if response.status_code != 200 or body is None:
+                        return response
+                    entry = _CachedResponse(body, response.status_code, response.media_type, _etag(body), time.monotonic() + ttl, tables)
+                    self._store(key, entry, generations)
+
+                headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+                if _etag_matches(if_none_match, entry.etag):
+                    self.not_modified += 1
+                    return Response(status_code=304, headers=headers)
+                return Response(content=entry.body, status_code=entry.status_code, media_type=entry.media_type, headers=headers)
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,77 @@
+import time
+import threading
+
+from utils.shemas import TableSchema
+
+
+class SchemaCache:
+    """
+    Кэш метаданных схемы: столбцы таблиц (тип, NULL, IDENTITY, первичный ключ),
+    список таблиц и параметры хранимых процедур.
+
+    Метаданные загружаются лениво при первом обращении и меняются только при миграциях,
+    поэтому не чаще раза в check_interval секунд кэш сверяется с версией схемы
+    (для SQL Server — MAX(modify_date) из sys.objects) и сбрасывается целиком, если она изменилась.
+    Запросы к метаданным выполняет backend контроллера.
+    """
+
+    def __init__(self, controller, check_interval: float = 60.0):
+        self.controller = controller
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._tables: dict[str, TableSchema] = {}
+        self._table_names: list[str] | None = None
+        self._procedures: dict[str, list[dict[str, str]]] = {}
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self, table_name: str | None = None):
+        """Сбрасывает кэш таблицы или, без аргументов, весь кэш."""
+        with self._lock:
+            if table_name is not None:
+                self._tables.pop(table_name, None)
+                return
+            self._tables.clear()
+            self._procedures.clear()
+            self._table_names = None
+
+    def _ensure_fresh(self):
+        # Проверка и запрос версии под блокировкой: по истечении интервала версию читает один поток,
+        # остальные ждут его и видят уже обновлённое время проверки
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            version = self.controller.backend.schema_version(self.controller)
+            if self._version is not None and version != self._version:
+                self.invalidate()
+            self._version = version
+
+    def tables(self) -> list[str]:
+        """Имена пользовательских таблиц базы данных."""
+        self._ensure_fresh()
+        with self._lock:
+            if self._table_names is None:
+                self._table_names = self.controller.backend.table_names(self.controller)
+            return list(self._table_names)
+
+    def table(self, table_name: str) -> TableSchema:
+        """Описание столбцов таблицы в порядке их объявления."""
+        self._ensure_fresh()
+        with self._lock:
+            schema = self._tables.get(table_name)
+            if schema is None:
+                schema = TableSchema(name=table_name, columns=self.controller.backend.table_columns(self.controller, table_name))
+                self._tables[table_name] = schema
+            return schema
+
+    def procedure_params(self, proc_name: str) -> list[dict[str, str]]:
+        """Параметры хранимой процедуры и их типы в порядке объявления."""
+        self._ensure_fresh()
+        with self._lock:
+            params = self._procedures.get(proc_name)
+            if params is None:
+                params = self.controller.backend.procedure_params(self.controller, proc_name)
+                self._procedures[proc_name] = params
+            return params
@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional, Any, Literal
+from datetime import date, datetime
 
 # Модель для таблицы Locations
 class Location(BaseModel):
@@ -31,6 +31,14 @@ class Employee(BaseModel):
     login: str
     password_hash: str
 
+class EmployeeRecord(BaseModel):
+    id: int
+    location_id: int
+    first_name: str
+    second_name: str | None = None
+    last_name: str
+    role: str
+
 # Модель для таблицы Consumables
 class Consumable(BaseModel):
     id: int
@@ -181,3 +189,174 @@ class RepairRecord(BaseModel):
     legal_entity: str
     repair_cost: float
     
+
+# Метрики пула соединений
+class PoolStats(BaseModel):
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    max_size: int
+    checkouts: int
+    timeouts: int
+    created: int
+    recycled: int
+    failed_health_checks: int
+    wait_time_total: float
+    wait_time_max: float
+    checkout_latency_avg: float
+    checkout_latency_max: float
+
+
+# Метрики повторного использования запросов (utils.statements)
+class StatementStat(BaseModel):
+    sql: str
+    executions: int
+    prepares: int  # выполнений на новом курсоре (запрос подготавливается заново)
+    reuse_rate: float
+
+class PlanCacheStat(BaseModel):
+    objtype: str  # Adhoc, Prepared, Proc
+    plans: int
+    single_use_plans: int
+    use_counts: int
+    hit_rate: float
+
+class StatementStats(BaseModel):
+    templates: int
+    template_hits: int
+    template_misses: int
+    executions: int
+    cursor_hits: int
+    cursor_misses: int
+    cursor_hit_rate: float
+    statements: list[StatementStat]
+    server_plan_cache: list[PlanCacheStat] | None = None
+
+
+# Статистика запросов по отпечатку, методу DBController и источнику вызова (utils.query_stats)
+class QueryStat(BaseModel):
+    fingerprint: str
+    method: str
+    caller: str
+    count: int
+    errors: int
+    duration_total: float
+    duration_max: float
+    rows_total: int
+    bytes_total: int
+    buckets: list[int]
+
+
+# Трассировка HTTP-запросов (utils.tracing)
+class TraceSpan(BaseModel):
+    name: str
+    category: str  # db, render, app
+    start_ms: float
+    duration_ms: float
+
+class TraceRecord(BaseModel):
+    trace_id: str
+    method: str
+    path: str
+    route: str | None
+    status: int | None
+    started_at: datetime
+    duration_ms: float
+    dropped_spans: int = 0
+    spans: list[TraceSpan]
+
+
+# Условие фильтрации столбца для постраничных выборок
+class ColumnFilter(BaseModel):
+    op: Literal["eq", "prefix", "contains", "range", "in"] = "eq"
+    value: Any = None
+    value_to: Any = None
+
+
+# Метаданные схемы БД
+class ColumnInfo(BaseModel):
+    name: str
+    data_type: str
+    is_nullable: bool = True
+    is_identity: bool = False
+    is_primary_key: bool = False
+    is_computed: bool = False
+
+class TableSchema(BaseModel):
+    name: str
+    columns: list[ColumnInfo]
+
+
+# Результат бронирования зала (процедуры BookRoom / UpsertClient)
+class BookingResult(BaseModel):
+    status: Literal["ok", "penalties", "overlap"]
+    client_id: int | None = None
+    schedule_id: int | None = None
+
+
+# JSON API (/api/v1)
+class RoomDetails(Room):
+    equipment: list[EquipmentRecord]
+
+class RoomAvailability(BaseModel):
+    room_id: int
+    day: date
+    free_hours: list[int]
+    # Час начала -> допустимые продолжительности бронирования
+    durations: dict[int, list[int]]
+
+class BookingSlot(BaseModel):
+    id: int
+    room_id: int
+    start_time: datetime
+    duration_hours: int
+    status: str
+
+class BookingRequest(BaseModel):
+    room_id: int
+    start_time: datetime
+    duration_hours: int = Field(ge=1, le=6)
+    name: str
+    phone_number: str
+    email: str | None = None
+
+class RoomAvailabilityRow(BaseModel):
+    room_id: int
+    name: str
+    # По дням: символ i — час open_hour + i, "1" — свободен
+    free: list[str]
+
+class AvailabilityMatrix(BaseModel):
+    location_id: int
+    start: date
+    days: int
+    open_hour: int
+    close_hour: int
+    rooms: list[RoomAvailabilityRow]
+
+
+# Сообщение чата (таблица ChatMessages); seq — id сообщения, растёт с каждым сообщением
+class ChatMessage(BaseModel):
+    seq: int
+    username: str
+    message: str | None = None
+    file: str | None = None
+    # SHA-256 содержимого вложения; None — файл из static/uploads, загруженный до хранилища вложений
+    file_hash: str | None = None
+    created_at: datetime
+
+
+# Задание генерации отчёта (utils.reports.ReportQueue)
+class ReportJobInfo(BaseModel):
+    id: int
+    kind: str
+    title: str
+    status: Literal["queued", "running", "done", "failed", "cancelled"]
+    # Готовность в процентах и текущий этап
+    progress: int = 0
+    stage: str = ""
+    path: str
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
@@ -0,0 +1,102 @@
+"""
+Хранимые процедуры JamStation для SQLiteBackend, реализованные на Python.
+Поведение повторяет Scripts/AddEmployee.sql, Scripts/CheckEmployeePassword.sql
+и Scripts/BookRoom.sql. Каждая процедура получает соединение и параметры в порядке
+объявления и возвращает имена столбцов и строки результата.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+# Типы параметров для DBController.get_procedure_params
+SQL_TYPES = {int: "int", str: "nvarchar", bool: "bit", datetime: "datetime"}
+
+# Бронирование длится не больше 6 часов (chk_duration_hours)
+MAX_DURATION = 6
+
+
+def password_hash(password: str) -> str:
+    # SHA2_256 от NVARCHAR (UTF-16LE), как HASHBYTES в AddEmployee
+    return hashlib.sha256(password.encode("utf-16-le")).hexdigest()
+
+def _begin_write(connection):
+    # BEGIN IMMEDIATE сразу берёт блокировку записи: проверка и вставка
+    # выполняются без параллельных писателей (аналог UPDLOCK, HOLDLOCK)
+    if not connection.in_transaction:
+        connection.execute("BEGIN IMMEDIATE")
+
+
+def add_employee(connection, LocationId: int, FirstName: str, SecondName: str, LastName: str, Role: str,
+                 PhoneNumber: str, Email: str, Login: str, Password: str):
+    connection.execute(
+        """
+        INSERT INTO Employees (location_id, first_name, second_name, last_name, role, phone_number, email, login, password_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (LocationId, FirstName, SecondName, LastName, Role, PhoneNumber, Email, Login, password_hash(Password)),
+    )
+    return ["Status"], [(0,)]
+
+def check_employee_password(connection, EmployeeLogin: str, Password: str):
+    row = connection.execute("SELECT password_hash FROM Employees WHERE login = ?", (EmployeeLogin,)).fetchone()
+    is_correct = row is not None and row[0] == password_hash(Password)
+    return ["IsPasswordCorrect"], [(int(is_correct),)]
+
+def _upsert_client(connection, name: str, phone_number: str, email: str | None) -> tuple[int, bool]:
+    row = connection.execute("SELECT id FROM Clients WHERE phone_number = ?", (phone_number,)).fetchone()
+    if row is None:
+        cursor = connection.execute(
+            "INSERT INTO Clients (name, phone_number, email) VALUES (?, ?, ?) RETURNING id",
+            (name, phone_number, email),
+        )
+        return cursor.fetchone()[0], False
+
+    client_id = row[0]
+    return client_id, _has_penalties(connection, client_id)
+
+def _has_penalties(connection, client_id: int) -> bool:
+    penalty = connection.execute(
+        "SELECT 1 FROM Penalties WHERE client_id = ? AND written_off IS NULL LIMIT 1", (client_id,)
+    ).fetchone()
+    return penalty is not None
+
+def register_client(connection, Name: str, PhoneNumber: str, Email: str):
+    _begin_write(connection)
+    client_id, has_penalties = _upsert_client(connection, Name, PhoneNumber, Email)
+    return ["ClientId", "HasPenalties"], [(client_id, has_penalties)]
+
+def book_room(connection, RoomId: int, StartTime: datetime, Duration: int, IsPaid: bool = False,
+              ClientId: int = None, Name: str = None, PhoneNumber: str = None, Email: str = None):
+    # Status: 0 — бронирование создано, 1 — у клиента есть штрафы, 2 — время занято
+    _begin_write(connection)
+    end_time = StartTime + timedelta(hours=Duration)
+    overlap = connection.execute(
+        "SELECT 1 FROM Schedules WHERE room_id = ? AND start_time > ? AND start_time < ? AND end_time > ? LIMIT 1",
+        (RoomId, StartTime - timedelta(hours=MAX_DURATION), end_time, StartTime),
+    ).fetchone()
+    if overlap is not None:
+        return ["Status", "ClientId", "ScheduleId"], [(2, ClientId, None)]
+
+    if ClientId is None:
+        ClientId, has_penalties = _upsert_client(connection, Name, PhoneNumber, Email)
+    else:
+        has_penalties = _has_penalties(connection, ClientId)
+    if has_penalties:
+        return ["Status", "ClientId", "ScheduleId"], [(1, ClientId, None)]
+
+    cursor = connection.execute(
+        """
+        INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, is_paid, status)
+        VALUES (?, ?, ?, ?, ?, 'Активно')
+        RETURNING id
+        """,
+        (RoomId, ClientId, StartTime, Duration, int(bool(IsPaid))),
+    )
+    return ["Status", "ClientId", "ScheduleId"], [(0, ClientId, cursor.fetchone()[0])]
+
+
+PROCEDURES = {
+    "AddEmployee": add_employee,
+    "CheckEmployeePassword": check_employee_password,
+    "RegisterClient": register_client,
+    "BookRoom": book_room,
+}
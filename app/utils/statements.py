@@ -0,0 +1,143 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from utils.shemas import StatementStat, StatementStats
+
+
+class StatementRegistry:
+    """
+    Реестр параметризованных запросов DBController.
+
+    Запросы, которые собираются из частей (select, paginate_table, load_checks...),
+    строятся один раз для каждой «формы» — имени таблицы, набора столбцов и условий, —
+    а все значения передаются параметрами. Поэтому сервер видит фиксированный набор
+    текстов запросов и повторно использует их планы вместо компиляции ad-hoc плана
+    для каждого значения.
+
+    Для каждого соединения хранятся курсоры по тексту запроса (LRU, max_cursors штук):
+    pyodbc не подготавливает запрос повторно, если курсор выполняет тот же текст,
+    что и в прошлый раз. Доля таких выполнений — cursor_hit_rate в stats().
+    """
+
+    def __init__(self, max_cursors: int = 32, max_statements: int = 256):
+        """
+        :param max_cursors: Сколько курсоров хранить на одно соединение.
+        :param max_statements: Для скольких текстов запросов хранить статистику и сколько
+                               шаблонов запросов хранить (LRU: форма запроса зависит от фильтров).
+        """
+        self.max_cursors = max_cursors
+        self.max_statements = max_statements
+        self._lock = threading.Lock()
+        self._templates: OrderedDict[tuple, str] = OrderedDict()
+        self._template_hits = 0
+        self._template_misses = 0
+        self._cursors: dict[int, OrderedDict[str, Any]] = {}
+        # Текст запроса -> [выполнений, подготовок]
+        self._stats: OrderedDict[str, list[int]] = OrderedDict()
+        self._executions = 0
+        self._cursor_hits = 0
+
+    def template(self, key: tuple, build: Callable[[], str]) -> str:
+        """
+        Текст запроса для формы key; build вызывается только при первом обращении.
+
+        :param key: Форма запроса: имя шаблона и всё, что меняет текст (таблица, столбцы, условия), но не значения.
+        :param build: Функция, строящая текст запроса с плейсхолдерами.
+        """
+        with self._lock:
+            query = self._templates.get(key)
+            if query is not None:
+                self._templates.move_to_end(key)
+                self._template_hits += 1
+                return query
+        query = build()
+        with self._lock:
+            if key not in self._templates:
+                self._template_misses += 1
+                self._templates[key] = query
+                if len(self._templates) > self.max_statements:
+                    self._templates.popitem(last=False)
+            return self._templates[key]
+
+    def cursor(self, connection, query: str) -> Any:
+        """
+        Курсор соединения, последним выполнявший query, или новый курсор.
+        Соединение в каждый момент используется одним потоком, поэтому курсор не разделяется.
+        """
+        evicted = None
+        with self._lock:
+            self._executions += 1
+            stat = self._stats.get(query)
+            if stat is None:
+                stat = self._stats[query] = [0, 0]
+                if len(self._stats) > self.max_statements:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(query)
+            stat[0] += 1
+
+            cursors = self._cursors.setdefault(id(connection), OrderedDict())
+            cursor = cursors.get(query)
+            if cursor is not None:
+                cursors.move_to_end(query)
+                self._cursor_hits += 1
+                return cursor
+            stat[1] += 1
+
+        cursor = connection.cursor()
+        with self._lock:
+            cursors[query] = cursor
+            if len(cursors) > self.max_cursors:
+                _, evicted = cursors.popitem(last=False)
+        if evicted is not None:
+            evicted.close()
+        return cursor
+
+    def discard(self, connection, query: str):
+        """Закрывает курсор запроса (например, после ошибки выполнения)."""
+        with self._lock:
+            cursor = self._cursors.get(id(connection), {}).pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def forget(self, connection):
+        """Закрывает все курсоры соединения; вызывается пулом перед закрытием соединения."""
+        with self._lock:
+            cursors = self._cursors.pop(id(connection), None)
+        for cursor in (cursors or {}).values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+    def stats(self, top: int = 20) -> StatementStats:
+        """
+        Снимок метрик реестра.
+
+        :param top: Сколько самых частых запросов включить в statements.
+        """
+        with self._lock:
+            executions = self._executions
+            statements = sorted(self._stats.items(), key=lambda item: item[1][0], reverse=True)[:top]
+            return StatementStats(
+                templates=len(self._templates),
+                template_hits=self._template_hits,
+                template_misses=self._template_misses,
+                executions=executions,
+                cursor_hits=self._cursor_hits,
+                cursor_misses=executions - self._cursor_hits,
+                cursor_hit_rate=self._cursor_hits / executions if executions else 0.0,
+                statements=[
+                    StatementStat(
+                        sql=" ".join(query.split()),
+                        executions=count,
+                        prepares=prepares,
+                        reuse_rate=1 - prepares / count if count else 0.0,
+                    )
+                    for query, (count, prepares) in statements
+                ],
+            )
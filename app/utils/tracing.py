@@ -0,0 +1,182 @@
+import re
+import time
+import uuid
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.shemas import TraceRecord, TraceSpan
+
+# Сколько спанов хранить в одной трассе; остальные только учитываются в итогах
+MAX_SPANS = 200
+
+_TRACE_ID = re.compile(r"^[A-Za-z0-9-]{8,64}$")
+
+
+class Trace:
+    """Трасса одного HTTP-запроса: спаны запросов к БД, рендеринга шаблонов и обработчика."""
+
+    def __init__(self, trace_id: str, method: str, path: str):
+        self.trace_id = trace_id
+        self.method = method
+        self.path = path
+        self.route: str | None = None
+        self.status: int | None = None
+        self.started_at = datetime.now()
+        self.duration = 0.0
+        self.dropped_spans = 0
+        self.spans: list[tuple[str, str, float, float]] = []
+        # Категория -> [суммарная длительность, количество]
+        self.totals: dict[str, list] = {}
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, category: str, started: float, duration: float):
+        """Добавляет спан; started — значение time.perf_counter() в начале спана."""
+        with self._lock:
+            total = self.totals.setdefault(category, [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append((name, category, started - self._started, duration))
+            else:
+                self.dropped_spans += 1
+
+    def finish(self, status: int, route: str | None = None):
+        """Закрывает спан обработчика: ответ начал отправляться."""
+        self.status = status
+        self.route = route
+        self.duration = time.perf_counter() - self._started
+
+    def server_timing(self) -> str:
+        """
+        Значение заголовка Server-Timing: время запросов к БД и рендеринга,
+        app — остальное время обработчика (Python), total — весь запрос.
+        """
+        with self._lock:
+            totals = {category: list(total) for category, total in self.totals.items()}
+        db, queries = totals.get("db", (0.0, 0))
+        render, _ = totals.get("render", (0.0, 0))
+        app = max(self.duration - db - render, 0.0)
+        return (
+            f'db;dur={db * 1000:.1f};desc="{queries} queries", '
+            f"render;dur={render * 1000:.1f}, app;dur={app * 1000:.1f}, total;dur={self.duration * 1000:.1f}"
+        )
+
+    def to_record(self) -> TraceRecord:
+        with self._lock:
+            spans = list(self.spans)
+        return TraceRecord(
+            trace_id=self.trace_id,
+            method=self.method,
+            path=self.path,
+            route=self.route,
+            status=self.status,
+            started_at=self.started_at,
+            duration_ms=self.duration * 1000,
+            dropped_spans=self.dropped_spans,
+            spans=[
+                TraceSpan(name=name, category=category, start_ms=start * 1000, duration_ms=duration * 1000)
+                for name, category, start, duration in spans
+            ],
+        )
+
+
+# Трасса текущего запроса; в потоки пула БД передаётся через AsyncDBController.run
+current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+
+def add_span(name: str, category: str, started: float, duration: float):
+    """Добавляет спан в трассу текущего запроса, если она есть."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(name, category, started, duration)
+
+@contextmanager
+def span(name: str, category: str = "app"):
+    """Замеряет блок with как спан трассы текущего запроса."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, category, started, time.perf_counter() - started)
+
+
+class TraceBuffer:
+    """Кольцевой буфер последних трасс для отладочного эндпоинта."""
+
+    def __init__(self, size: int = 200):
+        self._lock = threading.Lock()
+        self._traces: deque[Trace] = deque(maxlen=size)
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 50, min_duration: float = 0.0, path: str | None = None) -> list[TraceRecord]:
+        """Последние трассы (новые первыми), не короче min_duration секунд и, если задан, с нужным маршрутом."""
+        with self._lock:
+            traces = list(self._traces)
+        result = []
+        for trace in reversed(traces):
+            if trace.duration < min_duration or (path is not None and path not in (trace.path, trace.route)):
+                continue
+            result.append(trace.to_record())
+            if len(result) >= limit:
+                break
+        return result
+
+    def get(self, trace_id: str) -> TraceRecord | None:
+        with self._lock:
+            trace = next((trace for trace in self._traces if trace.trace_id == trace_id), None)
+        return trace.to_record() if trace is not None else None
+
+
+class TracingMiddleware:
+    """
+    ASGI-middleware трассировки: присваивает запросу trace id (или берёт его из заголовка
+    X-Trace-Id / X-Request-ID), собирает спаны и добавляет к ответу заголовки
+    Server-Timing и X-Trace-Id. Завершённые трассы попадают в TraceBuffer.
+    """
+
+    def __init__(self, app, buffer: TraceBuffer, exclude: tuple[str, ...] = ("/static", "/debug/traces")):
+        self.app = app
+        self.buffer = buffer
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming = (headers.get(b"x-trace-id") or headers.get(b"x-request-id") or b"").decode("latin-1")
+        trace_id = incoming if _TRACE_ID.match(incoming) else uuid.uuid4().hex
+        trace = Trace(trace_id, scope["method"], scope["path"])
+        token = current_trace.set(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                # Маршрутизатор записывает найденный маршрут в scope
+                route = getattr(scope.get("route"), "path", None)
+                trace.finish(message["status"], route)
+                message = dict(message)
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"server-timing", trace.server_timing().encode("latin-1")),
+                    (b"x-trace-id", trace_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            if trace.status is None:
+                trace.finish(500, getattr(scope.get("route"), "path", None))
+            self.buffer.add(trace)
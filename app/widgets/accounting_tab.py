@@ -14,7 +14,7 @@ class EquipmentInstrumentsTab(QWidget):
         super().__init__()
         self.db_controller = db_controller
         self.employee_id = employee_id
-        self.location = self.db_controller.select(["id", "name"], "Locations", location_id)
+        self.location = self.db_controller.references.location(location_id)
         self.current_view = "Equipment"  # 'equipment' or 'instruments'
         self.current_table = "accounting"
         self.init_ui()
@@ -45,7 +45,7 @@ class EquipmentInstrumentsTab(QWidget):
         #self.load_locations()
         self.room_selector.currentIndexChanged.connect(self.load_data)
         filter_layout.addWidget(QLabel(f"Локация: "))
-        filter_layout.addWidget(QLabel(f"{self.location[1]}"))
+        filter_layout.addWidget(QLabel(f"{self.location.name}"))
         #filter_layout.addWidget(self.location_selector)
         filter_layout.addWidget(QLabel("Зал:"))
         filter_layout.addWidget(self.room_selector)
@@ -69,15 +69,14 @@ class EquipmentInstrumentsTab(QWidget):
         self.update_filters()
 
     def update_filters(self):
-        location_id = self.location[0]
+        location_id = self.location.id
         if self.current_view == "Equipment" and location_id is not None:
-            query = "SELECT id, name FROM Rooms WHERE location_id = ?"
-            rooms = self.db_controller.execute_query(query, (location_id,))
+            rooms = self.db_controller.references.rooms(location_id)
             self.room_selector.clear()
             self.room_selector.addItem("Все залы", None)
 
             for room in rooms:
-                self.room_selector.addItem(room[1], room[0])
+                self.room_selector.addItem(room.name, room.id)
         self.load_data()
 
     def change_view(self):
@@ -98,7 +97,7 @@ class EquipmentInstrumentsTab(QWidget):
         self.load_data()
 
     def load_data(self):
-        location_id = self.location[0]
+        location_id = self.location.id
         room_id = self.room_selector.currentData() if self.current_view == "Equipment" else None
         if self.current_table == "accounting":
             records = self.db_controller.load_accounting(self.current_view, location_id, room_id)
@@ -154,7 +153,7 @@ class EquipmentInstrumentsTab(QWidget):
 
     def add_record(self):
         # Открытие диалогового окна
-        location_id = self.location[0]
+        location_id = self.location.id
         room_id = self.room_selector.currentData() if self.current_view == "Equipment" else None
         if self.current_view == "Equipment" and room_id is None:
             QMessageBox.warning(self, "Ошибка", "Для добавления новго оборудования выберите зал.")
@@ -179,6 +178,5 @@ class EquipmentInstrumentsTab(QWidget):
         else:
             table = "Repairs"
         self.db_controller.delete_by_id(table=table, id=record.id)
-        self.db_controller.connection.commit()
         QMessageBox.information(self, "Успех", "Запись успешно удалена.")
         self.load_data()
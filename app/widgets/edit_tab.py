@@ -14,7 +14,9 @@ class EditTab(QWidget):
         super().__init__()
         self.db_controller = db_controller
         self.current_table = None
-        self.current_offset = 0
+        # Курсоры начала каждой открытой страницы: страница k идёт после page_cursors[k]
+        self.page_cursors = [None]
+        self.last_row = None
         self.limit = 10
         self.column_filters = None
 
@@ -87,8 +89,7 @@ class EditTab(QWidget):
     def load_table_list(self):
         """Загрузка списка таблиц в выпадающий список"""
         try:
-            query = "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'"
-            tables = [row[0] for row in self.db_controller.execute_query(query)]
+            tables = self.db_controller.get_tables()
             self.table_selector.addItems(tables)
             if tables:
                 self.current_table = tables[0]
@@ -99,7 +100,7 @@ class EditTab(QWidget):
     def table_changed(self):
         """Загрузка данных выбранной таблицы"""
         self.current_table = self.table_selector.currentText()
-        self.current_offset = 0
+        self.page_cursors = [None]
         self.column_filters = None
         self.load_data()
 
@@ -114,14 +115,15 @@ class EditTab(QWidget):
                 return
 
             # Получение данных
-            data = self.db_controller.paginate_table(self.current_table, self.current_offset, self.limit, filters=self.column_filters)
+            data = self.db_controller.paginate_table_keyset(self.current_table, self.limit, after=self.page_cursors[-1], filters=self.column_filters)
             columns = self.db_controller.get_table_columns(self.current_table)
+            computed = self.db_controller.get_computed_columns(self.current_table)
             if not data:  # Если данных нет, отображаем метку
                 self.table.clear()
                 self.table.setRowCount(0)
                 self.table.setColumnCount(0)
                 self.no_data_label.show()
-                self.prev_button.setEnabled(self.current_offset > 0)
+                self.prev_button.setEnabled(len(self.page_cursors) > 1)
                 self.next_button.setEnabled(False)
                 return
             
@@ -135,13 +137,14 @@ class EditTab(QWidget):
             for row_idx, row in enumerate(data):
                 for col_idx, col_name in enumerate(columns):
                     item = QTableWidgetItem(str(row[col_name]))
-                    if col_idx == 0:  # Первый столбец (ID) неизменяем
+                    if col_idx == 0 or col_name in computed:  # ID и вычисляемые столбцы неизменяемы
                         item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled)
                     else:  # Остальные столбцы редактируемы
                         item.setFlags(Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable)
                     self.table.setItem(row_idx, col_idx, item)
 
-            self.prev_button.setEnabled(self.current_offset > 0)
+            self.last_row = data[-1]
+            self.prev_button.setEnabled(len(self.page_cursors) > 1)
             self.next_button.setEnabled(len(data) == self.limit)
 
         except Exception as e:
@@ -149,13 +152,13 @@ class EditTab(QWidget):
 
     def load_previous_page(self):
         """Загрузка предыдущей страницы"""
-        if self.current_offset >= self.limit:
-            self.current_offset -= self.limit
+        if len(self.page_cursors) > 1:
+            self.page_cursors.pop()
             self.load_data()
 
     def load_next_page(self):
         """Загрузка следующей страницы"""
-        self.current_offset += self.limit
+        self.page_cursors.append(self.db_controller.keyset_cursor(self.last_row))
         self.load_data()
 
     def selection_changed(self):
@@ -178,9 +181,10 @@ class EditTab(QWidget):
             QMessageBox.warning(self, "Ошибка", "Выберите таблицу для добавления записи.")
             return
 
-        # Получение списка колонок таблицы из базы данных
+        # Получение списка колонок таблицы из базы данных (без вычисляемых)
         try:
-            columns = self.db_controller.get_table_columns(self.current_table)
+            computed = self.db_controller.get_computed_columns(self.current_table)
+            columns = [column for column in self.db_controller.get_table_columns(self.current_table) if column not in computed]
         except Exception as e:
             QMessageBox.critical(self, "Ошибка", f"Не удалось получить список колонок: {e}")
             return
@@ -234,7 +238,6 @@ class EditTab(QWidget):
                 print(delete_query)
                 print(id_value)
                 self.db_controller.execute_query(delete_query, (id_value,))
-                self.db_controller.connection.commit()
                 self.load_data()  # Обновляем таблицу
                 QMessageBox.information(self, "Успех", "Запись успешно удалена.")
             except Exception as e:
@@ -250,9 +253,10 @@ class EditTab(QWidget):
             columns = [self.table.horizontalHeaderItem(i).text() for i in range(self.table.columnCount())]
             values = [self.table.item(current_row, i).text() for i in range(self.table.columnCount())]
             id_value = values[0]
-            update_query = f"UPDATE {self.current_table} SET " + ", ".join(f"{col} = ?" for col in columns[1:]) + " WHERE id = ?"
-            self.db_controller.execute_query(update_query, tuple(values[1:] + [id_value]))
-            self.db_controller.connection.commit()
+            computed = self.db_controller.get_computed_columns(self.current_table)
+            changes = [(col, value) for col, value in zip(columns[1:], values[1:]) if col not in computed]
+            update_query = f"UPDATE {self.current_table} SET " + ", ".join(f"{col} = ?" for col, _ in changes) + " WHERE id = ?"
+            self.db_controller.execute_query(update_query, tuple([value for _, value in changes] + [id_value]))
             self.save_button.setEnabled(False)
             QMessageBox.information(self, "Успех", "Изменения успешно сохранены.")
         except Exception as e:
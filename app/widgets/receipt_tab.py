@@ -10,7 +10,10 @@ class ReceiptTab(QWidget):
     def __init__(self, db_controller: DBController, employee_id):
         super().__init__()
         self.db_controller = db_controller
-        self.employee = self.db_controller.select(["id", "location_id", "first_name", "last_name"], "Employees", employee_id)
+        self.employee = self.db_controller.references.employee(employee_id)
+        self.location_id = self.employee.location_id
+        self.page_size = 20
+        self.last_cursor = None  # (created_at, id) последнего загруженного чека
         self.init_ui()
 
     def init_ui(self):
@@ -28,26 +31,46 @@ class ReceiptTab(QWidget):
         self.scroll_content = QWidget()
         self.scroll_layout = QVBoxLayout(self.scroll_content)
         self.scroll_area.setWidget(self.scroll_content)
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.scrolled)
         layout.addWidget(self.scroll_area)
 
+        # Кнопка подгрузки следующей страницы чеков
+        self.more_button = QPushButton("Загрузить ещё")
+        self.more_button.clicked.connect(self.load_next_page)
+        layout.addWidget(self.more_button)
+
         # Загрузка данных из БД и создание плиток
         self.load_receipts()
 
         self.setLayout(layout)
 
-    def load_receipts(self, offset=0, limit=1000):
+    def load_receipts(self):
+        """Перезагружает список чеков с первой страницы."""
         for i in reversed(range(self.scroll_layout.count())):
             widget = self.scroll_layout.itemAt(i).widget()
             if widget:
                 widget.deleteLater()
 
-        # Получение данных из БД
-        self.location_id = self.employee[1]
-        receipts = self.db_controller.select_all_receipts(self.location_id, offset, limit)
+        self.last_cursor = None
+        self.load_next_page()
+
+    def load_next_page(self):
+        """Подгружает следующую страницу чеков и добавляет плитки в конец списка."""
+        receipts = self.db_controller.select_all_receipts(self.location_id, limit=self.page_size, after=self.last_cursor)
 
         for receipt_record in receipts:
             self.add_receipt_tile(receipt_record)
 
+        if receipts:
+            last = receipts[-1].receipt
+            self.last_cursor = (last.created_at, last.id)
+        self.more_button.setEnabled(len(receipts) == self.page_size)
+
+    def scrolled(self, value):
+        # Докручено до конца списка — подгружаем следующую страницу
+        if value == self.scroll_area.verticalScrollBar().maximum() and self.more_button.isEnabled():
+            self.load_next_page()
+
     def add_receipt_tile(self, receipt_record: ReceiptRecord):
         # Создание плитки для чека
         tile = QFrame()
@@ -103,6 +126,6 @@ class ReceiptTab(QWidget):
                     child.widget().deleteLater()
 
     def new_receipt(self):
-        dialog = AddReceiptDialog(self.location_id, self.employee[0], self.db_controller, self)
+        dialog = AddReceiptDialog(self.location_id, self.employee.id, self.db_controller, self)
         if dialog.exec():
             self.load_receipts()  # Перезагрузка данных
\ No newline at end of file
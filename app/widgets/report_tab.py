@@ -1,19 +1,45 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QMessageBox
+from PyQt6.QtCore import Qt, QObject, pyqtSignal, QUrl
+from PyQt6.QtGui import QDesktopServices
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QMessageBox, QTableWidget,
+                             QTableWidgetItem, QProgressBar, QHeaderView, QAbstractItemView)
 
 from utils.controller import DBController
+from utils.reports import ReportQueue, submit_location_reports
+from utils.shemas import ReportJobInfo
 from forms.report_form import ReportWindow, StandartReportWindow
 
+STATUS_TITLES = {
+    "queued": "В очереди",
+    "running": "Формируется",
+    "done": "Готов",
+    "failed": "Ошибка",
+    "cancelled": "Отменён",
+}
+
+class ReportSignals(QObject):
+    # Испускается из рабочего потока очереди; слот выполняется в потоке интерфейса (queued connection)
+    job_updated = pyqtSignal(object)
+
 class ReportTab(QWidget):
-    def __init__(self, db_controller: DBController, emp_id):
+    def __init__(self, db_controller: DBController, emp_id, report_queue: ReportQueue, signals: ReportSignals):
         super().__init__()
         self.db_controller = db_controller
         self.emp_id = emp_id
 
+        # Очередь и её сигналы принадлежат главному окну и переживают пересоздание вкладки
+        self.report_queue = report_queue
+        self.job_rows: dict[int, int] = {}
+
         self.init_ui()
 
+        # Сначала подписка, затем текущее состояние: обновления, пришедшие позже, его только уточняют
+        signals.job_updated.connect(self.update_job)
+        for job in self.report_queue.jobs():
+            self.update_job(job)
+
     def init_ui(self):
         layout = QVBoxLayout()
-        self.setLayout(layout)        
+        self.setLayout(layout)
 
         self.status_report_button = QPushButton("Отчет о состоянии оборудования")
         self.status_report_button.clicked.connect(self.open_report)
@@ -25,23 +51,89 @@ class ReportTab(QWidget):
 
         layout.addWidget(self.standart_report_button)
 
-    def open_report(self):
-        # Открытие диалогового окна
+        self.locations_report_button = QPushButton("Отчеты по всем локациям")
+        self.locations_report_button.clicked.connect(self.generate_location_reports)
+
+        layout.addWidget(self.locations_report_button)
+
+        # Задания генерации отчётов
+        self.jobs_table = QTableWidget(0, 4)
+        self.jobs_table.setHorizontalHeaderLabels(["Отчет", "Статус", "Готовность", "Файл"])
+        self.jobs_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.jobs_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.jobs_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        layout.addWidget(self.jobs_table)
+
+        buttons_layout = QHBoxLayout()
+        self.cancel_job_button = QPushButton("Отменить")
+        self.cancel_job_button.clicked.connect(self.cancel_job)
+        buttons_layout.addWidget(self.cancel_job_button)
+
+        self.open_folder_button = QPushButton("Открыть папку с отчетами")
+        self.open_folder_button.clicked.connect(self.open_results_folder)
+        buttons_layout.addWidget(self.open_folder_button)
+        layout.addLayout(buttons_layout)
+
+    def update_job(self, job: ReportJobInfo):
+        # Строка задания создаётся при первом обновлении
+        row = self.job_rows.get(job.id)
+        if row is None:
+            row = self.jobs_table.rowCount()
+            self.jobs_table.insertRow(row)
+            self.job_rows[job.id] = row
+            title_item = QTableWidgetItem(job.title)
+            title_item.setData(Qt.ItemDataRole.UserRole, job.id)
+            self.jobs_table.setItem(row, 0, title_item)
+            self.jobs_table.setCellWidget(row, 2, QProgressBar())
+            self.jobs_table.setItem(row, 3, QTableWidgetItem(job.path))
+
+        status = STATUS_TITLES[job.status]
+        if job.status == "running" and job.stage:
+            status = f"{status}: {job.stage}"
+        elif job.status == "failed" and job.error:
+            status = f"{status}: {job.error}"
+        self.jobs_table.setItem(row, 1, QTableWidgetItem(status))
+        self.jobs_table.cellWidget(row, 2).setValue(job.progress)
+
+    def selected_job_id(self) -> int | None:
+        row = self.jobs_table.currentRow()
+        if row < 0:
+            return None
+        return self.jobs_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+
+    def cancel_job(self):
+        job_id = self.selected_job_id()
+        if job_id is None:
+            QMessageBox.warning(self, "Ошибка", "Выберите отчет")
+            return
+        if not self.report_queue.cancel(job_id):
+            QMessageBox.information(self, "Отчет", "Отчет уже сформирован или отменен")
+
+    def open_results_folder(self):
+        QDesktopServices.openUrl(QUrl.fromLocalFile(str(self.report_queue.results_dir.resolve())))
+
+    def generate_location_reports(self):
         try:
-            self.db_controller.select(["id"], "Checks")
-            dialog = ReportWindow(self.db_controller, self)
-            if dialog.exec():
-                QMessageBox.information(self, "Успех", "Сохранено")
+            jobs = submit_location_reports(self.report_queue)
         except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Не удалось получить данные: {e}")
+            QMessageBox.critical(self, "Ошибка", f"Не удалось получить список локаций: {e}")
+            return
+        QMessageBox.information(self, "Успех", f"Поставлено в очередь отчетов: {len(jobs)}")
+
+    def open_report(self):
+        # Открытие диалогового окна
+        # Данные для предпросмотра окно загружает в фоне и само сообщает об ошибке
+        dialog = ReportWindow(self.db_controller, self.report_queue, self)
+        if dialog.exec():
+            QMessageBox.information(self, "Успех", "Отчет поставлен в очередь")
 
     def open_standart_report(self):
         # Открытие диалогового окна
         try:
             #self.db_controller.select(["id"], "Checks")
-            dialog = StandartReportWindow(self.db_controller, self, self.emp_id)
+            dialog = StandartReportWindow(self.db_controller, self.report_queue, self, self.emp_id)
         except Exception as e:
             #QMessageBox.critical(self, "Ошибка", f"Не удалось получить данные: {e}")
             return
         if dialog.exec():
-            QMessageBox.information(self, "Успех", "Сохранено")
\ No newline at end of file
+            QMessageBox.information(self, "Успех", "Отчет поставлен в очередь")
@@ -14,7 +14,7 @@ class ScheduleTab(QWidget):
     def __init__(self, db_controller: DBController, location_id):
         super().__init__()
         self.db_controller = db_controller
-        self.location = self.db_controller.select(["id", "name"], "Locations", location_id)
+        self.location = self.db_controller.references.location(location_id)
         self.init_ui()
 
     def init_ui(self):
@@ -24,7 +24,7 @@ class ScheduleTab(QWidget):
         # Выбор локации
         location_layout = QHBoxLayout()
         location_layout.addWidget(QLabel("Локация:"))
-        location_layout.addWidget(QLabel(f"{self.location[1]}"))
+        location_layout.addWidget(QLabel(f"{self.location.name}"))
 
         # Выбор зала
         room_layout = QHBoxLayout()
@@ -57,18 +57,17 @@ class ScheduleTab(QWidget):
         self.load_rooms()
 
     def load_rooms(self):
-        location_id = self.location[0]
+        location_id = self.location.id
         if location_id is not None:
-            query = "SELECT id, name FROM Rooms WHERE location_id = ?"
-            rooms = self.db_controller.execute_query(query, (location_id,))
+            rooms = self.db_controller.references.rooms(location_id)
             self.room_selector.clear()
             self.room_selector.addItem("Все залы", None)  # Опция для выбора всех залов
             for room in rooms:
-                self.room_selector.addItem(room[1], room[0])
+                self.room_selector.addItem(room.name, room.id)
             self.load_schedule()  # Обновить расписание при изменении зала
 
     def load_schedule(self):
-        location_id = self.location[0]
+        location_id = self.location.id
         room_id = self.room_selector.currentData()
         qdate = self.date_selector.date()
         date = d(qdate.year(), qdate.month(), qdate.day())
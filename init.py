@@ -11,12 +11,25 @@ DB_NAME = "JamStation"
 SQL_TABLES_PATH = os.path.join("Scripts", "JamStationTables.sql")
 SQL_PROCS_ADDEM_PATH = os.path.join("Scripts", "AddEmployee.sql")
 SQL_PROCS_CHECKEMP_PATH = os.path.join("Scripts", "CheckEmployeePassword.sql")
+SQL_INDEXES_PATH = os.path.join("Scripts", "ScheduleIndexes.sql")
+SQL_BOOKING_PATH = os.path.join("Scripts", "BookRoom.sql")
+SQL_CHAT_PATH = os.path.join("Scripts", "ChatMessages.sql")
 PROC_ADDEMP_NAME = "AddEmployee"
 PROC_CHECKEMP_NAME = "CheckEmployeePassword"
 
 logger.info(f"Current working directory: {os.getcwd()}")
 logger.info(f"Available files: {os.listdir(os.path.join(os.getcwd(), 'Scripts'))}")
 
+def run_script(cursor, path: str):
+    """Выполняет SQL-скрипт по частям, разделённым GO, и фиксирует транзакцию."""
+    with open(path, "r", encoding="utf-8") as sql_file:
+        statements = sql_file.read().split("GO")
+    for statement in statements:
+        if statement.strip():
+            cursor.execute(statement)
+    cursor.commit()
+    logger.info(f"Script '{path}' applied.")
+
 def wait_for_db():
     while True:
         try:
@@ -74,24 +87,8 @@ def ensure_database_and_tables():
         logger.info(f"{proc_exists}")
         if not proc_exists:
             logger.info(f"Procedures do not exist. Creating them...")
-            with open(SQL_PROCS_ADDEM_PATH, "r", encoding="utf-8") as sql_file:
-                cursor.execute(f'use {DB_NAME}')
-                cursor.commit()
-                sql_script = sql_file.read()
-                statements = sql_script.split("GO")
-                for statement in statements:
-                    if statement.strip():
-                        cursor.execute(statement)
-            connection.commit()
-            with open(SQL_PROCS_CHECKEMP_PATH, "r", encoding="utf-8") as sql_file:
-                cursor.execute(f'use {DB_NAME}')
-                cursor.commit()
-                sql_script = sql_file.read()
-                statements = sql_script.split("GO")
-                for statement in statements:
-                    if statement.strip():
-                        cursor.execute(statement)
-            connection.commit()
+            run_script(cursor, SQL_PROCS_ADDEM_PATH)
+            run_script(cursor, SQL_PROCS_CHECKEMP_PATH)
             logger.info("Procedures created successfully from the script.")
 
         # Подключаемся к новой базе данных
@@ -117,22 +114,25 @@ def ensure_database_and_tables():
 
         if table_count == 0:
             logger.info("No tables found in the database. Executing the SQL script to create tables...")
-            with open(SQL_TABLES_PATH, "r", encoding="utf-8") as sql_file:
-                sql_script = sql_file.read()
-                statements = sql_script.split("GO")
-                for statement in statements:
-                    if statement.strip():
-                        cursor.execute(statement)
-            connection.commit()
+            run_script(cursor, SQL_TABLES_PATH)
             logger.info("Tables created successfully from the script.")
 
+        # Идемпотентные миграции индексов для уже существующих баз
+        run_script(cursor, SQL_INDEXES_PATH)
+
+        # Таблица истории чата для баз, созданных до её появления
+        run_script(cursor, SQL_CHAT_PATH)
+
+        # Процедуры бронирования (CREATE OR ALTER) обновляются при каждом запуске
+        run_script(cursor, SQL_BOOKING_PATH)
+
         connection.close()
 
     except pyodbc.Error as e:
         logger.error(f"An error occurred while ensuring database or tables: {e}")
         raise
-    except FileNotFoundError:
-        logger.error(f"SQL script file '{SQL_TABLES_PATH}' not found.")
+    except FileNotFoundError as e:
+        logger.error(f"SQL script file '{e.filename}' not found.")
         raise
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import hashlib
+
+from conftest import tomorrow_at
+
+
+def test_locations_etag_and_not_modified(client, api_data):
+    response = client.get("/api/v1/locations")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert any(location["id"] == api_data["location_id"] for location in response.json())
+
+    cached = client.get("/api/v1/locations", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert client.get("/api/v1/locations", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_cached_page_changes_after_insert(client, api, api_data):
+    etag = client.get("/api/v1/locations").headers["etag"]
+    api.db_controller.controller.insert("Locations", {"name": "Новая", "address": "-", "phone_number": "2"})
+    response = client.get("/api/v1/locations", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "Новая" in {location["name"] for location in response.json()}
+
+
+def test_booking_overlap_returns_conflict(client, api_data):
+    room_id = api_data["room_ids"][0]
+    booking = {"room_id": room_id, "duration_hours": 3, "name": "Пётр", "phone_number": "+70000000002"}
+    created = client.post("/api/v1/bookings", json={**booking, "start_time": tomorrow_at(12).isoformat()})
+    assert created.status_code == 201
+    assert created.json()["status"] == "ok"
+
+    # 14:00 внутри бронирования 12:00–15:00
+    overlap = client.post("/api/v1/bookings", json={**booking, "start_time": tomorrow_at(14).isoformat()})
+    assert overlap.status_code == 409
+    availability = client.get(f"/api/v1/rooms/{room_id}/availability", params={"date": tomorrow_at(12).date().isoformat()})
+    assert not {12, 13, 14} & set(availability.json()["free_hours"])
+
+    assert client.post("/api/v1/bookings", json={**booking, "start_time": tomorrow_at(15).isoformat()}).status_code == 201
+
+
+def test_booking_requires_whole_hour(client, api_data):
+    booking = {"room_id": api_data["room_ids"][1], "duration_hours": 1, "name": "Пётр", "phone_number": "+70000000002"}
+    for start in (tomorrow_at(10).replace(minute=30), tomorrow_at(10).replace(second=1)):
+        response = client.post("/api/v1/bookings", json={**booking, "start_time": start.isoformat()})
+        assert response.status_code == 400
+    bookings = client.get("/api/v1/bookings", params={"room_id": api_data["room_ids"][1], "date": tomorrow_at(10).date().isoformat()})
+    assert bookings.json() == []
+
+
+def test_download_supports_ranges_and_conditional_requests(client):
+    content = bytes(range(256)) * 40
+    digest = hashlib.sha256(content).hexdigest()
+    for _ in range(2):
+        assert client.post("/chat/admin/send_file", files={"file": ("data.bin", content)}).status_code == 200
+
+    url = f"/download/{digest}/data.bin"
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.content == content
+    assert full.headers["etag"] == f'"{digest}"'
+
+    part = client.get(url, headers={"Range": "bytes=100-199"})
+    assert part.status_code == 206
+    assert part.content == content[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(content)}"
+
+    assert client.get(url, headers={"Range": f"bytes={len(content)}-"}).status_code == 416
+    assert client.get(url, headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    assert client.get(url, headers={"Range": "bytes=-10"}).content == content[-10:]
+    # Несколько диапазонов не поддерживаются — файл целиком
+    assert client.get(url, headers={"Range": "bytes=0-1,5-6"}).content == content
+    # Устаревший If-Range — файл целиком
+    assert client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'}).status_code == 200
+
+    assert client.get(f"/download/{'0' * 64}/data.bin").status_code == 404
+
+
+def test_upload_limit_rejected_before_body_is_read(client, api):
+    headers = {"Content-Type": "multipart/form-data; boundary=xyz", "Content-Length": str(api.file_store.max_size * 2)}
+    assert client.post("/chat/admin/send_file", headers=headers, content=b"--xyz--\r\n").status_code == 413
+    assert client.post("/chat/admin/send_file", data={"message": "no file"}).status_code == 400
+
+
+def test_location_availability_matrix(client, api_data):
+    day = tomorrow_at(10).date().isoformat()
+    response = client.get(f"/api/v1/locations/{api_data['location_id']}/availability", params={"start": day, "days": 2})
+    assert response.status_code == 200
+    rows = response.json()["rooms"]
+    assert [row["room_id"] for row in rows] == api_data["room_ids"]
+    assert all(len(row["free"]) == 2 for row in rows)
+
+    assert client.get("/api/v1/locations/999999/availability", params={"start": day}).status_code == 404
+
+
+def test_unknown_room_returns_not_found(client):
+    day = tomorrow_at(10).date().isoformat()
+    assert client.get("/api/v1/rooms/999999/availability", params={"date": day}).status_code == 404
+    assert client.get("/api/v1/bookings", params={"room_id": 999999, "date": day}).status_code == 404
+    booking = {"room_id": 999999, "duration_hours": 1, "name": "Пётр", "phone_number": "+70000000002",
+               "start_time": tomorrow_at(10).isoformat()}
+    assert client.post("/api/v1/bookings", json=booking).status_code == 404
+
+
+def test_queries_are_labelled_with_route_template(client, api, api_data):
+    room_id = api_data["room_ids"][0]
+    assert client.get(f"/api/v1/rooms/{room_id}/availability", params={"date": tomorrow_at(10).date().isoformat()}).status_code == 200
+    callers = {series.caller for series in api.db_controller.controller.query_stats.series()}
+    assert "GET /api/v1/rooms/{room_id}/availability" in callers
+
+
+def test_debug_endpoints_require_flag(client, api, monkeypatch):
+    for path in ("/metrics", "/debug/traces", "/debug/traces/0123456789"):
+        assert client.get(path).status_code == 404
+    monkeypatch.setattr(api, "DEBUG_ENDPOINTS", True)
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/debug/traces").status_code == 200
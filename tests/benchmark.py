@@ -0,0 +1,226 @@
+"""
+Бенчмарк API и горячих путей DBController.
+
+Режимы:
+    api — задержки (p50/p90/p99) и пропускная способность эндпоинтов запущенного API;
+    db  — микробенчмарки методов DBController на заполненной базе (tests/generate_dataset.py).
+
+Результаты пишутся в JSON вместе с хэшем коммита, чтобы сравнивать прогоны между коммитами:
+    python tests/benchmark.py db --output bench/db_$(git rev-parse --short HEAD).json
+    python tests/benchmark.py api --base-url http://localhost:8000 --output bench/api.json
+    python tests/benchmark.py compare bench/old.json bench/new.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль q (0..100) с линейной интерполяцией по отсортированному списку."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+def measure(func: Callable[[int], object], iterations: int, concurrency: int = 1, warmup: int = 5) -> dict:
+    """Выполняет func(i) iterations раз в concurrency потоков и возвращает сводку задержек."""
+    for i in range(warmup):
+        func(-i - 1)
+
+    def timed(i: int) -> tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            func(i)
+            return time.perf_counter() - started, True
+        except Exception:
+            return time.perf_counter() - started, False
+
+    started = time.perf_counter()
+    if concurrency == 1:
+        results = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - started
+    return summarize([latency for latency, ok in results if ok], elapsed, sum(1 for _, ok in results if not ok))
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def api_benchmarks(args) -> dict:
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    rng = random.Random(args.seed)
+    tomorrow = date.today() + timedelta(days=1)
+
+    def get(path: str) -> Callable[[int], None]:
+        return lambda _: session.get(args.base_url + path).raise_for_status()
+
+    def book(i: int):
+        # Каждое бронирование — свой клиент и свой слот; 409 (слот занят) тоже считается ответом
+        day = tomorrow + timedelta(days=abs(i) % 12)
+        response = session.post(f"{args.base_url}/book/{args.room_id}", data={
+            "name": f"Bench {i}",
+            "phone": f"+7999{rng.randrange(10**7):07d}",
+            "email": f"bench{i}@example.com",
+            "date": day.strftime("%Y-%m-%d"),
+            "time": f"{10 + abs(i) % 12:02d}:00",
+            "duration": 1,
+        })
+        if response.status_code >= 500:
+            response.raise_for_status()
+
+    day = tomorrow.strftime("%Y-%m-%d")
+    cases = {
+        "GET /locations": get("/locations"),
+        "GET /rooms/{id}": get(f"/rooms/{args.location_id}"),
+        "GET /available_times": get(f"/available_times/{args.room_id}/{day}"),
+        "GET /available_durations": get(f"/available_durations/{args.room_id}/{day}/12:00"),
+        "POST /check_availability": lambda _: session.post(args.base_url + "/check_availability", data={"date": day, "time": "12:00"}).raise_for_status(),
+    }
+    if args.include_writes:
+        cases["POST /book/{id}"] = book
+    return {name: measure(func, args.iterations, args.concurrency) for name, func in cases.items()}
+
+
+def db_benchmarks(args) -> dict:
+    from utils.backends import create_backend
+    from utils.controller import DBController
+
+    # DB_BACKEND=sqlite — база SQLite (DB_SQLITE_PATH), как у api.py и generate_reports.py
+    db_controller = DBController(
+        backend=create_backend(
+            os.getenv("DB_BACKEND", "mssql"),
+            server=os.getenv("DB_SERVER", "localhost"),
+            database=os.getenv("DB_NAME", "JamStation"),
+            username=os.getenv("DB_USER", "sa"),
+            password=os.getenv("DB_PASSWORD", "YourStrong!Passw0rd"),
+            sqlite_path=os.getenv("DB_SQLITE_PATH", ":memory:"),
+        ),
+        max_pool_size=max(args.concurrency, 1),
+    )
+    try:
+        location_ids = [row[0] for row in db_controller.execute_query("SELECT id FROM Locations")]
+        if not location_ids:
+            raise SystemExit("База пуста: заполните её tests/generate_dataset.py")
+        rng = random.Random(args.seed)
+        locations = [rng.choice(location_ids) for _ in range(args.iterations)]
+        days = [date.today() - timedelta(days=rng.randint(0, 60)) for _ in range(args.iterations)]
+
+        def pick(values: list, i: int):
+            return values[i % len(values)]
+
+        cases = {
+            "load_schedule": lambda i: db_controller.load_schedule(pick(locations, i), pick(days, i), None),
+            "select_all_receipts": lambda i: db_controller.select_all_receipts(pick(locations, i), limit=20),
+            "get_clients_by_location": lambda i: db_controller.get_clients_by_location(pick(locations, i)),
+            "paginate_table (page 1)": lambda i: db_controller.paginate_table("Schedules", 0, 50),
+            "paginate_table (page 200)": lambda i: db_controller.paginate_table("Schedules", 200 * 50, 50),
+            "paginate_table_keyset (page 1)": lambda i: db_controller.paginate_table_keyset("Schedules", 50),
+        }
+        results = {name: measure(func, args.iterations, args.concurrency) for name, func in cases.items()}
+        results["_pool"] = db_controller.pool_stats().model_dump()
+        results["_statements"] = db_controller.statement_stats(server=True).model_dump()
+        return results
+    finally:
+        db_controller.close_connection()
+
+
+def compare(old_path: str, new_path: str, threshold: float):
+    """Печатает изменение p50/p99 и пропускной способности; код возврата 1 при регрессии выше порога."""
+    with open(old_path, encoding="utf-8") as file:
+        old = json.load(file)["results"]
+    with open(new_path, encoding="utf-8") as file:
+        new = json.load(file)["results"]
+
+    regressed = False
+    print(f"{'case':34} {'p50 old':>9} {'p50 new':>9} {'p99 old':>9} {'p99 new':>9} {'rps Δ':>8}")
+    for name in new:
+        if name.startswith("_") or name not in old:
+            continue
+        before, after = old[name], new[name]
+        change = after["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        rps_change = after["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else 0.0
+        flag = "  <-- регрессия" if change > threshold else ""
+        regressed |= change > threshold
+        print(f"{name:34} {before['p50_ms']:>9.2f} {after['p50_ms']:>9.2f} {before['p99_ms']:>9.2f} {after['p99_ms']:>9.2f} {rps_change:>+8.1%}{flag}")
+    sys.exit(1 if regressed else 0)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Бенчмарк JamStation")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    for mode in ("api", "db"):
+        sub = subparsers.add_parser(mode)
+        sub.add_argument("--iterations", type=int, default=200)
+        sub.add_argument("--concurrency", type=int, default=1)
+        sub.add_argument("--seed", type=int, default=1)
+        sub.add_argument("--output", default=None, help="Файл для результатов в JSON (по умолчанию stdout)")
+        if mode == "api":
+            sub.add_argument("--base-url", default="http://localhost:8000")
+            sub.add_argument("--location-id", type=int, default=1)
+            sub.add_argument("--room-id", type=int, default=1)
+            sub.add_argument("--include-writes", action="store_true", help="Включить POST /book/{id} (создаёт бронирования)")
+    sub = subparsers.add_parser("compare")
+    sub.add_argument("old")
+    sub.add_argument("new")
+    sub.add_argument("--threshold", type=float, default=0.10, help="Допустимый рост p50 (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    if args.mode == "compare":
+        compare(args.old, args.new, args.threshold)
+        return
+
+    results = api_benchmarks(args) if args.mode == "api" else db_benchmarks(args)
+    report = {
+        "mode": args.mode,
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
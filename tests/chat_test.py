@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import APP_DIR
+
+CHAT_JS = os.path.join(APP_DIR, "static", "js", "chat.js")
+
+# Минимальный DOM для static/js/chat.js: список сообщений и элементы с dataset и children
+HARNESS = """
+const fs = require("fs");
+const vm = require("vm");
+
+class Element {
+    constructor(tag) { this.tag = tag; this.children = []; this.dataset = {}; this.textContent = ""; }
+    appendChild(child) { this.children.push(child); return child; }
+    append(...items) { items.forEach(item => this.children.push(item)); }
+    insertBefore(child, next) {
+        const index = next === null ? this.children.length : this.children.indexOf(next);
+        this.children.splice(index, 0, child);
+        return child;
+    }
+    replaceChildren(...children) { this.children = children; }
+}
+
+const list = new Element("ul");
+const context = {
+    document: {
+        createElement: tag => new Element(tag),
+        getElementById: () => list,
+        querySelectorAll: () => [],
+        addEventListener: () => {},
+    },
+    location: { protocol: "http:", host: "localhost" },
+    Number, Array, Set, Math, JSON,
+};
+vm.createContext(context);
+vm.runInContext(fs.readFileSync(process.argv[1], "utf8"), context);
+
+const message = seq => ({ seq, username: "mngr", message: `m${seq}`, file: null, file_hash: null });
+for (const batch of JSON.parse(process.argv[2])) {
+    if (batch.snapshot) {
+        context.applySnapshot(batch.snapshot.map(message));
+    } else {
+        context.applyMessages(batch.map(message));
+    }
+}
+console.log(JSON.stringify(list.children.map(li => Number(li.dataset.seq))));
+"""
+
+
+def rendered_seqs(*batches) -> list[int]:
+    """Номера сообщений в списке после применения пакетов дельт (или {"snapshot": [...]})."""
+    result = subprocess.run(
+        ["node", "-e", HARNESS, CHAT_JS, json.dumps(batches)],
+        capture_output=True, text=True, check=True, timeout=30,
+    )
+    return json.loads(result.stdout)
+
+
+requires_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+
+@requires_node
+def test_late_delta_is_inserted_in_order():
+    assert rendered_seqs([4], [6], [5]) == [4, 5, 6]
+
+
+@requires_node
+def test_duplicates_are_dropped():
+    assert rendered_seqs({"snapshot": [1, 2, 3]}, [2, 3, 4], [4], [1]) == [1, 2, 3, 4]
+
+
+@requires_node
+def test_late_delta_after_snapshot():
+    assert rendered_seqs({"snapshot": [1, 2, 4]}, [6, 3]) == [1, 2, 3, 4, 6]
+
+
+def test_chat_bus_requires_publish():
+    from utils.chat_bus import ChatBus, LocalChatBus
+
+    class IncompleteBus(ChatBus):
+        async def start(self, deliver):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteBus()
+    LocalChatBus()
@@ -0,0 +1,79 @@
+"""
+Общие фикстуры тестов: база SQLite во временном каталоге (utils.backends.SQLiteBackend)
+и приложение FastAPI поверх неё. SQL Server для тестов не нужен.
+
+Запуск: python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+from utils.backends import create_backend
+from utils.controller import DBController
+
+
+def seed(controller: DBController) -> dict:
+    """Локация с двумя залами и клиент; возвращает их id."""
+    location_id = controller.insert("Locations", {"name": "Центр", "address": "ул. Ленина, 1", "phone_number": "100"})
+    room_ids = [
+        controller.insert("Rooms", {"location_id": location_id, "name": name, "capacity": 5, "hourly_rate": 500})
+        for name in ("Красный", "Синий")
+    ]
+    client_id = controller.insert("Clients", {"name": "Иван", "phone_number": "+70000000001"})
+    return {"location_id": location_id, "room_ids": room_ids, "client_id": client_id}
+
+
+def tomorrow_at(hour: int) -> datetime:
+    # Бронирования не дальше 14 дней от текущей даты (ограничение chk_start_time)
+    return (datetime.now() + timedelta(days=1)).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def controller(tmp_path):
+    controller = DBController(backend=create_backend("sqlite", sqlite_path=str(tmp_path / "jamstation.sqlite")))
+    yield controller
+    controller.close_connection()
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    # api.py настраивается переменными окружения при импорте и ищет static/ и templates/ в текущем каталоге
+    root = tmp_path_factory.mktemp("api")
+    environ = {
+        "DB_BACKEND": "sqlite",
+        "DB_SQLITE_PATH": str(root / "jamstation.sqlite"),
+        "UPLOAD_DIR": str(root / "uploads"),
+        "JINJA_CACHE_DIR": str(root / "jinja"),
+    }
+    previous = {name: os.environ.get(name) for name in environ}
+    os.environ.update(environ)
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)
+    try:
+        import api
+        yield api
+    finally:
+        os.chdir(cwd)
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@pytest.fixture(scope="session")
+def api_data(api) -> dict:
+    return seed(api.db_controller.controller)
+
+
+@pytest.fixture
+def client(api):
+    from fastapi.testclient import TestClient
+
+    with TestClient(api.app) as client:
+        yield client
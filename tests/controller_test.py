@@ -0,0 +1,424 @@
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import seed, tomorrow_at
+from utils.async_controller import AsyncDBController
+from utils.availability import AvailabilityIndex, hours_mask, interval_mask
+from utils.chat import ChatStore
+from utils.file_store import FileStore, FileTooLargeError
+from utils.filters import build_conditions, parse_filter
+from utils.pool import ConnectionPool
+
+
+# Фильтры (utils.filters)
+
+def test_prefix_filter_escapes_like_wildcards():
+    conditions, params = build_conditions({"name": "50%_off[1]\\"}, {"name": "nvarchar"})
+    assert conditions == ["name LIKE ? ESCAPE '\\'"]
+    assert params == ["50\\%\\_off\\[1]\\\\%"]
+
+
+def test_contains_filter_matches_literally(controller):
+    for name in ("100% звук", "1000 звук", "a_b", "axb"):
+        controller.insert("Locations", {"name": name, "address": "-", "phone_number": "1"})
+    names = lambda text: sorted(row["name"] for row in controller.paginate_table("Locations", 0, 10, filters={"name": text}))
+    assert names("*0%") == ["100% звук"]
+    assert names("a_") == ["a_b"]
+
+
+def test_filter_rejects_bad_column_and_value():
+    with pytest.raises(ValueError):
+        build_conditions({"name; DROP TABLE Rooms": "x"}, {})
+    with pytest.raises(ValueError):
+        build_conditions({"capacity": "abc"}, {"capacity": "int"})
+
+
+def test_parse_filter_kinds():
+    assert parse_filter("1..5", "int").op == "range"
+    assert parse_filter("=a,b", "nvarchar").value == ["a", "b"]
+    assert parse_filter("*abc", "nvarchar").op == "contains"
+    assert parse_filter("  ", "int") is None
+
+
+# Занятость залов (utils.availability)
+
+def test_interval_mask_spans_midnight():
+    day = datetime(2030, 1, 1)
+    assert interval_mask(day.replace(hour=22), day.replace(hour=22) + timedelta(hours=4), day.date()) == hours_mask(22, 2)
+    assert interval_mask(day.replace(hour=22), day.replace(hour=22) + timedelta(hours=4), day.date() + timedelta(days=1)) == hours_mask(0, 2)
+
+
+def test_booking_started_earlier_blocks_overlapping_hour(controller):
+    data = seed(controller)
+    room_id, other_room_id = data["room_ids"]
+    start = tomorrow_at(18)
+    assert controller.book_room(room_id, start, 3, client_id=data["client_id"]).status == "ok"
+
+    index = AvailabilityIndex(controller)
+    busy = index.load(room_id, start.date())
+    assert busy == hours_mask(18, 3)
+    assert 20 not in AvailabilityIndex.free_hours(busy)
+    assert AvailabilityIndex.durations(busy, 17) == [1]
+    assert index.busy_masks([room_id, other_room_id], start.date(), 2) == {room_id: [busy, 0], other_room_id: [0, 0]}
+
+    assert [row[0] for row in index.free_rooms(start.replace(hour=20), 1)] == [other_room_id]
+    assert [row[0] for row in index.free_rooms(start.replace(hour=21), 1)] == [room_id, other_room_id]
+    assert controller.book_room(room_id, start.replace(hour=20), 1, client_id=data["client_id"]).status == "overlap"
+    assert controller.book_room(room_id, start.replace(hour=21), 1, client_id=data["client_id"]).status == "ok"
+
+
+# Пагинация по ключу
+
+def test_keyset_pagination_walks_all_rows_once(controller):
+    for i in range(7):
+        controller.insert("Locations", {"name": f"L{i % 3}", "address": "-", "phone_number": str(i)})
+
+    for order_column in (None, "name"):
+        seen, after = [], None
+        while True:
+            page = controller.paginate_table_keyset("Locations", 3, order_column=order_column, after=after)
+            if not page:
+                break
+            seen.extend(row["id"] for row in page)
+            after = controller.keyset_cursor(page[-1], order_column)
+        assert sorted(seen) == list(range(1, 8))
+        assert len(seen) == 7
+
+    filtered = controller.paginate_table_keyset("Locations", 10, filters={"name": "=L1"})
+    assert [row["id"] for row in filtered] == [5, 2]
+
+
+# История чата (utils.chat.ChatStore)
+
+def test_chat_store_since(controller):
+    async def scenario():
+        store = ChatStore(AsyncDBController(controller, max_workers=2), max_messages=3, max_resume=4)
+        messages = [await store.append("mngr", f"m{i}") for i in range(6)]
+        for message in messages:
+            store.add(message)
+        seqs = [message.seq for message in messages]
+
+        assert [m.seq for m in await store.recent()] == seqs[-3:]
+        # Из буфера
+        assert [m.seq for m in await store.since(seqs[-2])] == seqs[-1:]
+        assert await store.since(seqs[-1]) == []
+        # Разрыв длиннее буфера — из таблицы
+        assert [m.seq for m in await store.since(seqs[1])] == seqs[2:]
+        # Больше max_resume пропущенных или seq из будущего — нужен снимок
+        assert await store.since(0) is None
+        assert await store.since(seqs[-1] + 100) is None
+
+    asyncio.run(scenario())
+
+
+# Хранилище вложений (utils.file_store.FileStore)
+
+def test_file_store_deduplicates_and_limits_size(tmp_path):
+    from starlette.datastructures import Headers
+
+    store = FileStore(tmp_path, max_size=10)
+
+    async def save(content: bytes) -> str:
+        headers, chunks = multipart_body(content)
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        digest, _ = await store.save_multipart(Headers(headers), stream())
+        return digest
+
+    first = asyncio.run(save(b"hello"))
+    second = asyncio.run(save(b"hello"))
+    assert first == second
+    assert store.path(first).read_bytes() == b"hello"
+    assert len([path for path in tmp_path.rglob("*") if path.is_file()]) == 1
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(save(b"x" * 11))
+    assert not any((tmp_path / "tmp").iterdir())
+    assert store.path("../" + first) is None
+
+
+def test_parse_byte_range():
+    from utils.file_store import RangeNotSatisfiable, parse_byte_range
+
+    assert parse_byte_range("bytes=0-9", 100) == (0, 10)
+    assert parse_byte_range("bytes=90-", 100) == (90, 100)
+    assert parse_byte_range("bytes=-10", 100) == (90, 100)
+    assert parse_byte_range("bytes=50-500", 100) == (50, 100)
+    # Не поддерживается — файл целиком
+    assert parse_byte_range("bytes=0-1,5-6", 100) is None
+    assert parse_byte_range("items=0-1", 100) is None
+    assert parse_byte_range("bytes=9-1", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range("bytes=100-", 100)
+
+
+def multipart_body(content: bytes, field: str = "file", boundary: str = "xyz") -> tuple[dict, list[bytes]]:
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhi\r\n"
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"../a.bin\"\r\n"
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    headers = {"content-type": f"multipart/form-data; boundary={boundary}"}
+    # Тело приходит небольшими кусками, как из request.stream()
+    return headers, [body[i:i + 7000] for i in range(0, len(body), 7000)]
+
+
+def test_file_store_streams_multipart(tmp_path):
+    from starlette.datastructures import Headers
+    from utils.file_store import UploadError
+
+    store = FileStore(tmp_path, max_size=100_000)
+    content = bytes(range(256)) * 300
+
+    async def upload(headers: dict, chunks: list[bytes], field: str = "file"):
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+        return await store.save_multipart(Headers(headers), stream(), field)
+
+    digest, name = asyncio.run(upload(*multipart_body(content[:50_000])))
+    assert name == "a.bin"
+    assert store.path(digest).read_bytes() == content[:50_000]
+
+    # Больше лимита: без Content-Length — по мере чтения, с Content-Length — до чтения тела
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(upload(*multipart_body(content * 2)))
+    headers, _ = multipart_body(b"")
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(upload({**headers, "content-length": str(10 ** 9)}, [b"never read"]))
+
+    with pytest.raises(UploadError):
+        asyncio.run(upload(*multipart_body(b"x", field="other")))
+    with pytest.raises(UploadError):
+        asyncio.run(upload({"content-type": "text/plain"}, [b"x"]))
+    assert not any((tmp_path / "tmp").iterdir())
+
+
+def test_stored_file_response_uses_zerocopysend(tmp_path):
+    from utils.file_store import StoredFileResponse
+
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(100)))
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message["file"].seek(message["offset"])
+            message = {**message, "file": message["file"].read(message["count"])}
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"range", b"bytes=10-19")],
+             "extensions": {"http.response.zerocopysend": {}}}
+    asyncio.run(StoredFileResponse(path, etag="x")(scope, None, send))
+    assert messages[0]["status"] == 206
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert messages[1]["file"] == bytes(range(10, 20))
+
+    messages.clear()
+    asyncio.run(StoredFileResponse(path, etag="x")({**scope, "method": "HEAD"}, None, send))
+    assert dict(messages[0]["headers"])[b"content-length"] == b"10"
+    assert messages[1] == {"type": "http.response.body", "body": b"", "more_body": False}
+
+
+# Пул соединений (utils.pool)
+
+class _FakeConnection:
+    def __init__(self, hang: threading.Event | None = None):
+        self.hang = hang
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        if self.hang is not None:
+            self.hang.wait(5)
+            raise OSError("connection reset")
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_health_check_runs_outside_lock():
+    hang = threading.Event()
+    connections = iter([_FakeConnection(hang), _FakeConnection(), _FakeConnection()])
+    pool = ConnectionPool(lambda: next(connections), min_size=1, max_size=3, health_check_interval=0)
+
+    stuck = threading.Thread(target=lambda: pool.release(pool.acquire()))
+    stuck.start()
+    time.sleep(0.1)
+    # Первое соединение «зависло» на SELECT 1, но остальные потоки получают соединения без ожидания
+    started = time.monotonic()
+    pool.release(pool.acquire())
+    assert time.monotonic() - started < 1
+    assert pool.stats().size == 2
+
+    hang.set()
+    stuck.join(5)
+    stats = pool.stats()
+    assert stats.failed_health_checks == 1
+    assert stats.recycled == 1
+    # Вместо закрытого соединения поток получил освободившееся второе
+    assert stats.size == 1 and stats.idle == 1 and stats.created == 2
+    pool.close()
+    assert pool.stats().size == 0
+
+
+# Сброс кэшей при изменении таблиц
+
+def test_change_listeners_fire_after_commit(controller):
+    changed = []
+    controller.add_change_listener(changed.append)
+
+    controller.insert("Locations", {"name": "A", "address": "-", "phone_number": "1"})
+    assert changed == ["Locations"]
+
+    with controller.transaction():
+        controller.insert("Locations", {"name": "B", "address": "-", "phone_number": "2"})
+        controller.execute_query("UPDATE Locations SET name = ? WHERE name = ?", ("C", "A"))
+        assert changed == ["Locations"]
+    assert changed == ["Locations", "Locations"]
+
+    with pytest.raises(RuntimeError):
+        with controller.transaction():
+            controller.insert("Rooms", {"location_id": 1, "name": "R", "capacity": 1, "hourly_rate": 1})
+            raise RuntimeError("rollback")
+    assert changed == ["Locations", "Locations"]
+    assert controller.execute_query("SELECT COUNT(*) FROM Rooms")[0][0] == 0
+
+
+def test_availability_skips_stale_mask_after_invalidate(controller, monkeypatch):
+    data = seed(controller)
+    room_id = data["room_ids"][0]
+    index = AvailabilityIndex(controller)
+    execute_query = controller.execute_query
+    bookings = [tomorrow_at(12), tomorrow_at(12) + timedelta(days=1)]
+
+    def booking_during_load(query, params=()):
+        # Маска прочитана до бронирования, а invalidate() пришёл раньше сохранения
+        rows = execute_query(query, params)
+        start = bookings.pop(0)
+        controller.book_room(room_id, start, 2, client_id=data["client_id"])
+        index.invalidate(room_id, start.date())
+        return rows
+
+    monkeypatch.setattr(controller, "execute_query", booking_during_load)
+    first, second = (start.date() for start in bookings)
+    assert index.load(room_id, first) == 0
+    assert index.busy_masks([room_id], second, 1) == {room_id: [0]}
+    monkeypatch.setattr(controller, "execute_query", execute_query)
+
+    for day in (first, second):
+        assert index.peek(room_id, day) is None
+        assert index.busy_mask(room_id, day) == hours_mask(12, 2)
+
+
+def test_bulk_insert_returns_ids_in_row_order(controller):
+    rows = [{"name": f"L{i}", "address": "-", "phone_number": str(i)} for i in range(7)]
+    ids = controller.bulk_insert("Locations", rows, batch_size=3, return_ids=True)
+    names = dict(controller.execute_query("SELECT id, name FROM Locations"))
+    assert [names[location_id] for location_id in ids] == [row["name"] for row in rows]
+
+
+def test_statement_templates_are_bounded():
+    from utils.statements import StatementRegistry
+
+    registry = StatementRegistry(max_statements=3)
+    for i in range(10):
+        registry.template(("select", i), lambda i=i: f"SELECT {i}")
+    registry.template(("select", 9), lambda: "unused")
+    stats = registry.stats()
+    assert stats.templates == 3
+    assert stats.template_misses == 10
+    assert stats.template_hits == 1
+    # Вытесненная форма строится заново
+    assert registry.template(("select", 0), lambda: "SELECT 0 again") == "SELECT 0 again"
+
+
+# Очередь отчётов (utils.reports.ReportQueue)
+
+def test_report_preview_does_not_wait_for_jobs(controller, tmp_path, monkeypatch):
+    from utils.documents import equipment_report_data
+    from utils.reports import REPORT_BUILDERS, ReportQueue
+
+    seed(controller)
+    release = threading.Event()
+
+    def slow_builder(controller, job, path, **params):
+        release.wait(10)
+        path.write_bytes(b"docx")
+
+    monkeypatch.setitem(REPORT_BUILDERS, "equipment", slow_builder)
+    queue = ReportQueue(controller, tmp_path, max_workers=1)
+    jobs = [queue.submit("equipment") for _ in range(2)]
+
+    # Единственный генератор занят, но предпросмотр выполняется в своём потоке
+    future = queue.run(lambda: (threading.current_thread().name, equipment_report_data(controller)))
+    thread_name, (equipment_data, checks_data, stats_data) = future.result(5)
+    assert thread_name.startswith("report-preview")
+    assert isinstance(stats_data, str)
+
+    release.set()
+    assert [job.status for job in queue.wait([job.id for job in jobs], timeout=10)] == ["done", "done"]
+    queue.shutdown()
+
+
+def test_reference_cache_skips_rows_loaded_across_invalidate(controller, monkeypatch):
+    data = seed(controller)
+    select = controller.select
+
+    def rename_during_select(*args, **kwargs):
+        # Строки прочитаны до изменения, а сброс кэша пришёл раньше сохранения
+        rows = select(*args, **kwargs)
+        controller.update_record("Locations", {"name": "Север"}, {"id": data["location_id"]})
+        return rows
+
+    monkeypatch.setattr(controller, "select", rename_during_select)
+    assert [location.name for location in controller.references.locations()] == ["Центр"]
+    assert controller.references.location(data["location_id"]).name == "Север"
+    monkeypatch.setattr(controller, "select", select)
+
+    assert [location.name for location in controller.references.locations()] == ["Север"]
+    assert controller.references.location(data["location_id"]).name == "Север"
+
+
+def test_backend_requires_abstract_methods():
+    from utils.backends import Backend, SQLiteBackend
+
+    class IncompleteBackend(Backend):
+        def connect(self):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+    SQLiteBackend(":memory:").close()
+
+
+def test_schema_version_checked_once_per_interval(controller, monkeypatch):
+    from utils.schema_cache import SchemaCache
+
+    calls = []
+    schema_version = controller.backend.schema_version
+
+    def slow_schema_version(controller):
+        calls.append(1)
+        time.sleep(0.05)
+        return schema_version(controller)
+
+    monkeypatch.setattr(controller.backend, "schema_version", slow_schema_version)
+    cache = SchemaCache(controller, check_interval=60)
+    threads = [threading.Thread(target=cache.tables) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
@@ -1,76 +1,67 @@
-import pyodbc 
-import random 
-from faker import Faker 
- 
-# Инициализация фейковых данных 
-faker = Faker() 
- 
-# Подключение к базе данных 
-conn = pyodbc.connect(f'DRIVER={{ODBC Driver 17 for SQL Server}};SERVER=AGUYFROMTHOSEPA;DATABASE=JamStation;UID=sa;PWD=YourStrong!Passw0rd')
-conn.autocommit = True
-cursor = conn.cursor() 
- 
-def insert_fake_data(): 
-    try:  
-        # Добавление тестовых данных для таблицы Clients 
-        for _ in range(15): 
-            cursor.execute( 
-                """ 
-                INSERT INTO Clients (name, phone_number, email) 
-                VALUES (?, ?, ?) 
-                """, 
-                faker.name(), 
-                faker.phone_number(), 
-                faker.email() 
-            ) 
- 
-        # Добавление тестовых данных для таблицы Instruments 
-        for _ in range(10): 
-            cursor.execute( 
-                """ 
-                INSERT INTO Instruments (location_id, name, hourly_rate) 
-                VALUES (?, ?, ?) 
-                """, 
-                random.randint(1, 5), 
-                faker.word(), 
-                round(random.uniform(5.0, 20.0), 2) 
-            ) 
- 
-        # Добавление тестовых данных для таблицы Schedules 
-        for _ in range(20): 
-            cursor.execute( 
-                """ 
-                INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, status) 
-                VALUES (?, ?, ?, ?, ?) 
-                """, 
-                random.randint(1, 10), 
-                random.randint(1, 15), 
-                faker.date_time_this_year(), 
-                random.randint(1, 4), 
-                random.choice(["booked", "completed", "canceled"]) 
-            ) 
- 
-        # Добавление тестовых данных для таблицы Penalties 
-        penalties = ["Late Cancellation", "Equipment Damage", "No Show"] 
-        for penalty in penalties: 
-            cursor.execute( 
-                """ 
-                INSERT INTO Penalties (name, description, amount) 
-                VALUES (?, ?, ?) 
-                """, 
-                penalty, 
-                f"{penalty} description", 
-                round(random.uniform(10.0, 100.0), 2) 
-            ) 
- 
-        conn.commit() 
-        print("Тестовые данные успешно добавлены.") 
-    except Exception as e: 
-        conn.rollback() 
-        print(f"Ошибка при добавлении тестовых данных: {e}") 
-    finally: 
-        cursor.close() 
-        conn.close() 
- 
-# Вызов функции 
-insert_fake_data()
\ No newline at end of file
+import os
+import sys
+import random
+from faker import Faker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils.controller import DBController
+
+# Инициализация фейковых данных
+faker = Faker()
+
+# Подключение к базе данных
+db_controller = DBController(
+    server=os.getenv("DB_SERVER", "localhost"),
+    database=os.getenv("DB_NAME", "JamStation"),
+    username=os.getenv("DB_USER", "sa"),
+    password=os.getenv("DB_PASSWORD", "YourStrong!Passw0rd"),
+)
+
+def insert_fake_data(clients: int = 15, instruments: int = 10, schedules: int = 20):
+    try:
+        location_ids = [row[0] for row in db_controller.execute_query("SELECT id FROM Locations")]
+        room_ids = [row[0] for row in db_controller.execute_query("SELECT id FROM Rooms")]
+        if not location_ids or not room_ids:
+            print("Нет локаций или залов для тестовых данных.")
+            return
+
+        # Клиенты: ID нужны для расписания и штрафов
+        client_ids = db_controller.bulk_insert("Clients", [
+            {"name": faker.name(), "phone_number": faker.phone_number(), "email": faker.email()}
+            for _ in range(clients)
+        ], return_ids=True)
+
+        db_controller.bulk_insert("Instruments", [
+            {"location_id": random.choice(location_ids), "name": faker.word(), "hourly_rate": round(random.uniform(5.0, 20.0), 2)}
+            for _ in range(instruments)
+        ])
+
+        # Расписание без проверки пересечений; непересекающиеся записи создаёт generate_schedules.py
+        db_controller.bulk_insert("Schedules", [
+            {
+                "room_id": random.choice(room_ids),
+                "client_id": random.choice(client_ids),
+                "start_time": faker.date_time_this_year(before_now=True, after_now=False).replace(minute=0, second=0, microsecond=0),
+                "duration_hours": random.randint(1, 4),
+                "status": random.choice(["Активно", "Завершено", "Отменено"]),
+            }
+            for _ in range(schedules)
+        ])
+
+        # Штрафы для нескольких клиентов
+        penalties = ["Late Cancellation", "Equipment Damage", "No Show"]
+        db_controller.bulk_insert("Penalties", [
+            {"client_id": random.choice(client_ids), "description": f"{penalty} description", "amount": round(random.uniform(10.0, 100.0), 2)}
+            for penalty in penalties
+        ])
+
+        print("Тестовые данные успешно добавлены.")
+    except Exception as e:
+        print(f"Ошибка при добавлении тестовых данных: {e}")
+    finally:
+        db_controller.close_connection()
+
+# Вызов функции
+if __name__ == "__main__":
+    insert_fake_data()
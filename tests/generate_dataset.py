@@ -0,0 +1,289 @@
+"""
+Генератор наборов данных для нагрузочного тестирования.
+
+Объём задаётся масштабом (1, 10, 100): масштаб умножает число локаций и клиентов,
+а плотность расписания, чеков и проверок на зал/локацию остаётся реалистичной.
+Каждое значение можно переопределить аргументом командной строки.
+
+Данные детерминированы: при одинаковых --seed и --anchor-date генерируются одни и те же строки.
+Все даты отсчитываются от --anchor-date (по умолчанию сегодня), потому что ограничение
+chk_start_time разрешает бронирования не позднее чем через 14 дней от текущей даты.
+Расписание строится для новых залов, поэтому не пересекается с уже существующими бронированиями.
+
+Пример: python tests/generate_dataset.py --scale 10 --seed 42
+"""
+import os
+import sys
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Iterable, Iterator
+
+from faker import Faker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils.backends import create_backend
+from utils.controller import DBController
+
+# Часы работы залов и ограничения схемы
+OPEN_HOUR = 10
+CLOSE_HOUR = 22
+MAX_DURATION = 6
+MAX_DAYS_AHEAD = 13
+
+# Объём набора при масштабе 1
+BASE = {
+    "locations": 3,
+    "clients": 1000,
+}
+
+# Плотность, не зависящая от масштаба
+DEFAULTS = {
+    "rooms_per_location": 4,
+    "employees_per_location": 3,
+    "instruments_per_location": 10,
+    "consumables_per_location": 10,
+    "equipment_per_room": 5,
+    "schedules_per_day": 3,
+    "receipts_per_day": 10,
+    "checks_per_item": 4,
+    "repair_rate": 0.3,
+    "penalty_rate": 0.05,
+    "days": 90,
+}
+
+INSTRUMENTS = ["Гитара", "Бас-гитара", "Синтезатор", "Барабаны", "Микрофон", "Укулеле", "Скрипка", "Саксофон"]
+EQUIPMENT = [("Усилитель", "Звук"), ("Микшерный пульт", "Звук"), ("Монитор", "Звук"), ("Прожектор", "Свет"), ("Стойка", "Аксессуары")]
+CONSUMABLES = ["Струны", "Медиатор", "Палочки", "Вода", "Кабель", "Батарейки", "Беруши", "Кофе"]
+LEGAL_ENTITIES = ["ООО Звук-Сервис", "ИП Мастер", "ООО РемИнструмент"]
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Генерация детерминированного набора данных JamStation")
+    parser.add_argument("--scale", type=int, default=1, help="Масштаб набора: 1, 10, 100")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=date.today(), help="Дата, от которой отсчитываются бронирования (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    for name, value in {**BASE, **DEFAULTS}.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=None)
+    args = parser.parse_args(argv)
+
+    for name, value in BASE.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value * args.scale)
+    for name, value in DEFAULTS.items():
+        if getattr(args, name) is None:
+            setattr(args, name, value)
+    return args
+
+
+class DatasetGenerator:
+    def __init__(self, db_controller: DBController, args: argparse.Namespace):
+        self.db = db_controller
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.faker = Faker("ru_RU")
+        self.faker.seed_instance(args.seed)
+        self.counts: dict[str, int] = {}
+
+    def load(self, table: str, rows: Iterable[dict], return_ids: bool = False) -> list[int]:
+        """Потоково передаёт строки в bulk_insert порциями по batch_size."""
+        ids, total = [], 0
+        iterator = iter(rows)
+        while chunk := list(islice(iterator, self.args.batch_size)):
+            result = self.db.bulk_insert(table, chunk, batch_size=self.args.batch_size, return_ids=return_ids)
+            if return_ids:
+                ids.extend(result)
+            total += len(chunk)
+        self.counts[table] = self.counts.get(table, 0) + total
+        return ids
+
+    def day_plan(self, day: date) -> list[tuple[datetime, int]]:
+        # Непересекающиеся бронирования зала на день: слоты идут подряд со случайными паузами
+        plan = []
+        hour = OPEN_HOUR + self.rng.randint(0, 2)
+        while hour < CLOSE_HOUR and len(plan) < self.args.schedules_per_day:
+            duration = self.rng.randint(1, min(MAX_DURATION, CLOSE_HOUR - hour))
+            plan.append((datetime.combine(day, datetime.min.time()) + timedelta(hours=hour), duration))
+            hour += duration + self.rng.randint(0, 2)
+        return plan
+
+    def run(self) -> dict[str, int]:
+        args, rng, faker = self.args, self.rng, self.faker
+        anchor = args.anchor_date
+        days = [anchor - timedelta(days=offset) for offset in range(args.days, -MAX_DAYS_AHEAD - 1, -1)]
+
+        location_ids = self.load("Locations", (
+            {"name": f"JamStation {faker.city()} #{i + 1}", "address": faker.address(), "phone_number": faker.phone_number(), "email": faker.email()}
+            for i in range(args.locations)
+        ), return_ids=True)
+
+        rooms = [(location_id, room) for location_id in location_ids for room in range(args.rooms_per_location)]
+        room_rates = [rng.choice([800, 1000, 1200, 1500, 2000]) for _ in rooms]
+        room_ids = self.load("Rooms", (
+            {"location_id": location_id, "name": f"Зал {room + 1}", "capacity": rng.randint(2, 12), "hourly_rate": rate}
+            for (location_id, room), rate in zip(rooms, room_rates)
+        ), return_ids=True)
+        room_location = {room_id: location_id for room_id, (location_id, _) in zip(room_ids, rooms)}
+        room_rate = dict(zip(room_ids, room_rates))
+
+        # Сотрудники через AddEmployee, чтобы хэш пароля совпадал с CheckEmployeePassword
+        employees: dict[int, list[int]] = {}
+        for location_id in location_ids:
+            for i in range(args.employees_per_location):
+                login = f"seed{args.seed}_{location_id}_{i}"
+                self.db.execute_procedure("AddEmployee", [
+                    location_id, faker.first_name()[:20], None, faker.last_name()[:20],
+                    "manager" if i == 0 else "admin", faker.phone_number(), faker.email(), login, "password",
+                ])
+                employee_id = self.db.execute_query("SELECT MAX(id) FROM Employees WHERE login = ?", (login,))[0][0]
+                employees.setdefault(location_id, []).append(employee_id)
+        self.counts["Employees"] = sum(len(ids) for ids in employees.values())
+
+        instrument_ids = self.load("Instruments", (
+            {"location_id": location_id, "name": f"{rng.choice(INSTRUMENTS)} {i + 1}", "hourly_rate": rng.choice([200, 300, 500, 700])}
+            for location_id in location_ids for i in range(args.instruments_per_location)
+        ), return_ids=True)
+
+        consumables = [
+            {"location_id": location_id, "name": name, "price": rng.choice([50, 100, 150, 300, 500]), "quantity": rng.randint(0, 200)}
+            for location_id in location_ids for name in rng.sample(CONSUMABLES, min(args.consumables_per_location, len(CONSUMABLES)))
+        ]
+        consumable_ids = self.load("Consumables", consumables, return_ids=True)
+        consumables_by_location: dict[int, list[tuple[int, float]]] = {}
+        for consumable_id, consumable in zip(consumable_ids, consumables):
+            consumables_by_location.setdefault(consumable["location_id"], []).append((consumable_id, consumable["price"]))
+
+        def equipment() -> Iterator[dict]:
+            for room_id in room_ids:
+                for i in range(args.equipment_per_room):
+                    name, kind = rng.choice(EQUIPMENT)
+                    yield {"name": f"{name} {i + 1}", "type": kind, "room_id": room_id, "status": "OK"}
+        equipment_ids = self.load("Equipment", equipment(), return_ids=True)
+
+        client_ids = self.load("Clients", (
+            {"name": faker.name(), "phone_number": f"+7{9000000000 + args.seed * 10_000_000 + i}", "email": faker.email()}
+            for i in range(args.clients)
+        ), return_ids=True)
+
+        self.load("Penalties", (
+            {
+                "client_id": client_id,
+                "description": "Опоздание",
+                "amount": rng.choice([300, 500, 1000]),
+                "applied_at": datetime.combine(anchor - timedelta(days=rng.randint(1, args.days)), datetime.min.time()),
+                "written_off": None if rng.random() < 0.5 else datetime.combine(anchor, datetime.min.time()),
+            }
+            for client_id in client_ids if rng.random() < args.penalty_rate
+        ))
+
+        # Завершённые репетиции (зал, время, продолжительность) — по ним выписываются чеки
+        completed: list[tuple[int, datetime, int] | None] = []
+
+        def schedules() -> Iterator[dict]:
+            for room_id in room_ids:
+                for day in days:
+                    past = day < anchor
+                    for start_time, duration in self.day_plan(day):
+                        status = rng.choice(["Завершено", "Завершено", "Отменено"]) if past else "Активно"
+                        completed.append((room_id, start_time, duration) if status == "Завершено" else None)
+                        yield {
+                            "room_id": room_id,
+                            "client_id": rng.choice(client_ids),
+                            "start_time": start_time,
+                            "duration_hours": duration,
+                            "is_paid": 1 if status == "Завершено" else rng.randint(0, 1),
+                            "status": status,
+                        }
+        schedule_ids = self.load("Schedules", schedules(), return_ids=True)
+
+        # Чеки за прошедшие дни: до receipts_per_day оплаченных репетиций на локацию в день плюс товары
+        paid: dict[tuple[int, date], list[tuple[int, int, datetime, int]]] = {}
+        for schedule_id, schedule in zip(schedule_ids, completed):
+            if schedule is not None:
+                room_id, start_time, duration = schedule
+                paid.setdefault((room_location[room_id], start_time.date()), []).append((schedule_id, room_id, start_time, duration))
+        receipts, items = [], []
+        for (location_id, _), day_schedules in sorted(paid.items()):
+            for schedule_id, room_id, start_time, duration in rng.sample(day_schedules, min(args.receipts_per_day, len(day_schedules))):
+                created_at = start_time + timedelta(hours=duration)
+                receipt_items = [{"item_table": "Schedule", "item_id": schedule_id, "quantity": None, "total": room_rate[room_id] * duration}]
+                location_consumables = consumables_by_location.get(location_id, [])
+                for consumable_id, price in rng.sample(location_consumables, min(rng.randint(0, 2), len(location_consumables))):
+                    quantity = rng.randint(1, 3)
+                    receipt_items.append({"item_table": "Consumables", "item_id": consumable_id, "quantity": quantity, "total": price * quantity})
+                receipts.append({
+                    "employee_id": rng.choice(employees[location_id]),
+                    "total_amount": sum(item["total"] for item in receipt_items),
+                    "created_at": created_at,
+                })
+                items.append(receipt_items)
+        receipt_ids = self.load("Receipts", receipts, return_ids=True)
+        self.load("Receipt_Items", (
+            {"receipt_id": receipt_id, **item}
+            for receipt_id, receipt_items in zip(receipt_ids, items) for item in receipt_items
+        ))
+
+        # Проверки оборудования и инструментов; часть неисправностей отдана в ремонт
+        all_employees = [employee_id for ids in employees.values() for employee_id in ids]
+        checks = [
+            {
+                "employee_id": rng.choice(all_employees),
+                "item_id": item_id,
+                "item_table": item_table,
+                "inspection_date": datetime.combine(anchor - timedelta(days=rng.randint(1, args.days)), datetime.min.time()),
+                "description": None,
+                "status": "OK" if rng.random() < 0.8 else "Damaged",
+            }
+            for item_table, ids in (("Equipment", equipment_ids), ("Instruments", instrument_ids))
+            for item_id in ids for _ in range(args.checks_per_item)
+        ]
+        for check in checks:
+            if check["status"] != "OK":
+                check["description"] = "Неисправность"
+        check_ids = self.load("Checks", checks, return_ids=True)
+
+        def repairs() -> Iterator[dict]:
+            for check_id, check in zip(check_ids, checks):
+                if check["status"] == "OK" or rng.random() >= args.repair_rate:
+                    continue
+                finished = rng.random() < 0.5
+                yield {
+                    "check_id": check_id,
+                    "repair_start_date": check["inspection_date"],
+                    "repair_end_date": check["inspection_date"] + timedelta(days=rng.randint(1, 14)) if finished else None,
+                    "repair_status": "Завершено" if finished else "В процессе",
+                    "legal_entity": rng.choice(LEGAL_ENTITIES),
+                    "repair_cost": rng.choice([1000, 2500, 5000]),
+                }
+        self.load("Repairs", repairs())
+
+        return self.counts
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    # DB_BACKEND=sqlite — база SQLite (DB_SQLITE_PATH), как у api.py и generate_reports.py
+    db_controller = DBController(
+        backend=create_backend(
+            os.getenv("DB_BACKEND", "mssql"),
+            server=os.getenv("DB_SERVER", "localhost"),
+            database=os.getenv("DB_NAME", "JamStation"),
+            username=os.getenv("DB_USER", "sa"),
+            password=os.getenv("DB_PASSWORD", "YourStrong!Passw0rd"),
+            sqlite_path=os.getenv("DB_SQLITE_PATH", ":memory:"),
+        ),
+    )
+    try:
+        started = datetime.now()
+        counts = DatasetGenerator(db_controller, args).run()
+        for table, count in counts.items():
+            print(f"{table:15} {count:>10}")
+        print(f"Набор x{args.scale} (seed={args.seed}) создан за {(datetime.now() - started).total_seconds():.1f} с")
+    finally:
+        db_controller.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,85 @@
-import pyodbc
-from faker import Faker
-from datetime import datetime, timedelta
+import os
+import sys
 import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from utils.controller import DBController
+
+# Временные рамки для бронирования
+START_HOUR = 10
+END_HOUR = 22
+MAX_DURATION = 6
 
-def fill_schedules(room_id: int):
-    # Подключение к базе данных
-    conn = pyodbc.connect(f'DRIVER={{ODBC Driver 17 for SQL Server}};SERVER=AGUYFROMTHOSEPA;DATABASE=JamStation;UID=sa;PWD=YourStrong!Passw0rd')
-    cursor = conn.cursor()
-    
-    # Инициализация Faker
-    fake = Faker()
-    
-    # Получение существующих client_id из таблицы Clients
-    cursor.execute("SELECT id FROM Clients")
-    client_ids = [row[0] for row in cursor.fetchall()]
-    
-    if not client_ids:
-        print("No clients found in the database.")
-        return
-    
-    # Временные рамки для бронирования
-    start_hour = 10
-    end_hour = 22
-    
-    # Получение текущей даты
-    today = datetime.now().date()
-    
-    # Функция для проверки доступности времени бронирования
-    def is_time_available(start_time, duration_hours):
-        end_time = start_time + timedelta(hours=duration_hours)
-        cursor.execute("""
-            SELECT COUNT(*)
-            FROM Schedules
-            WHERE room_id = ? AND (
-                (start_time <= ? AND DATEADD(hour, duration_hours, start_time) > ?) OR
-                (start_time < ? AND DATEADD(hour, duration_hours, start_time) >= ?)
+def day_plan(day) -> list[tuple[datetime, int]]:
+    """
+    Непересекающиеся бронирования зала на день: время начала и продолжительность.
+    Слоты идут друг за другом со случайными паузами, поэтому проверка
+    пересечений запросами к БД не нужна.
+    """
+    plan = []
+    hour = START_HOUR + random.randint(0, 2)
+    while hour < END_HOUR:
+        duration = random.randint(1, min(MAX_DURATION, END_HOUR - hour))
+        plan.append((datetime.combine(day, datetime.min.time()) + timedelta(hours=hour), duration))
+        hour += duration + random.randint(0, 3)
+    return plan
+
+def fill_schedules(room_ids: list[int] | None = None, days: int = 1, batch_size: int = 5000):
+    """
+    Заполняет расписание залов на days дней, заканчивая сегодняшним днём.
+    Дни, на которые у зала уже есть бронирования, пропускаются.
+    """
+    db_controller = DBController(
+        server=os.getenv("DB_SERVER", "localhost"),
+        database=os.getenv("DB_NAME", "JamStation"),
+        username=os.getenv("DB_USER", "sa"),
+        password=os.getenv("DB_PASSWORD", "YourStrong!Passw0rd"),
+    )
+    try:
+        # Получение существующих client_id из таблицы Clients
+        client_ids = [row[0] for row in db_controller.execute_query("SELECT id FROM Clients")]
+        if not client_ids:
+            print("No clients found in the database.")
+            return
+        if room_ids is None:
+            room_ids = [row[0] for row in db_controller.execute_query("SELECT id FROM Rooms")]
+
+        today = datetime.now().date()
+        first_day = today - timedelta(days=days - 1)
+
+        # Занятые дни — одним запросом вместо проверки каждого слота
+        start = datetime.combine(first_day, datetime.min.time())
+        busy = {
+            (room_id, day)
+            for room_id, day in db_controller.execute_query(
+                "SELECT DISTINCT room_id, CAST(start_time AS DATE) FROM Schedules WHERE start_time >= ?", (start,)
             )
-        """, room_id, start_time, start_time, end_time, end_time)
-        count = cursor.fetchone()[0]
-        return count == 0
-    
-    # Генерация данных для таблицы Schedules
-    schedules = []
-    for _ in range(10):  # Генерируем 10 записей
-        while True:
-            start_hour_random = random.randint(start_hour, end_hour - 1)
-            duration_hours = random.randint(1, 6)
-            start_time = datetime.combine(today, datetime.min.time()) + timedelta(hours=start_hour_random)
-            
-            if start_time.hour + duration_hours <= end_hour and is_time_available(start_time, duration_hours):
-                break
-        
-        client_id = random.choice(client_ids)
-        is_paid = random.choice([0, 1])
-        status = random.choice(['Активно', 'Завершено', 'Отменено'])
-        
-        schedules.append((room_id, client_id, start_time, duration_hours, is_paid, status))
-    
-    # Вставка данных в таблицу Schedules
-    cursor.executemany("""
-        INSERT INTO Schedules (room_id, client_id, start_time, duration_hours, is_paid, status)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, schedules)
-    
-    conn.commit()
-    cursor.close()
-    conn.close()
-    print("Schedules table has been filled.")
+        }
+
+        schedules = []
+        for room_id in room_ids:
+            for offset in range(days):
+                day = first_day + timedelta(days=offset)
+                if (room_id, day) in busy:
+                    continue
+                for start_time, duration_hours in day_plan(day):
+                    schedules.append({
+                        "room_id": room_id,
+                        "client_id": random.choice(client_ids),
+                        "start_time": start_time,
+                        "duration_hours": duration_hours,
+                        "is_paid": random.choice([0, 1]),
+                        "status": random.choice(['Активно', 'Завершено', 'Отменено']),
+                    })
+
+        # Вставка данных в таблицу Schedules пакетами
+        inserted = db_controller.bulk_insert("Schedules", schedules, batch_size=batch_size)
+        print(f"Schedules table has been filled: {inserted} rows.")
+    finally:
+        db_controller.close_connection()
 
-# Пример вызова функции
-fill_schedules(3)
\ No newline at end of file
+# Пример вызова: все залы за последние 30 дней
+if __name__ == "__main__":
+    fill_schedules(days=int(sys.argv[1]) if len(sys.argv) > 1 else 30)
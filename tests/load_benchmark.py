@@ -0,0 +1,62 @@
+import sys
+import time
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+
+# Запуск: python tests/load_benchmark.py [адрес запущенного API (uvicorn api:app)]
+DEFAULT_BASE_URL = "http://localhost:8000"
+REQUESTS_PER_LEVEL = 200
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+
+def endpoints() -> list[str]:
+    day = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    return [
+        "/locations",
+        "/rooms/1",
+        "/room/1",
+        f"/available_times/1/{day}",
+        f"/available_durations/1/{day}/12:00",
+    ]
+
+def timed_get(session: requests.Session, url: str) -> float:
+    started = time.perf_counter()
+    response = session.get(url)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+def run_level(base_url: str, concurrency: int) -> dict:
+    urls = endpoints()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    jobs = [base_url + urls[i % len(urls)] for i in range(REQUESTS_PER_LEVEL)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(lambda url: timed_get(session, url), jobs))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "rps": len(jobs) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_BASE_URL
+    print(f"{'conc':>5} {'req/s':>9} {'p50, ms':>9} {'p95, ms':>9}")
+    baseline = None
+    for level in CONCURRENCY_LEVELS:
+        result = run_level(base_url, level)
+        baseline = baseline or result["rps"]
+        print(f"{result['concurrency']:>5} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}"
+              f"   x{result['rps'] / baseline:.2f}")
+    print(requests.get(base_url + "/metrics/pool").json())
+
+if __name__ == "__main__":
+    main()